@@ -0,0 +1,712 @@
+"""
+Performance Benchmarks
+
+Times the optimized pipeline components against the code paths they replaced.
+Larger universes are simulated by replicating the real stocks under new
+tickers with small random perturbations.
+
+Usage:
+    python benchmark_performance.py              # run all benchmarks
+    python benchmark_performance.py rolling labels   # run selected benchmarks
+"""
+
+import sys
+import time
+import pandas as pd
+import numpy as np
+
+import rolling_kernels
+
+def make_synthetic_universe(df, n_stocks, seed=42):
+    """
+    Build an n_stocks universe from the prepared data by copying the real
+    stocks under new tickers and perturbing prices and volumes.
+    """
+    rng = np.random.default_rng(seed)
+    base_stocks = list(df['stock'].unique())
+    frames = []
+    for i in range(n_stocks):
+        source = base_stocks[i % len(base_stocks)]
+        stock_df = df[df['stock'] == source].copy()
+        if i >= len(base_stocks):
+            noise = 1 + rng.normal(0, 0.01, len(stock_df))
+            for col in ['Close', 'High', 'Low', 'Open']:
+                stock_df[col] = stock_df[col] * noise
+            stock_df['Volume'] = stock_df['Volume'] * rng.uniform(0.5, 1.5)
+            stock_df['stock'] = f"SYN{i:04d}"
+        frames.append(stock_df)
+    universe = pd.concat(frames, ignore_index=True)
+    return universe.sort_values(['stock', 'Date']).reset_index(drop=True)
+
+def load_prepared_data():
+    df = pd.read_csv('data/integrated_prepared_data.csv')
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.sort_values(['stock', 'Date']).reset_index(drop=True)
+
+def time_call(func, *args, repeat=3, **kwargs):
+    """
+    Best-of-`repeat` wall time in seconds, plus the last result.
+    """
+    best = np.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+# ========== ROLLING-WINDOW KERNELS ==========
+
+def groupby_rolling_features(df):
+    """
+    Previous engineer_features path: one groupby/rolling chain per feature.
+    """
+    out = pd.DataFrame(index=df.index)
+    out['daily_return'] = df.groupby('stock')['Close'].pct_change()
+    out['r_1W'] = df.groupby('stock')['Close'].pct_change(periods=5)
+    out['r_1M'] = df.groupby('stock')['Close'].pct_change(periods=21)
+    out['r_3M'] = df.groupby('stock')['Close'].pct_change(periods=63)
+    out['vol_1M'] = out.groupby(df['stock'])['daily_return'].rolling(window=21, min_periods=1).std().reset_index(0, drop=True)
+    out['MA20'] = df.groupby('stock')['Close'].rolling(window=20, min_periods=1).mean().reset_index(0, drop=True)
+    out['MA50'] = df.groupby('stock')['Close'].rolling(window=50, min_periods=1).mean().reset_index(0, drop=True)
+    vol_mean_20 = df.groupby('stock')['Volume'].rolling(window=20, min_periods=1).mean().reset_index(0, drop=True)
+    vol_std_20 = df.groupby('stock')['Volume'].rolling(window=20, min_periods=1).std().reset_index(0, drop=True)
+    out['vol_z'] = (df['Volume'] - vol_mean_20) / (vol_std_20 + 1e-8)
+    return out
+
+def kernel_rolling_features(df):
+    """
+    Current engineer_features path: one pivot, NumPy cumulative-sum kernels.
+    """
+    out = pd.DataFrame(index=df.index)
+    panel = rolling_kernels.StockPanel(df['stock'])
+    close = panel.pivot(df['Close'])
+    volume = panel.pivot(df['Volume'])
+    daily_return = rolling_kernels.pct_change(close, 1)
+    out['daily_return'] = panel.unpivot(daily_return)
+    out['r_1W'] = panel.unpivot(rolling_kernels.pct_change(close, 5))
+    out['r_1M'] = panel.unpivot(rolling_kernels.pct_change(close, 21))
+    out['r_3M'] = panel.unpivot(rolling_kernels.pct_change(close, 63))
+    out['vol_1M'] = panel.unpivot(rolling_kernels.rolling_std(daily_return, 21))
+    out['MA20'] = panel.unpivot(rolling_kernels.rolling_mean(close, 20))
+    out['MA50'] = panel.unpivot(rolling_kernels.rolling_mean(close, 50))
+    out['vol_z'] = panel.unpivot(rolling_kernels.rolling_zscore(volume, 20))
+    return out
+
+def benchmark_rolling_kernels(stock_counts=(2, 20, 100, 400)):
+    print("\n" + "=" * 70)
+    print("ROLLING-WINDOW KERNELS vs GROUPBY/ROLLING CHAINS")
+    print("=" * 70)
+
+    df = load_prepared_data()
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        t_groupby, expected = time_call(groupby_rolling_features, universe)
+        t_kernel, result = time_call(kernel_rolling_features, universe)
+        max_diff = np.nanmax(np.abs(result.to_numpy() - expected.to_numpy()) / (np.abs(expected.to_numpy()) + 1e-9))
+        rows.append({
+            'stocks': n_stocks,
+            'rows': len(universe),
+            'groupby_s': t_groupby,
+            'kernel_s': t_kernel,
+            'speedup': t_groupby / t_kernel,
+            'max_rel_diff': max_diff
+        })
+        print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows): groupby {t_groupby:.3f}s, "
+              f"kernels {t_kernel:.3f}s, speedup {t_groupby / t_kernel:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== LABEL CONSTRUCTION ==========
+
+def groupby_apply_labels(df, horizons=(21,), benchmarks=None):
+    """
+    Previous construct_labels path, repeated per (horizon, benchmark):
+    groupby.apply per stock and the per-date benchmark series built twice.
+    """
+    benchmarks = benchmarks or {'sp500': 'sp500_Close'}
+    df = df.copy()
+    df = df.sort_values(['stock', 'Date']).reset_index(drop=True)
+    out = pd.DataFrame(index=df.index)
+    for h in horizons:
+        out[f'stock_fwd_ret_{h}d'] = df.groupby('stock')['Close'].apply(
+            lambda x: x.shift(-h) / x - 1
+        ).reset_index(0, drop=True)
+        for name, col in benchmarks.items():
+            bench_fwd = df.groupby('Date')[col].first().shift(-h) / df.groupby('Date')[col].first() - 1
+            out[f'{name}_fwd_ret_{h}d'] = df['Date'].map(bench_fwd)
+            out[f'y_{name}_{h}d'] = (out[f'stock_fwd_ret_{h}d'] > out[f'{name}_fwd_ret_{h}d']).astype(int)
+    return out
+
+def benchmark_labels(stock_counts=(2, 20, 100, 400)):
+    print("\n" + "=" * 70)
+    print("VECTORIZED LABELS vs GROUPBY.APPLY")
+    print("=" * 70)
+
+    import contextlib
+    import io
+    from create_features_and_labels import construct_labels, LABEL_HORIZONS, LABEL_BENCHMARKS
+
+    df = load_prepared_data()
+    benchmarks = {name: col for name, col in LABEL_BENCHMARKS.items() if col in df.columns}
+    cases = [
+        ('y only', (21,), {'sp500': 'sp500_Close'}),
+        ('all labels', LABEL_HORIZONS, benchmarks),
+    ]
+
+    def vectorized_labels(universe, horizons, benchmarks):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return construct_labels(universe, horizons, benchmarks)
+
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        for case, horizons, case_benchmarks in cases:
+            t_apply, expected = time_call(groupby_apply_labels, universe, horizons, case_benchmarks)
+            t_vector, result = time_call(vectorized_labels, universe, horizons, case_benchmarks)
+            cols = list(expected.columns)
+            matches = np.allclose(result[cols].to_numpy(dtype=float),
+                                  expected[cols].to_numpy(dtype=float), equal_nan=True)
+            rows.append({
+                'stocks': n_stocks,
+                'rows': len(universe),
+                'labels': case,
+                'columns': len(cols),
+                'apply_s': t_apply,
+                'vectorized_s': t_vector,
+                'speedup': t_apply / t_vector,
+                'matches': matches
+            })
+            print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows), {case:<10}: apply {t_apply:.3f}s, "
+                  f"vectorized {t_vector:.3f}s, speedup {t_apply / t_vector:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== DATE-LEVEL FEATURES ==========
+
+def dict_map_date_features(df):
+    """
+    Previous date-level path: groupby('Date').first() per column, dict(zip())
+    maps and Date.map once per derived column.
+    """
+    out = pd.DataFrame(index=df.index)
+    sp500 = df.groupby('Date')['sp500_Close'].first().sort_index()
+    sp500_returns = sp500.pct_change()
+    out['sp500_daily_return'] = df['Date'].map(dict(zip(sp500_returns.index, sp500_returns.values)))
+    sp500_vol = sp500_returns.rolling(window=21, min_periods=1).std()
+    out['sp500_vol_1M'] = df['Date'].map(dict(zip(sp500_vol.index, sp500_vol.values)))
+    cpi = df.groupby('Date')['CPI'].first().sort_index().pct_change()
+    out['CPI_chg'] = df['Date'].map(dict(zip(cpi.index, cpi.values)))
+    fed = df.groupby('Date')['Fed_Funds_Rate'].first().sort_index().diff()
+    out['FedFunds_chg'] = df['Date'].map(dict(zip(fed.index, fed.values)))
+    return out
+
+def date_index_features(df):
+    """
+    Current path: per-date series from one date index, broadcast by position.
+    """
+    out = pd.DataFrame(index=df.index)
+    dates = rolling_kernels.DateIndex(df['Date'])
+    sp500_returns = rolling_kernels.pct_change(dates.first(df['sp500_Close']), 1)
+    out['sp500_daily_return'] = dates.broadcast(sp500_returns)
+    out['sp500_vol_1M'] = dates.broadcast(rolling_kernels.rolling_std(sp500_returns, 21))
+    out['CPI_chg'] = dates.broadcast(rolling_kernels.pct_change(dates.first(df['CPI']), 1))
+    out['FedFunds_chg'] = dates.broadcast(rolling_kernels.diff(dates.first(df['Fed_Funds_Rate']), 1))
+    return out
+
+def benchmark_date_features(stock_counts=(2, 20, 100, 400)):
+    print("\n" + "=" * 70)
+    print("DATE-INDEX BROADCAST vs DICT MAPPING")
+    print("=" * 70)
+
+    df = load_prepared_data()
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        t_map, expected = time_call(dict_map_date_features, universe)
+        t_index, result = time_call(date_index_features, universe)
+        matches = np.allclose(result.to_numpy(), expected.to_numpy(), equal_nan=True)
+        rows.append({
+            'stocks': n_stocks,
+            'rows': len(universe),
+            'dict_map_s': t_map,
+            'date_index_s': t_index,
+            'speedup': t_map / t_index,
+            'matches': matches
+        })
+        print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows): dict map {t_map:.3f}s, "
+              f"date index {t_index:.3f}s, speedup {t_map / t_index:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== PROCESS-PARALLEL FEATURE ENGINEERING ==========
+
+def benchmark_parallel_features(stock_counts=(100, 400), jobs=(1, 2, 4)):
+    print("\n" + "=" * 70)
+    print("PROCESS-PARALLEL FEATURE ENGINEERING")
+    print("=" * 70)
+
+    import contextlib
+    import io
+    import os
+    from create_features_and_labels import engineer_features, FEATURE_COLUMNS
+
+    def run(universe, n_jobs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_features, _ = engineer_features(universe, n_jobs=n_jobs)
+        return df_features[FEATURE_COLUMNS].to_numpy(dtype=float)
+
+    print(f"   CPU cores available: {os.cpu_count()}")
+    df = load_prepared_data()
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        t_serial, expected = time_call(run, universe, 1, repeat=1)
+        for n_jobs in jobs:
+            if n_jobs == 1:
+                t_jobs, result = t_serial, expected
+            else:
+                t_jobs, result = time_call(run, universe, n_jobs, repeat=1)
+            rows.append({
+                'stocks': n_stocks,
+                'rows': len(universe),
+                'n_jobs': n_jobs,
+                'time_s': t_jobs,
+                'speedup': t_serial / t_jobs,
+                'matches': np.allclose(result, expected, equal_nan=True)
+            })
+            print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows), n_jobs={n_jobs}: "
+                  f"{t_jobs:.3f}s, speedup {t_serial / t_jobs:.2f}x")
+    return pd.DataFrame(rows)
+
+# ========== CROSS-SECTIONAL FEATURES ==========
+
+def groupby_cross_sectional(df, sources):
+    """
+    Per-feature groupby('Date') rank and z-score.
+    """
+    out = pd.DataFrame(index=df.index)
+    for source in sources:
+        grouped = df.groupby('Date')[source]
+        out[f'cs_rank_{source}'] = grouped.rank(pct=True)
+        out[f'cs_z_{source}'] = (df[source] - grouped.transform('mean')) / grouped.transform('std')
+    return out
+
+def calendar_cross_sectional(df, sources):
+    """
+    cross_sectional kernels on one (dates x stocks) calendar array per source.
+    """
+    import cross_sectional
+    out = pd.DataFrame(index=df.index)
+    dates = rolling_kernels.DateIndex(df['Date'])
+    stocks = rolling_kernels.StockPanel(df['stock'])
+    calendar = cross_sectional.CalendarPanel(dates.codes, stocks.codes, dates.n_dates, stocks.shape[1])
+    for source in sources:
+        values = calendar.pivot(df[source])
+        out[f'cs_rank_{source}'] = calendar.unpivot(cross_sectional.rank_pct(values))
+        out[f'cs_z_{source}'] = calendar.unpivot(cross_sectional.zscore(values))
+    return out
+
+def benchmark_cross_sectional(stock_counts=(20, 100, 400)):
+    print("\n" + "=" * 70)
+    print("CALENDAR-ARRAY CROSS-SECTIONAL FEATURES vs GROUPBY('Date')")
+    print("=" * 70)
+
+    df = load_prepared_data()
+    sources = ['daily_return', 'r_1M', 'Volume']
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        universe['daily_return'] = universe.groupby('stock')['Close'].pct_change()
+        universe['r_1M'] = universe.groupby('stock')['Close'].pct_change(21)
+        t_groupby, expected = time_call(groupby_cross_sectional, universe, sources)
+        t_calendar, result = time_call(calendar_cross_sectional, universe, sources)
+        rank_cols = [f'cs_rank_{source}' for source in sources]
+        matches = np.allclose(result[rank_cols].to_numpy(), expected[rank_cols].to_numpy(), equal_nan=True)
+        rows.append({
+            'stocks': n_stocks,
+            'rows': len(universe),
+            'groupby_s': t_groupby,
+            'calendar_s': t_calendar,
+            'speedup': t_groupby / t_calendar,
+            'ranks_match': matches
+        })
+        print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows): groupby {t_groupby:.3f}s, "
+              f"calendar {t_calendar:.3f}s, speedup {t_groupby / t_calendar:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== ROLLING BETA / CORRELATION ==========
+
+def pandas_rolling_beta_corr(returns, benchmarks, windows):
+    """
+    rolling().cov()/var()/corr() per stock x benchmark x window.
+    """
+    out = {}
+    grouped = returns.groupby('stock')
+    for name in benchmarks:
+        for window in windows:
+            beta, corr = [], []
+            for _, stock_df in grouped:
+                x, y = stock_df['daily_return'], stock_df[name]
+                beta.append(x.rolling(window).cov(y) / y.where(x.notna()).rolling(window).var())
+                corr.append(x.rolling(window).corr(y))
+            out[f'beta_{name}_{window}'] = pd.concat(beta).to_numpy()
+            out[f'corr_{name}_{window}'] = pd.concat(corr).to_numpy()
+    return out
+
+def kernel_rolling_beta_corr(returns, benchmarks, windows):
+    """
+    rolling_kernels.rolling_beta_corr with the benchmarks stacked on a third
+    axis: one set of cumulative sums for every stock x benchmark x window.
+    """
+    panel = rolling_kernels.StockPanel(returns['stock'])
+    x = panel.pivot(returns['daily_return'])[:, :, None]
+    y = np.stack([panel.pivot(returns[name]) for name in benchmarks], axis=2)
+    out = {}
+    for window, (beta, corr) in rolling_kernels.rolling_beta_corr(x, y, windows).items():
+        for i, name in enumerate(benchmarks):
+            out[f'beta_{name}_{window}'] = panel.unpivot(beta[:, :, i])
+            out[f'corr_{name}_{window}'] = panel.unpivot(corr[:, :, i])
+    return out
+
+def benchmark_rolling_beta(stock_counts=(20, 100, 400), windows=(21, 63)):
+    print("\n" + "=" * 70)
+    print("CUMULATIVE-SUM ROLLING BETA/CORRELATION vs ROLLING().COV()")
+    print("=" * 70)
+
+    df = load_prepared_data()
+    benchmarks = ['sp500_Close', 'sector_XLK', 'sector_XLF', 'sector_XLV', 'sector_XLE', 'sector_XLI']
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        returns = pd.DataFrame({'stock': universe['stock'],
+                                'daily_return': universe.groupby('stock')['Close'].pct_change()})
+        dates = rolling_kernels.DateIndex(universe['Date'])
+        for name in benchmarks:
+            returns[name] = dates.broadcast(rolling_kernels.pct_change(dates.first(universe[name]), 1))
+
+        t_pandas, expected = time_call(pandas_rolling_beta_corr, returns, benchmarks, windows, repeat=1)
+        t_kernel, result = time_call(kernel_rolling_beta_corr, returns, benchmarks, windows)
+        matches = all(np.allclose(result[k], expected[k], rtol=1e-6, equal_nan=True) for k in expected)
+        rows.append({
+            'stocks': n_stocks,
+            'rows': len(universe),
+            'pairs': n_stocks * len(benchmarks) * len(windows),
+            'pandas_s': t_pandas,
+            'kernel_s': t_kernel,
+            'speedup': t_pandas / t_kernel,
+            'matches': matches
+        })
+        print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows): rolling().cov() {t_pandas:.3f}s, "
+              f"kernel {t_kernel:.3f}s, speedup {t_pandas / t_kernel:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== TECHNICAL INDICATORS ==========
+
+def pandas_technical_indicators(df):
+    """
+    Same indicators with groupby('stock') and pandas ewm/rolling per stock.
+    """
+    def per_stock(d):
+        close, high, low = d['Close'], d['High'], d['Low']
+        ewm = lambda x, alpha: x.ewm(alpha=alpha, adjust=False, ignore_na=True).mean()
+        delta = close.diff()
+        rs = ewm(delta.clip(lower=0), 1 / 14) / ewm((-delta).clip(lower=0), 1 / 14)
+        macd = ewm(close, 2 / 13) - ewm(close, 2 / 27)
+        prev_close = close.shift()
+        true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+        return pd.DataFrame({
+            'RSI_14': 100 - 100 / (1 + rs),
+            'MACD': macd / close,
+            'MACD_hist': (macd - ewm(macd, 2 / 10)) / close,
+            'BB_width': 4 * close.rolling(20, min_periods=1).std() / close.rolling(20, min_periods=1).mean(),
+            'ATR_14': ewm(true_range, 1 / 14) / close,
+            'OBV': (np.sign(delta).fillna(0) * d['Volume']).cumsum(),
+        }, index=d.index)
+    return pd.concat([per_stock(d) for _, d in df.groupby('stock', sort=False)])
+
+def kernel_technical_indicators(df):
+    import contextlib
+    import io
+    from create_features_and_labels import engineer_features, TECHNICAL_FEATURES
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_features, _ = engineer_features(df, TECHNICAL_FEATURES)
+    return df_features[TECHNICAL_FEATURES]
+
+def benchmark_technical_indicators(stock_counts=(20, 100, 400)):
+    print("\n" + "=" * 70)
+    print("PANEL TECHNICAL INDICATORS vs PER-STOCK PANDAS")
+    print("=" * 70)
+
+    df = load_prepared_data()
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        t_pandas, expected = time_call(pandas_technical_indicators, universe, repeat=1)
+        t_kernel, result = time_call(kernel_technical_indicators, universe, repeat=1)
+        matches = np.allclose(result.to_numpy(), expected.loc[result.index, result.columns].to_numpy(),
+                              rtol=1e-9, equal_nan=True)
+        rows.append({
+            'stocks': n_stocks,
+            'rows': len(universe),
+            'pandas_s': t_pandas,
+            'kernel_s': t_kernel,
+            'speedup': t_pandas / t_kernel,
+            'matches': matches
+        })
+        print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows): pandas {t_pandas:.3f}s, "
+              f"panel {t_kernel:.3f}s, speedup {t_pandas / t_kernel:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== CPU BUDGET ==========
+
+def unmanaged_stacked_ensemble():
+    """
+    Previous create_stacked_ensemble: n_jobs=-1 on both the stack and its forest.
+    """
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    estimators = [
+        ('rf', RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)),
+        ('gbm', GradientBoostingClassifier(n_estimators=100, random_state=42))
+    ]
+    return StackingClassifier(estimators=estimators, final_estimator=LogisticRegression(), cv=3, n_jobs=-1)
+
+def benchmark_cpu_budget(budgets=(1, 2, 4), max_train_rows=3000):
+    print("\n" + "=" * 70)
+    print("CPU BUDGET (STACKED ENSEMBLE)")
+    print("=" * 70)
+
+    import contextlib
+    import io
+    import cpu_budget
+    import model_matrix
+    import pipeline
+    from compare_models_timeseries_ensemble import create_stacked_ensemble
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_ml = pipeline.get_pipeline().ml_dataset('all_combined')
+    X_train, X_test, y_train, _ = model_matrix.split_data(df_ml, 'time_dates')
+    X_train, y_train = X_train.iloc[-max_train_rows:], y_train.iloc[-max_train_rows:]
+
+    def run(model):
+        model.fit(X_train, y_train)
+        return model.predict_proba(X_test)[:, 1]
+
+    print(f"   CPU cores available: {cpu_budget.available_cores()}, training rows: {len(X_train):,}")
+    t_base, expected = time_call(run, unmanaged_stacked_ensemble(), repeat=1)
+    rows = [{'config': 'unmanaged (n_jobs=-1 nested)', 'cores': None, 'time_s': t_base,
+             'rows_per_s': len(X_train) / t_base, 'speedup': 1.0, 'matches': True}]
+    print(f"   unmanaged (n_jobs=-1 nested): {t_base:.2f}s, {len(X_train) / t_base:,.0f} rows/s")
+    for cores in budgets:
+        budget = cpu_budget.CpuBudget(cores)
+        with budget.limit():
+            t_budget, result = time_call(run, budget.configure(create_stacked_ensemble(), cores), repeat=1)
+        rows.append({
+            'config': f"budget {cores}",
+            'cores': cores,
+            'time_s': t_budget,
+            'rows_per_s': len(X_train) / t_budget,
+            'speedup': t_base / t_budget,
+            'matches': np.allclose(result, expected)
+        })
+        print(f"   budget {cores} core(s): {t_budget:.2f}s, {len(X_train) / t_budget:,.0f} rows/s, "
+              f"speedup {t_base / t_budget:.2f}x")
+    return pd.DataFrame(rows)
+
+# ========== PURGED CROSS-VALIDATION ==========
+
+def loop_purged_folds(dates, n_groups, n_test_groups, horizon):
+    """
+    Per-fold purging: date-range comparisons over the rows for every test
+    block. Yields (train, test) row indices like CombinatorialPurgedKFold.split.
+    """
+    from itertools import combinations
+    from purged_cv import date_groups
+    unique_dates = np.sort(dates.unique())
+    groups = date_groups(len(unique_dates), n_groups)
+    for combo in combinations(range(n_groups), n_test_groups):
+        test = np.zeros(len(dates), dtype=bool)
+        purged = np.zeros(len(dates), dtype=bool)
+        for g in combo:
+            positions = np.flatnonzero(groups == g)
+            start, end = positions[0], positions[-1]
+            lo = unique_dates[max(start - horizon, 0)]
+            hi = unique_dates[min(end + horizon, len(unique_dates) - 1)]
+            test |= ((dates >= unique_dates[start]) & (dates <= unique_dates[end])).to_numpy()
+            purged |= ((dates >= lo) & (dates <= hi)).to_numpy()
+        yield np.flatnonzero(~purged), np.flatnonzero(test)
+
+def benchmark_purged_cv(stock_counts=(2, 20, 100), n_groups=16, n_test_groups=4):
+    print("\n" + "=" * 70)
+    print(f"COMBINATORIAL PURGED CV ({n_groups} groups, {n_test_groups} test groups)")
+    print("=" * 70)
+
+    import purged_cv
+    from create_features_and_labels import LABEL_HORIZON
+
+    def fold_sizes(folds):
+        # Compared by size and checksum, so folds need not be kept in memory
+        return [(len(tr), tr.sum(), len(te), te.sum()) for tr, te in folds]
+
+    df = load_prepared_data()
+    rows = []
+    for n_stocks in stock_counts:
+        universe = make_synthetic_universe(df, n_stocks)
+        dates = universe['Date']
+        cv = purged_cv.CombinatorialPurgedKFold(n_groups, n_test_groups, dates=dates)
+        t_loop, expected = time_call(
+            lambda: fold_sizes(loop_purged_folds(dates, n_groups, n_test_groups, LABEL_HORIZON)), repeat=1)
+        t_vector, result = time_call(lambda: fold_sizes(cv.split(universe)), repeat=1)
+        rows.append({
+            'stocks': n_stocks,
+            'rows': len(universe),
+            'folds': cv.get_n_splits(),
+            'loop_s': t_loop,
+            'vectorized_s': t_vector,
+            'speedup': t_loop / t_vector,
+            'matches': result == expected
+        })
+        print(f"   {n_stocks:>5} stocks ({len(universe):>9,} rows), {cv.get_n_splits()} folds: "
+              f"loop {t_loop:.3f}s, vectorized {t_vector:.3f}s, speedup {t_loop / t_vector:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== GRADIENT BOOSTING BACKENDS ==========
+
+def upsample_rows(X, y, factor, seed=42):
+    """
+    factor copies of the rows (in date order, copies of a row adjacent) with
+    small feature noise, to simulate a larger universe.
+    """
+    rng = np.random.default_rng(seed)
+    values = np.repeat(X.to_numpy(dtype=float), factor, axis=0)
+    if factor > 1:
+        values *= 1 + rng.normal(0, 0.01, values.shape)
+    return pd.DataFrame(values, columns=X.columns), np.repeat(y.to_numpy(), factor)
+
+def benchmark_gbm_backends(factors=(1, 4, 8)):
+    print("\n" + "=" * 70)
+    print("GRADIENT BOOSTING BACKENDS (exact vs histogram)")
+    print("=" * 70)
+
+    import contextlib
+    import io
+    import boosting
+    import cpu_budget
+    import model_matrix
+    import pipeline
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_ml = pipeline.get_pipeline().ml_dataset('all_combined')
+    df_clean, train_idx, test_idx = model_matrix.split_frame(df_ml, 'time')
+    X_train, X_test, y_train, y_test = model_matrix.split_xy(df_clean, train_idx, test_idx)
+    train_dates = df_clean['Date'].to_numpy()[train_idx]
+
+    configs = {
+        'exact': lambda dates: boosting.make_gbm('exact', max_depth=5),
+        'hist': lambda dates: boosting.make_gbm('hist', max_depth=5, early_stopping=False),
+        'hist + early stopping': lambda dates: boosting.make_gbm('hist', max_depth=5, dates=dates),
+    }
+    print(f"   CPU cores available: {cpu_budget.available_cores()}")
+    rows = []
+    for factor in factors:
+        X, y = upsample_rows(X_train, y_train, factor)
+        t_exact = None
+        for name, factory in configs.items():
+            with cpu_budget.get_budget().limit():
+                result = model_matrix.evaluate(factory(np.repeat(train_dates, factor)), X, X_test, y, y_test)
+            t_exact = t_exact or result['Fit (s)']
+            rows.append({
+                'train_rows': len(X),
+                'backend': name,
+                'fit_s': result['Fit (s)'],
+                'peak_mb': result['Peak Memory (MB)'],
+                'auc': result['AUC'],
+                'speedup': t_exact / result['Fit (s)'],
+            })
+            print(f"   {len(X):>7,} rows  {name:<22} fit {result['Fit (s)']:7.2f}s  "
+                  f"peak {result['Peak Memory (MB)']:6.0f} MB  AUC {result['AUC']:.4f}  "
+                  f"speedup {t_exact / result['Fit (s)']:.1f}x")
+    return pd.DataFrame(rows)
+
+# ========== BATCH SCORING ==========
+
+def benchmark_scoring(stock_counts=(10, 100, 1000, 10000), loop_max_stocks=1000):
+    print("\n" + "=" * 70)
+    print("BATCH SCORING (latest date, whole universe)")
+    print("=" * 70)
+
+    import contextlib
+    import io
+    import tempfile
+    import model_registry
+    import pipeline
+    from scoring_service import ScoringService
+
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+        registry = model_registry.ModelRegistry(root)
+        model_registry.train_and_register('RandomForest', 'all_combined', registry)
+        df_ml = pipeline.get_pipeline().ml_dataset('all_combined', dropna=True)
+        service = ScoringService(registry)
+        artifact = service.model('RandomForest')
+
+        rng = np.random.default_rng(42)
+        latest = df_ml[df_ml['Date'] == df_ml['Date'].max()]
+        rows = []
+        for n_stocks in stock_counts:
+            # n_stocks rows on one date, features perturbed copies of the real stocks
+            universe = latest.iloc[np.arange(n_stocks) % len(latest)].reset_index(drop=True)
+            universe[artifact.features] *= 1 + rng.normal(0, 0.01, (n_stocks, len(artifact.features)))
+            universe['stock'] = [f"SYN{i:05d}" for i in range(n_stocks)]
+
+            def cold_score():
+                # Load the model for the request, as a fresh process would
+                return ScoringService(registry).score_latest('RandomForest', universe)
+
+            def loop_score():
+                model = artifact.model
+                return [model.predict_proba(universe.iloc[[i]][artifact.features])[0, 1] for i in range(n_stocks)]
+
+            t_warm, expected = time_call(service.score_latest, 'RandomForest', universe)
+            t_cold, _ = time_call(cold_score)
+            t_loop, loop = time_call(loop_score, repeat=1) if n_stocks <= loop_max_stocks else (np.nan, None)
+            rows.append({
+                'stocks': n_stocks,
+                'per_stock_loop_ms': t_loop * 1000,
+                'cold_load_ms': t_cold * 1000,
+                'in_memory_ms': t_warm * 1000,
+                'rows_per_s': n_stocks / t_warm,
+                'speedup_vs_loop': t_loop / t_warm,
+                'matches': loop is None or np.allclose(loop, expected['score'])
+            })
+    for row in rows:
+        print(f"   {row['stocks']:>6} stocks: per-stock loop {row['per_stock_loop_ms']:9.1f} ms, "
+              f"cold load {row['cold_load_ms']:7.1f} ms, in memory {row['in_memory_ms']:7.1f} ms "
+              f"({row['rows_per_s']:,.0f} rows/s)")
+    return pd.DataFrame(rows)
+
+BENCHMARKS = {
+    'rolling': benchmark_rolling_kernels,
+    'labels': benchmark_labels,
+    'date_features': benchmark_date_features,
+    'parallel': benchmark_parallel_features,
+    'cross_sectional': benchmark_cross_sectional,
+    'beta': benchmark_rolling_beta,
+    'technical': benchmark_technical_indicators,
+    'cpu_budget': benchmark_cpu_budget,
+    'purged_cv': benchmark_purged_cv,
+    'gbm_backends': benchmark_gbm_backends,
+    'scoring': benchmark_scoring,
+}
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    results = {}
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            continue
+        results[name] = BENCHMARKS[name]()
+        print("\n" + results[name].to_string(index=False))
+    return results
+
+if __name__ == '__main__':
+    main()
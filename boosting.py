@@ -0,0 +1,126 @@
+"""
+Gradient Boosting Backends
+
+The compare scripts and the stacked ensemble used scikit-learn's exact
+GradientBoostingClassifier, which scans every split point of every feature
+on a single thread. make_gbm builds the boosting model from a chosen backend:
+
+    'exact'  GradientBoostingClassifier (the previous model, unchanged)
+    'hist'   HistGradientBoostingClassifier: features binned into 255
+             histograms once, trees grown on the bins with OpenMP threads
+             (capped by cpu_budget.limit())
+
+The default comes from $GBM_BACKEND ('exact' if unset). The hist backend
+stops early on a temporal validation slice by default: TemporalEarlyStopping
+fits on all but the most recent rows, picks the iteration with the lowest
+validation log loss from staged_predict_proba, and refits on every row with
+that many iterations. The built-in early stopping of HistGradientBoosting
+would validate on a random sample of rows, i.e. on dates inside the
+training period.
+
+    clf = make_gbm('hist', max_depth=5)
+    clf = make_gbm('hist', n_estimators=300, dates=train_dates)   # purged validation slice
+"""
+
+import os
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import log_loss
+
+import rolling_kernels
+from create_features_and_labels import LABEL_HORIZON
+
+BACKENDS = ('exact', 'hist')
+
+def default_backend():
+    return os.environ.get('GBM_BACKEND', 'exact')
+
+def make_gbm(backend=None, n_estimators=100, max_depth=3, learning_rate=0.1, random_state=42,
+             early_stopping=None, dates=None):
+    """
+    Boosting classifier of the given backend. early_stopping defaults to
+    True for 'hist' and False for 'exact'; n_estimators is then the cap.
+    """
+    backend = backend or default_backend()
+    if backend == 'exact':
+        model = GradientBoostingClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                           learning_rate=learning_rate, random_state=random_state)
+    elif backend == 'hist':
+        # max_leaf_nodes=None: trees limited by depth only, like the exact backend
+        model = HistGradientBoostingClassifier(max_iter=n_estimators, max_depth=max_depth, max_leaf_nodes=None,
+                                               learning_rate=learning_rate, early_stopping=False,
+                                               random_state=random_state)
+    else:
+        raise ValueError(f"Unknown GBM backend {backend!r} (available: {', '.join(BACKENDS)})")
+
+    if early_stopping is None:
+        early_stopping = backend == 'hist'
+    return TemporalEarlyStopping(model, dates=dates) if early_stopping else model
+
+def _rows(X, idx):
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+
+class TemporalEarlyStopping(ClassifierMixin, BaseEstimator):
+    """
+    Early stopping of a boosting model on its most recent training rows.
+
+    Rows must be in chronological order. Without dates the last
+    validation_fraction of rows is the validation slice. With the rows'
+    dates it is the last validation_fraction of trading dates, and the
+    `gap` dates before it are left out of the first fit so that no training
+    label window overlaps the validation period.
+    """
+
+    def __init__(self, estimator, validation_fraction=0.1, gap=LABEL_HORIZON, dates=None):
+        self.estimator = estimator
+        self.validation_fraction = validation_fraction
+        self.gap = gap
+        self.dates = dates
+
+    def _iteration_param(self):
+        return 'max_iter' if 'max_iter' in self.estimator.get_params() else 'n_estimators'
+
+    def set_params(self, **params):
+        """
+        Set parameters of the wrapper, or of the wrapped estimator without
+        the estimator__ prefix (max_depth, n_estimators...), so a search space
+        or stack parameter written for the bare boosting model also works on
+        the wrapper. n_estimators sets the iteration cap (max_iter for hist).
+        """
+        own = self.get_params(deep=False)
+        for key in [k for k in params if k not in own and '__' not in k]:
+            name = self._iteration_param() if key == 'n_estimators' else key
+            params[f"estimator__{name}"] = params.pop(key)
+        return super().set_params(**params)
+
+    def _split(self, n_rows):
+        if self.dates is None:
+            split = int(n_rows * (1 - self.validation_fraction))
+            return np.arange(split), np.arange(split, n_rows)
+        if len(self.dates) != n_rows:
+            raise ValueError(f"Got {len(self.dates)} dates for {n_rows} rows")
+        index = rolling_kernels.DateIndex(self.dates)
+        split = int(index.n_dates * (1 - self.validation_fraction))
+        return np.flatnonzero(index.codes < split - self.gap), np.flatnonzero(index.codes >= split)
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        train_idx, val_idx = self._split(len(y))
+        model = clone(self.estimator).fit(_rows(X, train_idx), y[train_idx])
+
+        X_val, y_val = _rows(X, val_idx), y[val_idx]
+        self.validation_loss_ = np.array([log_loss(y_val, proba, labels=model.classes_)
+                                          for proba in model.staged_predict_proba(X_val)])
+        self.best_iteration_ = int(np.argmin(self.validation_loss_)) + 1
+
+        self.estimator_ = clone(self.estimator).set_params(**{self._iteration_param(): self.best_iteration_})
+        self.estimator_.fit(X, y)
+        self.classes_ = self.estimator_.classes_
+        return self
+
+    def predict_proba(self, X):
+        return self.estimator_.predict_proba(X)
+
+    def predict(self, X):
+        return self.estimator_.predict(X)
@@ -19,12 +19,9 @@ from sklearn.metrics import accuracy_score, f1_score, classification_report
 import os
 
 # Import our refactored modules
-import prepare_data
-import create_features_and_labels
-import detect_outliers
-import scale_features
+import scenario_executor
 
-def train_and_evaluate(df, name="Model"):
+def train_and_evaluate(df, name="Model", n_jobs=-1):
     """
     Train a Random Forest model and evaluate its performance.
     """
@@ -46,7 +43,7 @@ def train_and_evaluate(df, name="Model"):
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
     # Train model
-    clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
     clf.fit(X_train, y_train)
     
     # Predict
@@ -63,107 +60,20 @@ def train_and_evaluate(df, name="Model"):
     
     return acc, f1
 
-def main():
+def main(n_jobs=-1):
     print("=" * 70)
     print("DATA PREPARATION COMPARISON ANALYSIS")
     print("=" * 70)
     
-    results = []
-    
-    # Load raw integrated data
-    print("\nLoading raw data...")
-    df_raw = pd.read_csv('data/integrated_raw_data.csv')
-    df_raw['Date'] = pd.to_datetime(df_raw['Date'])
-    
-    # ========== SCENARIO 1: BASELINE (Minimal Prep) ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 1: BASELINE (Drop Nulls, No Scaling, No Outlier Removal)")
-    print("-" * 70)
-    
-    # Just forward fill to get *some* usable data, but don't do the smart stuff
-    df_baseline = df_raw.copy()
-    df_baseline = df_baseline.ffill().dropna() # Simple ffill
-    
-    # Engineer features (we need features to train)
-    print("Engineering features for baseline...")
-    df_baseline_ml, _ = create_features_and_labels.process_data(df_baseline)
-    
-    acc_1, f1_1 = train_and_evaluate(df_baseline_ml, "Baseline Model")
-    results.append({'Scenario': 'Baseline (Simple Fill)', 'Accuracy': acc_1, 'F1': f1_1})
-    
-    # ========== SCENARIO 2: SMART NULL HANDLING ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 2: SMART NULL HANDLING (Imputation)")
-    print("-" * 70)
-    
-    # Use our smart prepare_data script
-    print("Applying smart null handling...")
-    df_smart = prepare_data.prepare_data() # This loads from disk, which is fine as it uses integrated_raw_data.csv
-    
-    print("Engineering features...")
-    df_smart_ml, _ = create_features_and_labels.process_data(df_smart)
-    
-    acc_2, f1_2 = train_and_evaluate(df_smart_ml, "Smart Imputation Model")
-    results.append({'Scenario': 'Smart Imputation', 'Accuracy': acc_2, 'F1': f1_2})
-    
-    # ========== SCENARIO 3: OUTLIER REMOVAL ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 3: OUTLIER REMOVAL (on top of Smart Imputation)")
-    print("-" * 70)
-    
-    # Detect outliers on the prepared data
-    print("Detecting and removing outliers...")
-    zscore_results, iqr_results = detect_outliers.analyze_outliers(df_smart)
-    df_no_outliers = detect_outliers.remove_outliers(df_smart, zscore_results, method='zscore')
-    
-    print(f"Removed {len(df_smart) - len(df_no_outliers)} outlier rows")
-    
-    print("Engineering features...")
-    df_outlier_ml, _ = create_features_and_labels.process_data(df_no_outliers)
-    
-    acc_3, f1_3 = train_and_evaluate(df_outlier_ml, "Outlier Removal Model")
-    results.append({'Scenario': 'Outlier Removal', 'Accuracy': acc_3, 'F1': f1_3})
-    
-    # ========== SCENARIO 4: SCALING ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 4: SCALING (on top of Smart Imputation)")
-    print("-" * 70)
-    
-    # Scale the features (using the ML dataset from Scenario 2)
-    # Note: We scale the *features*, not the raw data before feature engineering usually, 
-    # but our script scales raw data. Let's follow the script's pattern for now.
-    print("Scaling raw features...")
-    df_scaled_raw, _ = scale_features.process_scaling(df_smart)
-    
-    print("Engineering features from scaled data...")
-    df_scaled_ml, _ = create_features_and_labels.process_data(df_scaled_raw)
-    
-    acc_4, f1_4 = train_and_evaluate(df_scaled_ml, "Scaled Data Model")
-    results.append({'Scenario': 'Scaled Data', 'Accuracy': acc_4, 'F1': f1_4})
-    
-    # ========== SCENARIO 5: ALL COMBINED ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 5: ALL COMBINED (Smart + Outliers + Scaling)")
-    print("-" * 70)
-    
-    # 1. Smart Imputation (Done -> df_smart)
-    # 2. Outlier Removal (Done -> df_no_outliers)
-    # 3. Scaling (Apply to df_no_outliers)
-    print("Scaling outlier-free data...")
-    df_final_raw, _ = scale_features.process_scaling(df_no_outliers)
-    
-    print("Engineering features...")
-    df_final_ml, _ = create_features_and_labels.process_data(df_final_raw)
-    
-    acc_5, f1_5 = train_and_evaluate(df_final_ml, "Combined Model")
-    results.append({'Scenario': 'All Combined', 'Accuracy': acc_5, 'F1': f1_5})
+    # Shared preparation stages run once; the scenario fits run in a process pool
+    results = scenario_executor.run_scenarios(train_and_evaluate, model_suffix='Model', n_jobs=n_jobs)
     
     # ========== RESULTS ==========
     print("\n" + "=" * 70)
     print("FINAL RESULTS COMPARISON")
     print("=" * 70)
     
-    results_df = pd.DataFrame(results)
+    results_df = scenario_executor.results_table(results, ['Accuracy', 'F1'])
     print("\n" + results_df.to_string(index=False))
     
     # Save results
@@ -3,41 +3,51 @@ Compare Stacked Ensemble Accuracy with Different Data Preparation Techniques
 Using TIME SERIES SPLIT (Realistic Evaluation)
 
 This compares how Stacked Ensemble performs across 5 data prep scenarios.
+Base learner fits are cached (oof_stacking.py), so re-runs only refit what changed.
 """
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, StackingClassifier
+from sklearn.ensemble import RandomForestClassifier, StackingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
 import os
 
 # Import our refactored modules
-import prepare_data
-import create_features_and_labels
-import detect_outliers
-import scale_features
+import boosting
+import cpu_budget
+import oof_stacking
+import purged_cv
+import scenario_executor
 
-def create_stacked_ensemble():
+def create_stacked_ensemble(n_jobs=-1, dates=None, gbm_backend=None):
     """
     Create a Stacked Ensemble similar to H2O's approach.
     Uses RF, GBM as base learners with Logistic Regression as meta-learner.
+    The n_jobs cores are shared out between the stack and its base learners
+    by the CPU budget, so nested jobs do not oversubscribe the machine.
+    Given the training rows' dates, the meta-learner's internal CV is a
+    purged K-fold, so base learners never train on labels overlapping the
+    fold they predict. The GBM base learner uses boosting.make_gbm's
+    backend ($GBM_BACKEND, exact by default).
     """
     estimators = [
-        ('rf', RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)),
-        ('gbm', GradientBoostingClassifier(n_estimators=100, random_state=42))
+        ('rf', RandomForestClassifier(n_estimators=100, random_state=42)),
+        # Fixed 100 iterations: the stack refits the GBM on CV folds whose
+        # dates it cannot see, so temporal early stopping could not purge
+        ('gbm', boosting.make_gbm(gbm_backend, n_estimators=100, random_state=42, early_stopping=False))
     ]
     
     stack = StackingClassifier(
         estimators=estimators,
         final_estimator=LogisticRegression(),
-        cv=3,  # Internal cross-validation for meta-learner
-        n_jobs=-1
+        # Internal cross-validation for meta-learner
+        cv=purged_cv.PurgedKFold(3, dates=dates) if dates is not None else 3
     )
     
-    return stack
+    return cpu_budget.get_budget().configure(stack, n_jobs)
 
-def train_and_evaluate_timeseries(df, name="Model"):
+def train_and_evaluate_timeseries(df, name="Model", n_jobs=-1):
     """
     Train a Stacked Ensemble using TIME SERIES SPLIT and evaluate.
     """
@@ -75,8 +85,9 @@ def train_and_evaluate_timeseries(df, name="Model"):
     print(f"  Training samples: {len(X_train)}")
     print(f"  Test samples: {len(X_test)}")
     
-    # Train Stacked Ensemble
-    ensemble = create_stacked_ensemble()
+    # Train Stacked Ensemble (base learner fits and out-of-fold predictions cached per scenario)
+    stack = create_stacked_ensemble(n_jobs, dates=df_clean.loc[train_mask, 'Date'])
+    ensemble = oof_stacking.CachedStack.from_stacking(stack, scenario=name)
     ensemble.fit(X_train, y_train)
     
     # Predict
@@ -94,97 +105,20 @@ def train_and_evaluate_timeseries(df, name="Model"):
     
     return acc, f1, auc
 
-def main():
+def main(n_jobs=-1):
     print("=" * 70)
     print("STACKED ENSEMBLE COMPARISON - TIME SERIES SPLIT")
     print("=" * 70)
     
-    results = []
-    
-    # Load raw integrated data
-    print("\nLoading raw data...")
-    df_raw = pd.read_csv('data/integrated_raw_data.csv')
-    df_raw['Date'] = pd.to_datetime(df_raw['Date'])
-    
-    # ========== SCENARIO 1: BASELINE (Minimal Prep) ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 1: BASELINE (Drop Nulls, No Scaling, No Outlier Removal)")
-    print("-" * 70)
-    
-    df_baseline = df_raw.copy()
-    df_baseline = df_baseline.ffill().dropna()
-    
-    print("Engineering features for baseline...")
-    df_baseline_ml, _ = create_features_and_labels.process_data(df_baseline)
-    
-    acc_1, f1_1, auc_1 = train_and_evaluate_timeseries(df_baseline_ml, "Baseline Ensemble")
-    results.append({'Scenario': 'Baseline (Simple Fill)', 'Accuracy': acc_1, 'F1': f1_1, 'AUC': auc_1})
-    
-    # ========== SCENARIO 2: SMART NULL HANDLING ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 2: SMART NULL HANDLING (Imputation)")
-    print("-" * 70)
-    
-    print("Applying smart null handling...")
-    df_smart = prepare_data.prepare_data()
-    
-    print("Engineering features...")
-    df_smart_ml, _ = create_features_and_labels.process_data(df_smart)
-    
-    acc_2, f1_2, auc_2 = train_and_evaluate_timeseries(df_smart_ml, "Smart Imputation Ensemble")
-    results.append({'Scenario': 'Smart Imputation', 'Accuracy': acc_2, 'F1': f1_2, 'AUC': auc_2})
-    
-    # ========== SCENARIO 3: OUTLIER REMOVAL ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 3: OUTLIER REMOVAL (on top of Smart Imputation)")
-    print("-" * 70)
-    
-    print("Detecting and removing outliers...")
-    zscore_results, iqr_results = detect_outliers.analyze_outliers(df_smart)
-    df_no_outliers = detect_outliers.remove_outliers(df_smart, zscore_results, method='zscore')
-    
-    print(f"Removed {len(df_smart) - len(df_no_outliers)} outlier rows")
-    
-    print("Engineering features...")
-    df_outlier_ml, _ = create_features_and_labels.process_data(df_no_outliers)
-    
-    acc_3, f1_3, auc_3 = train_and_evaluate_timeseries(df_outlier_ml, "Outlier Removal Ensemble")
-    results.append({'Scenario': 'Outlier Removal', 'Accuracy': acc_3, 'F1': f1_3, 'AUC': auc_3})
-    
-    # ========== SCENARIO 4: SCALING ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 4: SCALING (on top of Smart Imputation)")
-    print("-" * 70)
-    
-    print("Scaling raw features...")
-    df_scaled_raw, _ = scale_features.process_scaling(df_smart)
-    
-    print("Engineering features from scaled data...")
-    df_scaled_ml, _ = create_features_and_labels.process_data(df_scaled_raw)
-    
-    acc_4, f1_4, auc_4 = train_and_evaluate_timeseries(df_scaled_ml, "Scaled Data Ensemble")
-    results.append({'Scenario': 'Scaled Data', 'Accuracy': acc_4, 'F1': f1_4, 'AUC': auc_4})
-    
-    # ========== SCENARIO 5: ALL COMBINED ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 5: ALL COMBINED (Smart + Outliers + Scaling)")
-    print("-" * 70)
-    
-    print("Scaling outlier-free data...")
-    df_final_raw, _ = scale_features.process_scaling(df_no_outliers)
-    
-    print("Engineering features...")
-    df_final_ml, _ = create_features_and_labels.process_data(df_final_raw)
-    
-    acc_5, f1_5, auc_5 = train_and_evaluate_timeseries(df_final_ml, "Combined Ensemble")
-    results.append({'Scenario': 'All Combined', 'Accuracy': acc_5, 'F1': f1_5, 'AUC': auc_5})
+    # Shared preparation stages run once; the scenario fits run in a process pool
+    results = scenario_executor.run_scenarios(train_and_evaluate_timeseries, model_suffix='Ensemble', n_jobs=n_jobs)
     
     # ========== RESULTS ==========
     print("\n" + "=" * 70)
     print("FINAL RESULTS COMPARISON (STACKED ENSEMBLE - TIME SERIES SPLIT)")
     print("=" * 70)
     
-    results_df = pd.DataFrame(results)
+    results_df = scenario_executor.results_table(results, ['Accuracy', 'F1', 'AUC'])
     print("\n" + results_df.to_string(index=False))
     
     # Save results
@@ -3,21 +3,24 @@ Compare GBM Accuracy with Different Data Preparation Techniques
 Using TIME SERIES SPLIT (Realistic Evaluation)
 
 This script tests GBM (the best model from AutoML) across 5 data prep scenarios.
+
+Usage:
+    python compare_models_timeseries_gbm.py          # exact GradientBoostingClassifier
+    python compare_models_timeseries_gbm.py hist     # histogram backend, early stopping (see boosting.py)
 """
 
+import functools
+import sys
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
 import os
 
 # Import our refactored modules
-import prepare_data
-import create_features_and_labels
-import detect_outliers
-import scale_features
+import boosting
+import scenario_executor
 
-def train_and_evaluate_timeseries(df, name="Model"):
+def train_and_evaluate_timeseries(df, name="Model", backend=None):
     """
     Train a GBM model using TIME SERIES SPLIT and evaluate.
     Train on first 80% chronologically, test on last 20%.
@@ -52,9 +55,11 @@ def train_and_evaluate_timeseries(df, name="Model"):
     print(f"  Training samples: {len(X_train)} (up to {df_clean['Date'].iloc[split_idx-1].date()})")
     print(f"  Test samples: {len(X_test)} (from {split_date.date()} onwards)")
     
-    # Train GBM model
-    clf = GradientBoostingClassifier(n_estimators=100, random_state=42, max_depth=5)
+    # Train GBM model (early stopping, if any, validates on the last training dates)
+    clf = boosting.make_gbm(backend, n_estimators=100, max_depth=5, dates=df_clean['Date'].iloc[:split_idx])
     clf.fit(X_train, y_train)
+    if isinstance(clf, boosting.TemporalEarlyStopping):
+        print(f"  Early stopping: {clf.best_iteration_} of 100 iterations")
     
     # Predict
     y_pred = clf.predict(X_test)
@@ -71,102 +76,29 @@ def train_and_evaluate_timeseries(df, name="Model"):
     
     return acc, f1, auc
 
-def main():
+def main(n_jobs=-1, backend=None):
+    backend = backend or boosting.default_backend()
     print("=" * 70)
-    print("GBM DATA PREPARATION COMPARISON - TIME SERIES SPLIT")
+    print(f"GBM DATA PREPARATION COMPARISON - TIME SERIES SPLIT ({backend} backend)")
     print("=" * 70)
     
-    results = []
-    
-    # Load raw integrated data
-    print("\nLoading raw data...")
-    df_raw = pd.read_csv('data/integrated_raw_data.csv')
-    df_raw['Date'] = pd.to_datetime(df_raw['Date'])
-    
-    # ========== SCENARIO 1: BASELINE (Minimal Prep) ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 1: BASELINE (Drop Nulls, No Scaling, No Outlier Removal)")
-    print("-" * 70)
-    
-    df_baseline = df_raw.copy()
-    df_baseline = df_baseline.ffill().dropna()
-    
-    print("Engineering features for baseline...")
-    df_baseline_ml, _ = create_features_and_labels.process_data(df_baseline)
-    
-    acc_1, f1_1, auc_1 = train_and_evaluate_timeseries(df_baseline_ml, "Baseline GBM")
-    results.append({'Scenario': 'Baseline (Simple Fill)', 'Accuracy': acc_1, 'F1': f1_1, 'AUC': auc_1})
-    
-    # ========== SCENARIO 2: SMART NULL HANDLING ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 2: SMART NULL HANDLING (Imputation)")
-    print("-" * 70)
-    
-    print("Applying smart null handling...")
-    df_smart = prepare_data.prepare_data()
-    
-    print("Engineering features...")
-    df_smart_ml, _ = create_features_and_labels.process_data(df_smart)
-    
-    acc_2, f1_2, auc_2 = train_and_evaluate_timeseries(df_smart_ml, "Smart Imputation GBM")
-    results.append({'Scenario': 'Smart Imputation', 'Accuracy': acc_2, 'F1': f1_2, 'AUC': auc_2})
-    
-    # ========== SCENARIO 3: OUTLIER REMOVAL ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 3: OUTLIER REMOVAL (on top of Smart Imputation)")
-    print("-" * 70)
-    
-    print("Detecting and removing outliers...")
-    zscore_results, iqr_results = detect_outliers.analyze_outliers(df_smart)
-    df_no_outliers = detect_outliers.remove_outliers(df_smart, zscore_results, method='zscore')
-    
-    print(f"Removed {len(df_smart) - len(df_no_outliers)} outlier rows")
-    
-    print("Engineering features...")
-    df_outlier_ml, _ = create_features_and_labels.process_data(df_no_outliers)
-    
-    acc_3, f1_3, auc_3 = train_and_evaluate_timeseries(df_outlier_ml, "Outlier Removal GBM")
-    results.append({'Scenario': 'Outlier Removal', 'Accuracy': acc_3, 'F1': f1_3, 'AUC': auc_3})
-    
-    # ========== SCENARIO 4: SCALING ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 4: SCALING (on top of Smart Imputation)")
-    print("-" * 70)
-    
-    print("Scaling raw features...")
-    df_scaled_raw, _ = scale_features.process_scaling(df_smart)
-    
-    print("Engineering features from scaled data...")
-    df_scaled_ml, _ = create_features_and_labels.process_data(df_scaled_raw)
-    
-    acc_4, f1_4, auc_4 = train_and_evaluate_timeseries(df_scaled_ml, "Scaled Data GBM")
-    results.append({'Scenario': 'Scaled Data', 'Accuracy': acc_4, 'F1': f1_4, 'AUC': auc_4})
-    
-    # ========== SCENARIO 5: ALL COMBINED ==========
-    print("\n" + "-" * 70)
-    print("SCENARIO 5: ALL COMBINED (Smart + Outliers + Scaling)")
-    print("-" * 70)
-    
-    print("Scaling outlier-free data...")
-    df_final_raw, _ = scale_features.process_scaling(df_no_outliers)
-    
-    print("Engineering features...")
-    df_final_ml, _ = create_features_and_labels.process_data(df_final_raw)
-    
-    acc_5, f1_5, auc_5 = train_and_evaluate_timeseries(df_final_ml, "Combined GBM")
-    results.append({'Scenario': 'All Combined', 'Accuracy': acc_5, 'F1': f1_5, 'AUC': auc_5})
+    # Shared preparation stages run once; the scenario fits run in a process pool
+    train_func = functools.partial(train_and_evaluate_timeseries, backend=backend)
+    results = scenario_executor.run_scenarios(train_func, model_suffix='GBM', n_jobs=n_jobs)
     
     # ========== RESULTS ==========
     print("\n" + "=" * 70)
     print("FINAL RESULTS COMPARISON (GBM - TIME SERIES SPLIT)")
     print("=" * 70)
     
-    results_df = pd.DataFrame(results)
+    results_df = scenario_executor.results_table(results, ['Accuracy', 'F1', 'AUC'])
     print("\n" + results_df.to_string(index=False))
     
     # Save results
-    results_df.to_csv('data/model_comparison_timeseries_gbm_results.csv', index=False)
-    print("\nResults saved to data/model_comparison_timeseries_gbm_results.csv")
+    output = ('data/model_comparison_timeseries_gbm_results.csv' if backend == 'exact'
+              else f'data/model_comparison_timeseries_gbm_{backend}_results.csv')
+    results_df.to_csv(output, index=False)
+    print(f"\nResults saved to {output}")
 
 if __name__ == '__main__':
-    main()
+    main(backend=sys.argv[1] if len(sys.argv) > 1 else None)
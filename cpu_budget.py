@@ -0,0 +1,96 @@
+"""
+CPU Budget
+
+One process-wide core budget that hands out thread limits, so nested
+parallelism (scenario processes x StackingClassifier jobs x RandomForest
+jobs x BLAS threads) never asks for more threads than there are cores.
+
+    budget = get_budget()                  # all cores, or $CPU_BUDGET
+    workers, cores = budget.split(5)       # 5 scenario fits -> processes, cores each
+    with budget.limit(cores):              # BLAS / OpenMP threads and joblib default
+        model = budget.configure(create_stacked_ensemble(), cores)
+        model.fit(X, y)
+"""
+
+import os
+from contextlib import contextmanager
+from joblib import parallel_config
+from threadpoolctl import threadpool_limits
+
+def available_cores():
+    """
+    Cores this process may run on (affinity / cgroup-restricted where known).
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+class CpuBudget:
+    """
+    A number of cores to share between parallel stages and estimators.
+    """
+
+    def __init__(self, cores=None):
+        cores = cores or int(os.environ.get('CPU_BUDGET', 0)) or available_cores()
+        self.cores = max(1, int(cores))
+
+    def resolve(self, n_jobs=None):
+        """
+        n_jobs as a core count within the budget. None is the whole budget and
+        negative values count back from it as in joblib (-1 all, -2 all but one).
+        """
+        if n_jobs is None:
+            return self.cores
+        if n_jobs < 0:
+            return max(1, self.cores + 1 + n_jobs)
+        return max(1, min(n_jobs, self.cores))
+
+    def split(self, n_tasks, n_jobs=None):
+        """
+        (parallel tasks, cores per task) for n_tasks independent tasks, running
+        at most n_jobs at once.
+        """
+        workers = max(1, min(self.resolve(n_jobs), n_tasks))
+        return workers, max(1, self.cores // workers)
+
+    def configure(self, estimator, n_jobs=None):
+        """
+        Set every n_jobs of an estimator, nested ones included, so the total
+        stays within n_jobs cores. A meta-estimator over several estimators
+        (stacking, voting) fits min(cores, len(estimators)) of them at once and
+        each gets an equal share of the cores. A stack's final estimator
+        (LogisticRegression) is single-threaded apart from BLAS, which
+        limit() caps.
+        """
+        cores = self.resolve(n_jobs)
+        params = estimator.get_params(deep=False)
+        estimators = [est for _, est in params.get('estimators') or [] if est not in (None, 'drop')]
+        if estimators:
+            outer = min(cores, len(estimators))
+            for est in estimators:
+                self.configure(est, max(1, cores // outer))
+            cores = outer
+        if 'n_jobs' in params:
+            estimator.set_params(n_jobs=cores)
+        return estimator
+
+    @contextmanager
+    def limit(self, n_jobs=None):
+        """
+        Cap BLAS / OpenMP thread pools and joblib's default n_jobs at n_jobs
+        cores for the block.
+        """
+        cores = self.resolve(n_jobs)
+        with threadpool_limits(limits=cores), parallel_config(n_jobs=cores):
+            yield cores
+
+def get_budget():
+    """
+    Process-wide CpuBudget (all available cores unless $CPU_BUDGET is set).
+    """
+    global _BUDGET
+    if _BUDGET is None:
+        _BUDGET = CpuBudget()
+    return _BUDGET
+
+_BUDGET = None
@@ -7,10 +7,262 @@ Saves to a separate CSV file: ml_features_and_labels.csv
 
 import pandas as pd
 import numpy as np
+import rolling_kernels
+import feature_registry
+from feature_registry import register
+import technical_indicators
+import cross_sectional  # registers the optional cs_* features
+from cross_sectional import CROSS_SECTIONAL_FEATURES
 
-def engineer_features(df):
+ID_COLUMNS = ['Date', 'stock']
+
+FEATURE_COLUMNS = [
+    # Stock features
+    'daily_return', 'r_1W', 'r_1M', 'r_3M', 'vol_1M',
+    'MA20_ratio', 'MA50_ratio', 'HL_range', 'vol_z',
+    # SP500 features
+    'sp500_daily_return', 'sp500_vol_1M',
+    # Relative features
+    'relative_return', 'volatility_ratio',
+    # Macro features
+    'VIX_t', 'FedFunds_t', 'CPI_chg', 'FedFunds_chg',
+    # Market features
+    'Put_Call_Ratio_t', 'Market_Breadth_t',
+    # Technical indicators
+    'spy_RSI_t', 'spy_SMA_50_t', 'spy_SMA_200_t',
+    'qqq_RSI_t', 'qqq_SMA_50_t', 'qqq_SMA_200_t',
+    # Sector features
+    'sector_XLK_t', 'sector_XLF_t', 'sector_XLV_t', 'sector_XLE_t', 'sector_XLI_t',
+]
+
+# Target variable (keep forward returns for reference)
+LABEL_COLUMNS = ['y', 'stock_fwd_ret_21d', 'sp500_fwd_ret_21d']
+
+# Forward-return horizons and benchmarks built by construct_labels;
+# y is the LABEL_HORIZON label against the SP500
+LABEL_HORIZON = 21
+LABEL_HORIZONS = (5, 21, 63)
+LABEL_BENCHMARKS = {
+    'sp500': 'sp500_Close',
+    'qqq': 'qqq_Close',
+    'XLK': 'sector_XLK',
+    'XLF': 'sector_XLF',
+    'XLV': 'sector_XLV',
+    'XLE': 'sector_XLE',
+    'XLI': 'sector_XLI',
+}
+
+# ========== FEATURE DEFINITIONS ==========
+# Each feature declares its inputs and window in the registry
+# (see feature_registry.py); engineer_features computes only what is requested.
+
+# ---------- Stock features (per stock, on the rows x stocks panel) ----------
+
+@register('daily_return', inputs=['Close'], window=2, level='stock',
+          description='Stock daily return (pct_change)')
+def _daily_return(ctx):
+    return rolling_kernels.pct_change(ctx.panel('Close'), 1)
+
+def _period_return(periods):
+    return lambda ctx: rolling_kernels.pct_change(ctx.panel('Close'), periods)
+
+register('r_1W', inputs=['Close'], window=6, level='stock',
+         description='1-week (5-day) return')(_period_return(5))
+register('r_1M', inputs=['Close'], window=22, level='stock',
+         description='1-month (21-day) return')(_period_return(21))
+register('r_3M', inputs=['Close'], window=64, level='stock',
+         description='3-month (63-day) return')(_period_return(63))
+
+@register('vol_1M', inputs=['daily_return'], window=21, level='stock',
+          description='1-month volatility (rolling std of daily returns)')
+def _vol_1m(ctx):
+    return rolling_kernels.rolling_std(ctx.panel('daily_return'), 21, min_periods=1)
+
+@register('MA20', inputs=['Close'], window=20, level='stock',
+          description='20-day moving average of Close')
+def _ma20(ctx):
+    return rolling_kernels.rolling_mean(ctx.panel('Close'), 20, min_periods=1)
+
+@register('MA50', inputs=['Close'], window=50, level='stock',
+          description='50-day moving average of Close')
+def _ma50(ctx):
+    return rolling_kernels.rolling_mean(ctx.panel('Close'), 50, min_periods=1)
+
+@register('MA20_ratio', inputs=['Close', 'MA20'], description='Close / MA20')
+def _ma20_ratio(ctx):
+    return ctx.column('Close') / ctx.column('MA20')
+
+@register('MA50_ratio', inputs=['Close', 'MA50'], description='Close / MA50')
+def _ma50_ratio(ctx):
+    return ctx.column('Close') / ctx.column('MA50')
+
+@register('HL_range', inputs=['High', 'Low', 'Close'], description='(High - Low) / Close')
+def _hl_range(ctx):
+    return (ctx.column('High') - ctx.column('Low')) / ctx.column('Close')
+
+@register('vol_z', inputs=['Volume'], window=20, level='stock',
+          description='Volume z-score (Volume - mean(20)) / std(20)')
+def _vol_z(ctx):
+    # Epsilon avoids division by zero
+    return rolling_kernels.rolling_zscore(ctx.panel('Volume'), 20, min_periods=1, eps=1e-8)
+
+# ---------- SP500 features (same for all stocks on a date) ----------
+
+@register('sp500_daily_return', inputs=['sp500_Close'], window=2, level='date',
+          description='SP500 daily return')
+def _sp500_daily_return(ctx):
+    return rolling_kernels.pct_change(ctx.date_series('sp500_Close'), 1)
+
+@register('sp500_vol_1M', inputs=['sp500_daily_return'], window=21, level='date',
+          description='SP500 1-month volatility')
+def _sp500_vol_1m(ctx):
+    return rolling_kernels.rolling_std(ctx.date_series('sp500_daily_return'), 21, min_periods=1)
+
+# ---------- Relative features (stock vs SP500) ----------
+
+@register('relative_return', inputs=['daily_return', 'sp500_daily_return'],
+          description='stock_return - sp500_return')
+def _relative_return(ctx):
+    return ctx.column('daily_return') - ctx.column('sp500_daily_return')
+
+@register('volatility_ratio', inputs=['vol_1M', 'sp500_vol_1M'],
+          description='stock_vol / sp500_vol')
+def _volatility_ratio(ctx):
+    return ctx.column('vol_1M') / (ctx.column('sp500_vol_1M') + 1e-8)
+
+# ---------- Rolling beta / correlation vs benchmarks (optional) ----------
+# One set of cumulative sums per benchmark serves every window and both
+# beta and correlation (rolling_kernels.rolling_beta_corr).
+
+BETA_WINDOWS = (21, 63)
+BETA_BENCHMARKS = {
+    'sp500': 'sp500_daily_return',
+    'XLK': 'XLK_daily_return',
+    'XLF': 'XLF_daily_return',
+    'XLV': 'XLV_daily_return',
+    'XLE': 'XLE_daily_return',
+    'XLI': 'XLI_daily_return',
+}
+BETA_FEATURES = []
+
+def _sector_return(col):
+    return lambda ctx: rolling_kernels.pct_change(ctx.date_series(col), 1)
+
+for _etf in ['XLK', 'XLF', 'XLV', 'XLE', 'XLI']:
+    register(f'{_etf}_daily_return', inputs=[f'sector_{_etf}'], window=2, level='date',
+             description=f'Sector ETF {_etf} daily return')(_sector_return(f'sector_{_etf}'))
+
+def _beta_corr(ctx, benchmark):
+    """
+    Beta and correlation panels of daily_return vs a benchmark's returns
+    for all BETA_WINDOWS (computed once per benchmark).
+    """
+    key = ('beta_corr', benchmark)
+    if key not in ctx.cache:
+        ctx.cache[key] = rolling_kernels.rolling_beta_corr(
+            ctx.panel('daily_return'), ctx.panel(BETA_BENCHMARKS[benchmark]), BETA_WINDOWS
+        )
+    return ctx.cache[key]
+
+def _beta_feature(benchmark, window, stat):
+    index = 0 if stat == 'beta' else 1
+    return lambda ctx: _beta_corr(ctx, benchmark)[window][index]
+
+for _benchmark, _returns in BETA_BENCHMARKS.items():
+    for _window in BETA_WINDOWS:
+        for _stat, _label in [('beta', 'beta'), ('corr', 'correlation')]:
+            _name = f'{_stat}_{_benchmark}_{_window}'
+            register(_name, inputs=['daily_return', _returns], window=_window, level='stock',
+                     description=f'{_window}-day rolling {_label} of stock vs {_benchmark} returns')(
+                _beta_feature(_benchmark, _window, _stat))
+            BETA_FEATURES.append(_name)
+
+# ---------- Technical indicators per stock (optional) ----------
+# Recursive EMAs depend on the whole history (window=None).
+
+TECHNICAL_FEATURES = ['RSI_14', 'MACD', 'MACD_hist', 'BB_width', 'ATR_14', 'OBV']
+
+@register('RSI_14', inputs=['Close'], window=None, level='stock',
+          description='14-day RSI (Wilder smoothing)')
+def _rsi_14(ctx):
+    return technical_indicators.rsi(ctx.panel('Close'), 14)
+
+def _macd(ctx):
+    if 'macd' not in ctx.cache:
+        ctx.cache['macd'] = technical_indicators.macd(ctx.panel('Close'), 12, 26, 9)
+    return ctx.cache['macd']
+
+@register('MACD', inputs=['Close'], window=None, level='stock',
+          description='MACD line (EMA12 - EMA26) / Close')
+def _macd_line(ctx):
+    return _macd(ctx)[0] / ctx.panel('Close')
+
+@register('MACD_hist', inputs=['Close'], window=None, level='stock',
+          description='MACD histogram (MACD - signal(9)) / Close')
+def _macd_hist(ctx):
+    return _macd(ctx)[2] / ctx.panel('Close')
+
+@register('BB_width', inputs=['Close'], window=20, level='stock',
+          description='Bollinger band width (20-day, 2 std) / MA20')
+def _bb_width(ctx):
+    return technical_indicators.bollinger_width(ctx.panel('Close'), 20, 2)
+
+@register('ATR_14', inputs=['High', 'Low', 'Close'], window=None, level='stock',
+          description='14-day average true range / Close')
+def _atr_14(ctx):
+    close = ctx.panel('Close')
+    return technical_indicators.atr(ctx.panel('High'), ctx.panel('Low'), close, 14) / close
+
+@register('OBV', inputs=['Close', 'Volume'], window=None, level='stock',
+          description='On-balance volume')
+def _obv(ctx):
+    return technical_indicators.obv(ctx.panel('Close'), ctx.panel('Volume'))
+
+# ---------- Macro features ----------
+
+@register('CPI_chg', inputs=['CPI'], window=2, level='date',
+          description='CPI percentage change')
+def _cpi_chg(ctx):
+    return rolling_kernels.pct_change(ctx.date_series('CPI'), 1)
+
+@register('FedFunds_chg', inputs=['Fed_Funds_Rate'], window=2, level='date',
+          description='Federal Funds Rate change (absolute)')
+def _fedfunds_chg(ctx):
+    return rolling_kernels.diff(ctx.date_series('Fed_Funds_Rate'), 1)
+
+# ---------- Direct-use columns (macro, market, technical, sector) ----------
+
+DIRECT_FEATURES = {
+    'VIX_t': ('VIX', 'VIX index (direct use)'),
+    'FedFunds_t': ('Fed_Funds_Rate', 'Federal Funds Rate (direct use)'),
+    'Put_Call_Ratio_t': ('Put_Call_Ratio', 'Put/Call Ratio (direct use)'),
+    'Market_Breadth_t': ('Market_Breadth', 'Market Breadth (direct use)'),
+    'spy_RSI_t': ('spy_RSI', 'SPY RSI (direct use)'),
+    'spy_SMA_50_t': ('spy_SMA_50', 'SPY 50-day moving average (direct use)'),
+    'spy_SMA_200_t': ('spy_SMA_200', 'SPY 200-day moving average (direct use)'),
+    'qqq_RSI_t': ('qqq_RSI', 'QQQ RSI (direct use)'),
+    'qqq_SMA_50_t': ('qqq_SMA_50', 'QQQ 50-day moving average (direct use)'),
+    'qqq_SMA_200_t': ('qqq_SMA_200', 'QQQ 200-day moving average (direct use)'),
+    'sector_XLK_t': ('sector_XLK', 'Sector ETF XLK price (direct use)'),
+    'sector_XLF_t': ('sector_XLF', 'Sector ETF XLF price (direct use)'),
+    'sector_XLV_t': ('sector_XLV', 'Sector ETF XLV price (direct use)'),
+    'sector_XLE_t': ('sector_XLE', 'Sector ETF XLE price (direct use)'),
+    'sector_XLI_t': ('sector_XLI', 'Sector ETF XLI price (direct use)'),
+}
+
+def _direct(col):
+    return lambda ctx: ctx.column(col)
+
+for _name, (_source, _description) in DIRECT_FEATURES.items():
+    register(_name, inputs=[_source], description=_description)(_direct(_source))
+
+def engineer_features(df, features=None, n_jobs=1):
     """
     Engineer features from raw data.
+    Computes the requested features (all FEATURE_COLUMNS by default) and
+    their dependencies, in dependency order, from the feature registry.
+    n_jobs > 1 (or -1) spreads per-stock features over worker processes,
+    useful for universes of hundreds of stocks.
     Returns DataFrame with new feature columns.
     """
     print("\n2. Engineering features...")
@@ -18,176 +270,69 @@ def engineer_features(df):
     df['Date'] = pd.to_datetime(df['Date'])
     df = df.sort_values(['stock', 'Date']).reset_index(drop=True)
     
-    features_log = []
-    
-    # ========== STOCK FEATURES (Grouped by stock) ==========
-    print("\n   a) Stock price features...")
-    
-    # Daily return
-    df['daily_return'] = df.groupby('stock')['Close'].pct_change()
-    features_log.append('daily_return: Stock daily return (pct_change)')
-    
-    # Rolling returns (1 week = 5 days, 1 month = 21 days, 3 months = 63 days)
-    print("      - Rolling returns...")
-    df['r_1W'] = df.groupby('stock')['Close'].pct_change(periods=5)
-    df['r_1M'] = df.groupby('stock')['Close'].pct_change(periods=21)
-    df['r_3M'] = df.groupby('stock')['Close'].pct_change(periods=63)
-    features_log.append('r_1W: 1-week (5-day) return')
-    features_log.append('r_1M: 1-month (21-day) return')
-    features_log.append('r_3M: 3-month (63-day) return')
-    
-    # Volatility (rolling std of daily returns)
-    print("      - Volatility...")
-    df['vol_1M'] = df.groupby('stock')['daily_return'].rolling(window=21, min_periods=1).std().reset_index(0, drop=True)
-    features_log.append('vol_1M: 1-month volatility (rolling std of daily returns)')
-    
-    # Moving Average Ratios
-    print("      - Moving average ratios...")
-    df['MA20'] = df.groupby('stock')['Close'].rolling(window=20, min_periods=1).mean().reset_index(0, drop=True)
-    df['MA50'] = df.groupby('stock')['Close'].rolling(window=50, min_periods=1).mean().reset_index(0, drop=True)
-    df['MA20_ratio'] = df['Close'] / df['MA20']
-    df['MA50_ratio'] = df['Close'] / df['MA50']
-    features_log.append('MA20_ratio: Close / MA20')
-    features_log.append('MA50_ratio: Close / MA50')
-    
-    # Price range (High - Low) / Close
-    print("      - Price range...")
-    df['HL_range'] = (df['High'] - df['Low']) / df['Close']
-    features_log.append('HL_range: (High - Low) / Close')
-    
-    # Volume z-score (rolling)
-    print("      - Volume z-score...")
-    vol_mean_20 = df.groupby('stock')['Volume'].rolling(window=20, min_periods=1).mean().reset_index(0, drop=True)
-    vol_std_20 = df.groupby('stock')['Volume'].rolling(window=20, min_periods=1).std().reset_index(0, drop=True)
-    df['vol_z'] = (df['Volume'] - vol_mean_20) / (vol_std_20 + 1e-8)  # Add small epsilon to avoid division by zero
-    features_log.append('vol_z: Volume z-score (Volume - mean(20)) / std(20)')
-    
-    # ========== SP500 FEATURES ==========
-    print("\n   b) SP500 features...")
-    
-    # SP500 data is same for all stocks on same date, so compute once per date
-    sp500_by_date = df.groupby('Date')['sp500_Close'].first().reset_index()
-    sp500_by_date = sp500_by_date.sort_values('Date')
-    
-    # Compute SP500 daily return
-    sp500_by_date['sp500_daily_return'] = sp500_by_date['sp500_Close'].pct_change()
-    
-    # Map to main dataframe
-    sp500_return_map = dict(zip(sp500_by_date['Date'], sp500_by_date['sp500_daily_return']))
-    df['sp500_daily_return'] = df['Date'].map(sp500_return_map)
-    
-    # Compute SP500 volatility (rolling std of returns)
-    sp500_by_date['sp500_vol_1M'] = sp500_by_date['sp500_daily_return'].rolling(window=21, min_periods=1).std()
-    sp500_vol_map = dict(zip(sp500_by_date['Date'], sp500_by_date['sp500_vol_1M']))
-    df['sp500_vol_1M'] = df['Date'].map(sp500_vol_map)
-    
-    features_log.append('sp500_daily_return: SP500 daily return')
-    features_log.append('sp500_vol_1M: SP500 1-month volatility')
-    
-    # ========== RELATIVE FEATURES ==========
-    print("\n   c) Relative features (stock vs SP500)...")
-    
-    df['relative_return'] = df['daily_return'] - df['sp500_daily_return']
-    df['volatility_ratio'] = df['vol_1M'] / (df['sp500_vol_1M'] + 1e-8)
-    features_log.append('relative_return: stock_return - sp500_return')
-    features_log.append('volatility_ratio: stock_vol / sp500_vol')
-    
-    # ========== MACRO FEATURES ==========
-    print("\n   d) Macro features...")
-    
-    # CPI change (month-over-month) - same for all stocks on same date
-    macro_by_date = df.groupby('Date').agg({
-        'CPI': 'first',
-        'Fed_Funds_Rate': 'first'
-    }).reset_index()
-    macro_by_date = macro_by_date.sort_values('Date')
-    
-    macro_by_date['CPI_chg'] = macro_by_date['CPI'].pct_change()
-    macro_by_date['FedFunds_chg'] = macro_by_date['Fed_Funds_Rate'].diff()
-    
-    cpi_chg_map = dict(zip(macro_by_date['Date'], macro_by_date['CPI_chg']))
-    fed_chg_map = dict(zip(macro_by_date['Date'], macro_by_date['FedFunds_chg']))
-    
-    df['CPI_chg'] = df['Date'].map(cpi_chg_map)
-    df['FedFunds_chg'] = df['Date'].map(fed_chg_map)
-    
-    features_log.append('CPI_chg: CPI percentage change')
-    features_log.append('FedFunds_chg: Federal Funds Rate change (absolute)')
-    
-    # Direct macro indicators (already in data)
-    df['VIX_t'] = df['VIX']
-    df['FedFunds_t'] = df['Fed_Funds_Rate']
-    features_log.append('VIX_t: VIX index (direct use)')
-    features_log.append('FedFunds_t: Federal Funds Rate (direct use)')
-    
-    # ========== MARKET FEATURES ==========
-    print("\n   e) Market features...")
-    
-    # These are already in the data, just rename for clarity
-    df['Put_Call_Ratio_t'] = df['Put_Call_Ratio']
-    df['Market_Breadth_t'] = df['Market_Breadth']
-    features_log.append('Put_Call_Ratio_t: Put/Call Ratio (direct use)')
-    features_log.append('Market_Breadth_t: Market Breadth (direct use)')
-    
-    # ========== TECHNICAL INDICATORS (already available) ==========
-    print("\n   f) Technical indicators...")
-    
-    # SPY/QQQ indicators are already in the data
-    df['spy_RSI_t'] = df['spy_RSI']
-    df['spy_SMA_50_t'] = df['spy_SMA_50']
-    df['spy_SMA_200_t'] = df['spy_SMA_200']
-    df['qqq_RSI_t'] = df['qqq_RSI']
-    df['qqq_SMA_50_t'] = df['qqq_SMA_50']
-    df['qqq_SMA_200_t'] = df['qqq_SMA_200']
-    features_log.append('spy_RSI_t: SPY RSI (direct use)')
-    features_log.append('spy_SMA_50_t, spy_SMA_200_t: SPY moving averages')
-    features_log.append('qqq_RSI_t: QQQ RSI (direct use)')
-    features_log.append('qqq_SMA_50_t, qqq_SMA_200_t: QQQ moving averages')
-    
-    # ========== SECTOR FEATURES ==========
-    print("\n   f) Sector features...")
-    
-    # Sector ETFs are already in the data
-    df['sector_XLK_t'] = df['sector_XLK']
-    df['sector_XLF_t'] = df['sector_XLF']
-    df['sector_XLV_t'] = df['sector_XLV']
-    df['sector_XLE_t'] = df['sector_XLE']
-    df['sector_XLI_t'] = df['sector_XLI']
-    features_log.append('sector_XLK_t, sector_XLF_t, etc.: Sector ETF prices (direct use)')
-    
-    print(f"\n   Total features engineered: {len(features_log)}")
+    requested = list(features) if features is not None else FEATURE_COLUMNS
+    values, order = feature_registry.compute_features(df, requested, n_jobs=n_jobs)
+    
+    new_cols = pd.DataFrame({f.name: values[f.name] for f in order}, index=df.index)
+    df = pd.concat([df.drop(columns=[c for c in new_cols.columns if c in df.columns]), new_cols], axis=1)
+    
+    features_log = [f"{f.name}: {f.description}" for f in order if f.name in requested]
+    print(f"\n   Total features engineered: {len(features_log)} "
+          f"({len(order) - len(features_log)} intermediates)")
     
     return df, features_log
 
-def construct_labels(df):
+def construct_labels(df, horizons=LABEL_HORIZONS, benchmarks=None):
     """
     Construct target variable y.
     y = 1 if stock forward return (21 days) > SP500 forward return (21 days), else 0
+    
+    Forward returns are computed for every horizon in `horizons` against every
+    benchmark in `benchmarks` (default: LABEL_BENCHMARKS whose price column is
+    present) in one pass. Besides the standard LABEL_COLUMNS this adds
+    stock_fwd_ret_{h}d, {benchmark}_fwd_ret_{h}d and y_{benchmark}_{h}d.
     """
     print("\n3. Constructing labels (target variable y)...")
     
-    df = df.copy()
     df = df.sort_values(['stock', 'Date']).reset_index(drop=True)
     
-    # Forward 21-day returns for stock
-    print("   - Computing forward 21-day returns for stocks...")
-    df['stock_fwd_ret_21d'] = df.groupby('stock')['Close'].apply(
-        lambda x: x.shift(-21) / x - 1
-    ).reset_index(0, drop=True)
-    
-    # Forward 21-day returns for SP500 (same for all stocks on same date)
-    print("   - Computing forward 21-day returns for SP500...")
-    sp500_fwd = df.groupby('Date')['sp500_Close'].first().shift(-21) / df.groupby('Date')['sp500_Close'].first() - 1
-    df['sp500_fwd_ret_21d'] = df['Date'].map(sp500_fwd)
-    
-    # Binary label: 1 if stock outperforms SP500, else 0
-    print("   - Creating binary label...")
-    df['y'] = (df['stock_fwd_ret_21d'] > df['sp500_fwd_ret_21d']).astype(int)
+    horizons = sorted(set(horizons) | {LABEL_HORIZON})
+    if benchmarks is None:
+        benchmarks = {name: col for name, col in LABEL_BENCHMARKS.items() if col in df.columns}
+    
+    # Forward returns for stocks: shift each stock's Close column on the panel
+    print(f"   - Computing forward returns for stocks (horizons: {horizons})...")
+    panel = rolling_kernels.StockPanel(df['stock'])
+    close = panel.pivot(df['Close'])
+    labels = {}
+    for h in horizons:
+        labels[f'stock_fwd_ret_{h}d'] = panel.unpivot(rolling_kernels.shift(close, -h) / close - 1)
+    
+    # Forward returns for benchmarks (same for all stocks on same date):
+    # one value per date for each benchmark, shifted on the unique dates
+    print(f"   - Computing forward returns for benchmarks ({', '.join(benchmarks)})...")
+    dates = rolling_kernels.DateIndex(df['Date'])
+    by_date = np.column_stack([dates.first(df[col]) for col in benchmarks.values()])
+    for h in horizons:
+        fwd = dates.broadcast(rolling_kernels.shift(by_date, -h) / by_date - 1)
+        for i, name in enumerate(benchmarks):
+            labels[f'{name}_fwd_ret_{h}d'] = fwd[:, i]
+    
+    # Binary labels: 1 if stock outperforms the benchmark, else 0
+    print("   - Creating binary labels...")
+    for h in horizons:
+        for name in benchmarks:
+            labels[f'y_{name}_{h}d'] = (labels[f'stock_fwd_ret_{h}d'] > labels[f'{name}_fwd_ret_{h}d']).astype(int)
+    labels['y'] = labels[f'y_sp500_{LABEL_HORIZON}d']
+    
+    labels = pd.DataFrame(labels, index=df.index)
+    df = pd.concat([df.drop(columns=[c for c in labels.columns if c in df.columns]), labels], axis=1)
     
     # Handle NaN values (last 21 days don't have forward returns)
     nan_count = df['y'].isna().sum()
     print(f"   - Rows without labels (last 21 days): {nan_count}")
     print(f"   - Rows with labels: {len(df) - nan_count}")
+    print(f"   - Label columns: {len(labels.columns)} ({len(horizons)} horizons x {len(benchmarks)} benchmarks)")
     
     return df
 
@@ -207,46 +352,53 @@ def main():
     print(f"   Stocks: {df['stock'].unique()}")
     print(f"   Date range: {df['Date'].min()} to {df['Date'].max()}")
     
-def process_data(df):
+def label_requirements(labels):
+    """
+    (horizons, benchmarks) construct_labels needs for the given label
+    columns: only their horizons and benchmarks, plus LABEL_HORIZON against
+    the SP500 that y is built from.
+    """
+    horizons, names = {LABEL_HORIZON}, {'sp500'}
+    for label in labels:
+        parts = label.split('_')
+        if label == 'y' or len(parts) < 2 or not parts[-1].endswith('d') or not parts[-1][:-1].isdigit():
+            continue
+        horizons.add(int(parts[-1][:-1]))
+        if parts[0] == 'y':
+            names.add('_'.join(parts[1:-1]))
+        elif label.endswith(f"_fwd_ret_{parts[-1]}") and parts[0] != 'stock':
+            names.add(label[:-len(f"_fwd_ret_{parts[-1]}")])
+    benchmarks = {name: col for name, col in LABEL_BENCHMARKS.items() if name in names}
+    return sorted(horizons), benchmarks
+
+def process_data(df, features=None, labels=None, n_jobs=1):
     """
     Process the dataframe to engineer features and construct labels.
     Args:
         df: DataFrame with prepared data
+        features: Optional list of features to compute (default: FEATURE_COLUMNS)
+        labels: Optional list of label columns to keep (default: LABEL_COLUMNS),
+            e.g. 'y_qqq_5d' or 'XLK_fwd_ret_63d' from construct_labels
+        n_jobs: Worker processes for per-stock features (see engineer_features)
     Returns:
         df_ml: DataFrame with features and labels
         features_log: List of created features
     """
     # Engineer features
-    df_features, features_log = engineer_features(df)
+    df_features, features_log = engineer_features(df, features, n_jobs)
     
-    # Construct labels
-    df_final = construct_labels(df_features)
+    # Construct labels (only the horizons and benchmarks of the kept label columns)
+    labels = list(labels if labels is not None else LABEL_COLUMNS)
+    horizons, benchmarks = label_requirements(labels)
+    benchmarks = {name: col for name, col in benchmarks.items() if col in df_features.columns}
+    df_final = construct_labels(df_features, horizons, benchmarks)
     
     # Select feature columns and label
     print("\n4. Selecting feature columns...")
     
     # Feature columns (all engineered features)
-    feature_cols = [
-        'Date', 'stock',  # Identifiers
-        # Stock features
-        'daily_return', 'r_1W', 'r_1M', 'r_3M', 'vol_1M',
-        'MA20_ratio', 'MA50_ratio', 'HL_range', 'vol_z',
-        # SP500 features
-        'sp500_daily_return', 'sp500_vol_1M',
-        # Relative features
-        'relative_return', 'volatility_ratio',
-        # Macro features
-        'VIX_t', 'FedFunds_t', 'CPI_chg', 'FedFunds_chg',
-        # Market features
-        'Put_Call_Ratio_t', 'Market_Breadth_t',
-        # Technical indicators
-        'spy_RSI_t', 'spy_SMA_50_t', 'spy_SMA_200_t',
-        'qqq_RSI_t', 'qqq_SMA_50_t', 'qqq_SMA_200_t',
-        # Sector features
-        'sector_XLK_t', 'sector_XLF_t', 'sector_XLV_t', 'sector_XLE_t', 'sector_XLI_t',
-        # Target variable
-        'y', 'stock_fwd_ret_21d', 'sp500_fwd_ret_21d'  # Keep forward returns for reference
-    ]
+    feature_cols = (ID_COLUMNS + list(features if features is not None else FEATURE_COLUMNS)
+                    + labels)
     
     # Check which columns exist
     available_cols = [col for col in feature_cols if col in df_final.columns]
@@ -290,6 +442,12 @@ def main():
     print(f"   Columns: {len(df_ml.columns)}")
     print(f"   Null values: {df_ml.isnull().sum().sum()}")
     
+    # Save to the feature store (read back by training scripts and dashboards)
+    from feature_store import FeatureStore
+    from profile_columns import dataset_fingerprint
+    FeatureStore('prepared').write(df_ml, source_fingerprint=dataset_fingerprint(df))
+    print(f"   OK Saved to feature store: data/feature_store/prepared")
+    
     # Save feature log
     print("\n6. Saving feature engineering log...")
     with open('data/feature_engineering_log.txt', 'w', encoding='utf-8') as f:
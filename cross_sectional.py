@@ -0,0 +1,126 @@
+"""
+Cross-Sectional Features
+
+Per-date ranks and z-scores of a feature among all stocks trading that day.
+Values are pivoted once into a (dates x stocks) calendar array; ranks come
+from one sort of each date's row over the whole array and z-scores from
+row-wise moments, instead of a groupby('Date').rank() / transform per
+feature.
+
+New cross-sectional features are one call:
+
+    register_cross_sectional('r_3M')      # adds cs_rank_r_3M and cs_z_r_3M
+
+They are optional (not in FEATURE_COLUMNS); request them explicitly, e.g.
+process_data(df, FEATURE_COLUMNS + CROSS_SECTIONAL_FEATURES).
+"""
+
+import numpy as np
+
+from feature_registry import register
+
+class CalendarPanel:
+    """
+    Row positions of a long frame inside a (dates x stocks) array.
+    """
+
+    def __init__(self, date_codes, stock_codes, n_dates, n_stocks):
+        self.shape = (n_dates, n_stocks)
+        # Flat positions, so pivot/unpivot are one put/take on the raveled array
+        self.flat = np.asarray(date_codes) * n_stocks + np.asarray(stock_codes)
+
+    def pivot(self, values):
+        """
+        Long values -> (dates x stocks) float array, NaN where a stock has no row.
+        """
+        calendar = np.full(self.shape, np.nan)
+        np.put(calendar, self.flat, np.asarray(values, dtype=float))
+        return calendar
+
+    def unpivot(self, calendar):
+        return np.take(calendar, self.flat)
+
+def rank_pct(calendar):
+    """
+    Percentile rank of each stock within its date (row), ties averaged,
+    NaN ignored - same as groupby('Date').rank(pct=True).
+    """
+    n_dates, n_stocks = calendar.shape
+    order = np.argsort(calendar, axis=1)  # NaN sorts last; tie order does not matter
+    ordered = np.take_along_axis(calendar, order, axis=1)
+    counts = (~np.isnan(calendar)).sum(axis=1, keepdims=True)
+
+    # Average rank of each tie group: (first + last position) / 2 + 1
+    positions = np.broadcast_to(np.arange(n_stocks), calendar.shape)
+    starts = np.ones(calendar.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = np.ones(calendar.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, positions, n_stocks - 1)[:, ::-1], axis=1)[:, ::-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks = ((first + last) / 2 + 1) / counts
+    ranks[np.isnan(ordered)] = np.nan
+
+    out = np.empty(calendar.shape)
+    np.put_along_axis(out, order, ranks, axis=1)
+    return out
+
+def zscore(calendar, ddof=1):
+    """
+    (x - mean) / std of each date's row, NaN ignored (NaN when fewer than
+    two stocks or zero dispersion).
+    """
+    counts = (~np.isnan(calendar)).sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(calendar, axis=1, keepdims=True) / counts
+        var = np.nansum((calendar - mean) ** 2, axis=1, keepdims=True) / (counts - ddof)
+        std = np.where((counts > ddof) & (var > 0), np.sqrt(var), np.nan)
+        return (calendar - mean) / std
+
+def _calendar_panel(ctx):
+    if 'calendar_panel' not in ctx.cache:
+        ctx.cache['calendar_panel'] = CalendarPanel(
+            ctx.date_index.codes, ctx.stock_panel.codes,
+            ctx.date_index.n_dates, ctx.stock_panel.shape[1]
+        )
+    return ctx.cache['calendar_panel']
+
+def _calendar(ctx, name):
+    """
+    (dates x stocks) array of a feature or raw column, built once per context.
+    """
+    key = ('calendar', name)
+    if key not in ctx.cache:
+        ctx.cache[key] = _calendar_panel(ctx).pivot(ctx.column(name))
+    return ctx.cache[key]
+
+CROSS_SECTIONAL_FEATURES = []
+
+TRANSFORMS = {
+    'rank': (rank_pct, 'percentile rank among stocks on the date'),
+    'z': (zscore, 'z-score among stocks on the date'),
+}
+
+def register_cross_sectional(source, kinds=('rank', 'z')):
+    """
+    Register cs_<kind>_<source> features for a feature or raw column.
+    """
+    names = []
+    for kind in kinds:
+        transform, description = TRANSFORMS[kind]
+        name = f"cs_{kind}_{source}"
+
+        def compute(ctx, source=source, transform=transform):
+            return _calendar_panel(ctx).unpivot(transform(_calendar(ctx, source)))
+
+        register(name, inputs=[source], window=1, level='cross',
+                 description=f"{source} {description}")(compute)
+        if name not in CROSS_SECTIONAL_FEATURES:
+            CROSS_SECTIONAL_FEATURES.append(name)
+        names.append(name)
+    return names
+
+# Returns, volatility and volume activity
+for _source in ['daily_return', 'r_1M', 'r_3M', 'vol_1M', 'vol_z']:
+    register_cross_sectional(_source)
@@ -220,3 +220,37 @@ if 'rf_results' in data and 'gbm_results' in data:
         fig_heatmap.update_traces(texttemplate='%{z:.2f}%', textfont={'size':12})
         fig_heatmap.update_layout(height=400)
         st.plotly_chart(fig_heatmap, width='stretch')
+
+# Scenario x Model Benchmark Matrix
+if 'matrix_results' in data:
+    st.markdown("---")
+    st.subheader("Scenario x Model Benchmark Matrix")
+
+    matrix_df = data['matrix_results']
+    metric = st.selectbox("Metric", ['Accuracy', 'F1', 'AUC', 'Fit (s)', 'Predict (ms/1k rows)', 'Peak Memory (MB)'])
+
+    fig_matrix = px.imshow(
+        matrix_df.pivot(index='Scenario', columns='Model', values=metric),
+        text_auto='.3f',
+        aspect="auto",
+        color_continuous_scale='YlGnBu',
+        title=f"{metric} by Data Prep Strategy and Model"
+    )
+    fig_matrix.update_layout(height=400)
+    st.plotly_chart(fig_matrix, width='stretch')
+
+    # Accuracy against training cost
+    fig_cost = px.scatter(
+        matrix_df,
+        x='Fit (s)',
+        y='Accuracy',
+        color='Model',
+        symbol='Scenario',
+        size='Peak Memory (MB)',
+        hover_data=['Predict (ms/1k rows)', 'AUC', 'F1'],
+        title='Accuracy vs Fit Time (marker size: peak memory)'
+    )
+    fig_cost.update_layout(height=500)
+    st.plotly_chart(fig_cost, width='stretch')
+
+    st.dataframe(matrix_df, width='stretch')
@@ -5,11 +5,17 @@ Utility functions for the Stock Prediction Dashboard
 import streamlit as st
 import pandas as pd
 import os
+import sys
 import matplotlib.pyplot as plt
 import plotly.tools as tls
 import plotly.graph_objects as go
 import plotly.express as px
 
+# Shared pipeline modules live in the project root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from profile_columns import compute_profile
+from feature_store import FeatureStore
+
 @st.cache_data
 def load_data():
     """Load all datasets with caching"""
@@ -25,8 +31,15 @@ def load_data():
         data["prepared"] = pd.read_csv("../data/integrated_prepared_data.csv")
         data["prepared"]["Date"] = pd.to_datetime(data["prepared"]["Date"])
 
-    # ML dataset
-    if os.path.exists("../data/ml_features_and_labels_clean.csv"):
+    # ML dataset (feature store if populated, otherwise the clean CSV)
+    store = FeatureStore("prepared", root="../data/feature_store")
+    if store.manifest()["features"]:
+        try:
+            data["ml"] = store.read().dropna().reset_index(drop=True)
+        except KeyError:
+            # Stored features are out of date (a pipeline run rebuilds them)
+            pass
+    if "ml" not in data and os.path.exists("../data/ml_features_and_labels_clean.csv"):
         data["ml"] = pd.read_csv("../data/ml_features_and_labels_clean.csv")
         data["ml"]["Date"] = pd.to_datetime(data["ml"]["Date"])
 
@@ -41,6 +54,10 @@ def load_data():
             "../data/model_comparison_timeseries_gbm_results.csv"
         )
 
+    # Scenario x model benchmark matrix (model_matrix.py)
+    if os.path.exists("../data/model_matrix_results.csv"):
+        data["matrix_results"] = pd.read_csv("../data/model_matrix_results.csv")
+
     # Outlier analysis
     if os.path.exists("../data/outlier_detection_summary.csv"):
         data["outliers"] = pd.read_csv("../data/outlier_detection_summary.csv")
@@ -66,15 +83,16 @@ def create_page_header(title):
 
 
 def get_data_distribution(data, column):
-    """Generate distribution statistics for a column"""
+    """Generate distribution statistics for a column (profiles only that column)"""
+    stats = compute_profile(data[[column]]).loc[column]
     return {
-        "mean": data[column].mean(),
-        "median": data[column].median(),
-        "std": data[column].std(),
-        "min": data[column].min(),
-        "max": data[column].max(),
-        "q25": data[column].quantile(0.25),
-        "q75": data[column].quantile(0.75),
+        "mean": stats["mean"],
+        "median": stats["median"],
+        "std": stats["std"],
+        "min": stats["min"],
+        "max": stats["max"],
+        "q25": stats["q25"],
+        "q75": stats["q75"],
     }
 
 # TODO: Refactor plotting functions to use Plotly graph objects
@@ -7,6 +7,7 @@ Provides concrete examples of detected outliers.
 
 import pandas as pd
 import numpy as np
+from profile_columns import profile_columns
 
 def detect_outliers_zscore(df, col, threshold=3):
     """
@@ -100,17 +101,26 @@ def analyze_outliers(df):
     print("OUTLIER DETECTION - Z-SCORE METHOD (Threshold: 3 std)")
     print("=" * 70)
     
+    # Statistics from the shared column profile; masks computed on the whole matrix at once
+    profile = profile_columns(df)
+    X = df[numeric_cols].to_numpy(dtype=float)
+    mean = profile.loc[numeric_cols, 'mean'].to_numpy(dtype=float)
+    std = profile.loc[numeric_cols, 'std'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_all = np.abs((X - mean) / std)
+    z_outliers = z_all > 3
+    z_counts = z_outliers.sum(axis=0)
+    
     zscore_results = {}
-    for col in numeric_cols:
-        outliers, z_scores = detect_outliers_zscore(df, col, threshold=3)
-        outlier_count = outliers.sum()
-        if outlier_count > 0:
-            zscore_results[col] = {
-                'count': outlier_count,
-                'percentage': (outlier_count / len(df)) * 100,
-                'max_zscore': z_scores.max(),
-                'outlier_indices': df[outliers].index.tolist()
-            }
+    for j, col in enumerate(numeric_cols):
+        if std[j] == 0 or z_counts[j] == 0:
+            continue
+        zscore_results[col] = {
+            'count': z_counts[j],
+            'percentage': (z_counts[j] / len(df)) * 100,
+            'max_zscore': np.nanmax(z_all[:, j]),
+            'outlier_indices': df.index[z_outliers[:, j]].tolist()
+        }
     
     print(f"\nColumns with outliers (Z-score > 3):")
     if zscore_results:
@@ -125,27 +135,28 @@ def analyze_outliers(df):
     print("OUTLIER DETECTION - IQR METHOD (1.5 * IQR)")
     print("=" * 70)
     
+    Q1 = profile.loc[numeric_cols, 'q25'].to_numpy(dtype=float)
+    Q3 = profile.loc[numeric_cols, 'q75'].to_numpy(dtype=float)
+    IQR = Q3 - Q1
+    lower_bounds = Q1 - 1.5 * IQR
+    upper_bounds = Q3 + 1.5 * IQR
+    iqr_outliers = (X < lower_bounds) | (X > upper_bounds)
+    iqr_counts = iqr_outliers.sum(axis=0)
+    
     iqr_results = {}
-    for col in numeric_cols:
-        outliers = detect_outliers_iqr(df, col, multiplier=1.5)
-        outlier_count = outliers.sum()
-        if outlier_count > 0:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            iqr_results[col] = {
-                'count': outlier_count,
-                'percentage': (outlier_count / len(df)) * 100,
-                'Q1': Q1,
-                'Q3': Q3,
-                'IQR': IQR,
-                'lower_bound': lower_bound,
-                'upper_bound': upper_bound,
-                'outlier_indices': df[outliers].index.tolist()
-            }
+    for j, col in enumerate(numeric_cols):
+        if iqr_counts[j] == 0:
+            continue
+        iqr_results[col] = {
+            'count': iqr_counts[j],
+            'percentage': (iqr_counts[j] / len(df)) * 100,
+            'Q1': Q1[j],
+            'Q3': Q3[j],
+            'IQR': IQR[j],
+            'lower_bound': lower_bounds[j],
+            'upper_bound': upper_bounds[j],
+            'outlier_indices': df.index[iqr_outliers[:, j]].tolist()
+        }
     
     print(f"\nColumns with outliers (IQR method):")
     if iqr_results:
@@ -173,6 +184,8 @@ def main():
     print(f"   Loaded {len(df):,} rows, {len(df.columns)} columns")
     
     zscore_results, iqr_results = analyze_outliers(df)
+    profile = profile_columns(df)
+    numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns if col != 'Date']
     
     # ========== CONCRETE EXAMPLES ==========
     print("\n" + "=" * 70)
@@ -195,7 +208,7 @@ def main():
             date = row['Date'].strftime('%Y-%m-%d')
             stock = row['stock']
             volume = row['Volume']
-            zscore = abs((volume - df['Volume'].mean()) / df['Volume'].std())
+            zscore = abs((volume - profile.loc['Volume', 'mean']) / profile.loc['Volume', 'std'])
             close = row['Close']
             
             # Context: Is it a major move?
@@ -217,7 +230,7 @@ def main():
             date = row['Date'].strftime('%Y-%m-%d')
             stock = row['stock']
             close = row['Close']
-            zscore = abs((close - df['Close'].mean()) / df['Close'].std())
+            zscore = abs((close - profile.loc['Close', 'mean']) / profile.loc['Close', 'std'])
             volume = row['Volume']
             print(f"{date:<12} {stock:<6} ${close:>9.2f} {zscore:>8.2f} {volume:>14,}")
         
@@ -233,7 +246,7 @@ def main():
             date = row['Date'].strftime('%Y-%m-%d')
             stock = row['stock']
             close = row['Close']
-            zscore = abs((close - df['Close'].mean()) / df['Close'].std())
+            zscore = abs((close - profile.loc['Close', 'mean']) / profile.loc['Close', 'std'])
             print(f"{date:<12} {stock:<6} ${close:>9.2f} {zscore:>8.2f} (IPO period)")
     
     # Example 3: VIX outliers (market stress)
@@ -251,7 +264,7 @@ def main():
         for idx, row in vix_outliers.iterrows():
             date = row['Date'].strftime('%Y-%m-%d')
             vix = row['VIX']
-            zscore = abs((vix - df['VIX'].mean()) / df['VIX'].std())
+            zscore = abs((vix - profile.loc['VIX', 'mean']) / profile.loc['VIX', 'std'])
             stock = row['stock']
             close = row['Close']
             
@@ -0,0 +1,314 @@
+"""
+Feature Registry
+
+Declarative definitions for engineered features. Each feature declares its
+inputs (raw columns or other features), its window and its level:
+
+    'stock' - computed per stock on a (rows x stocks) panel, returns a panel
+    'date'  - same value for every stock on a date, computed on the unique
+              dates, returns a per-date array
+    'row'   - computed row by row from other columns, returns a long array
+    'cross' - compares stocks on the same date (see cross_sectional.py),
+              returns a long array
+
+plan() resolves the requested features and their dependencies in order, and
+FeatureContext computes each one once, sharing intermediates (panels of
+Close/Volume, daily_return, SP500 returns...) between the features that
+use them. Only what a model requests is computed.
+
+With n_jobs > 1, features that only read a stock's own rows are computed on
+a process pool over blocks of stocks; date-level features (and the features
+built on them) are computed once in the parent.
+"""
+
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import pandas as pd
+import numpy as np
+
+import cpu_budget
+import rolling_kernels
+
+LEVELS = ('stock', 'date', 'row', 'cross')
+
+class Feature:
+    """
+    A registered feature.
+        name: column name
+        compute: function(ctx) -> values (panel for 'stock', per-date array
+            for 'date', long array for 'row')
+        inputs: raw columns / features it reads
+        window: rows in its window, current row included (1 for row-wise
+            features, None when it depends on the whole history)
+        level: 'stock', 'date', 'row' or 'cross'
+        description: line for the feature engineering log
+    """
+
+    def __init__(self, name, compute, inputs, window=1, level='row', description=''):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown feature level: {level}")
+        self.name = name
+        self.compute = compute
+        self.inputs = list(inputs)
+        self.window = window
+        self.level = level
+        self.description = description
+
+    def __repr__(self):
+        return f"Feature({self.name!r}, level={self.level!r}, window={self.window})"
+
+FEATURES = {}
+
+def register(name, inputs, window=1, level='row', description=''):
+    """
+    Decorator registering a compute function as feature `name`.
+    """
+    def decorator(compute):
+        FEATURES[name] = Feature(name, compute, inputs, window, level, description)
+        return compute
+    return decorator
+
+def register_feature(feature):
+    FEATURES[feature.name] = feature
+    return feature
+
+def get_feature(name):
+    if name not in FEATURES:
+        raise KeyError(f"Unknown feature: {name}")
+    return FEATURES[name]
+
+def plan(requested):
+    """
+    Features needed for `requested`, dependencies first (topological order).
+    Inputs that are not registered features are raw columns.
+    """
+    order = []
+    state = {}  # name -> 'visiting' | 'done'
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Cyclic feature dependency: {' -> '.join(path + [name])}")
+        state[name] = 'visiting'
+        feature = get_feature(name)
+        for dep in feature.inputs:
+            if dep in FEATURES:
+                visit(dep, path + [name])
+        state[name] = 'done'
+        order.append(feature)
+
+    for name in requested:
+        visit(name, [])
+    return order
+
+def raw_inputs(requested):
+    """
+    Raw columns read by the requested features and their dependencies.
+    """
+    cols = []
+    for feature in plan(requested):
+        for dep in feature.inputs:
+            if dep not in FEATURES and dep not in cols:
+                cols.append(dep)
+    return cols
+
+def lookback(name):
+    """
+    Rows of history (beyond the current row) a feature needs, following its
+    dependencies. None if it depends on the whole history.
+    """
+    feature = get_feature(name)
+    if feature.window is None:
+        return None
+    needed = feature.window - 1
+    deps = [lookback(dep) for dep in feature.inputs if dep in FEATURES]
+    if any(dep is None for dep in deps):
+        return None
+    return needed + max(deps, default=0)
+
+class FeatureContext:
+    """
+    Computation state for one frame sorted by stock, then Date.
+    Caches computed values, their (rows x stocks) panels and per-date series
+    so that each intermediate is built once.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.values = {}
+        self.cache = {}  # other shared intermediates (e.g. per-date series)
+        self._panels = {}
+        self._date_series = {}
+        self._stock_panel = None
+        self._date_index = None
+
+    @property
+    def stock_panel(self):
+        if self._stock_panel is None:
+            self._stock_panel = rolling_kernels.StockPanel(self.df['stock'])
+        return self._stock_panel
+
+    @property
+    def date_index(self):
+        if self._date_index is None:
+            self._date_index = rolling_kernels.DateIndex(self.df['Date'])
+        return self._date_index
+
+    def column(self, name):
+        """
+        Long values of a computed feature or raw column.
+        """
+        if name in self.values:
+            return self.values[name]
+        return self.df[name].to_numpy()
+
+    def panel(self, name):
+        """
+        (rows x stocks) panel of a computed feature or raw column.
+        """
+        if name not in self._panels:
+            self._panels[name] = self.stock_panel.pivot(self.column(name))
+        return self._panels[name]
+
+    def date_series(self, name):
+        """
+        Per-date values (sorted by date) of a date-level feature or raw column
+        (first non-null value of the column on each date).
+        """
+        if name not in self._date_series:
+            self._date_series[name] = self.date_index.first(self.column(name))
+        return self._date_series[name]
+
+    def compute(self, feature):
+        if feature.name in self.values:
+            return self.values[feature.name]
+        result = feature.compute(self)
+        if feature.level == 'stock':
+            self._panels[feature.name] = result
+            result = self.stock_panel.unpivot(result)
+        elif feature.level == 'date':
+            self._date_series[feature.name] = result
+            result = self.date_index.broadcast(result)
+        self.values[feature.name] = np.asarray(result)
+        return self.values[feature.name]
+
+def depends_on_dates(name):
+    """
+    True if a feature is date-level or cross-sectional, or uses one (it needs
+    every stock's rows on a date, so it cannot be computed from one stock's
+    rows alone).
+    """
+    feature = get_feature(name)
+    if feature.level in ('date', 'cross'):
+        return True
+    return any(depends_on_dates(dep) for dep in feature.inputs if dep in FEATURES)
+
+def _compute_block(inputs_name, outputs_name, n_rows, columns, names, modules, start, end):
+    """
+    Worker: compute per-stock features for rows [start, end) (whole stocks)
+    from the shared input block and write them into the shared output block.
+    Importing the defining modules registers the features under spawn too.
+    """
+    for module in modules:
+        importlib.import_module(module)
+    inputs_shm = shared_memory.SharedMemory(name=inputs_name)
+    outputs_shm = shared_memory.SharedMemory(name=outputs_name)
+    try:
+        inputs = np.ndarray((len(columns), n_rows), dtype=float, buffer=inputs_shm.buf)
+        outputs = np.ndarray((len(names), n_rows), dtype=float, buffer=outputs_shm.buf)
+        chunk = pd.DataFrame({col: inputs[i, start:end] for i, col in enumerate(columns)})
+        values, _ = compute_features(chunk, names, verbose=False)
+        for i, name in enumerate(names):
+            outputs[i, start:end] = values[name]
+        del inputs, outputs, chunk
+    finally:
+        inputs_shm.close()
+        outputs_shm.close()
+    return end - start
+
+def _stock_chunks(stocks, n_chunks):
+    """
+    Row ranges [start, end) of n_chunks blocks of whole stocks with about
+    the same number of rows (stocks must be contiguous).
+    """
+    stocks = pd.Series(stocks).to_numpy()
+    starts = np.flatnonzero(np.r_[True, stocks[1:] != stocks[:-1]])
+    bounds = np.r_[starts, len(stocks)]
+    targets = np.linspace(0, len(stocks), n_chunks + 1)[1:-1]
+    cuts = np.unique(bounds[np.searchsorted(bounds, targets)])
+    edges = np.unique(np.r_[0, cuts, len(stocks)])
+    return [(int(start), int(end)) for start, end in zip(edges[:-1], edges[1:])]
+
+def _compute_parallel(df, requested, order, n_jobs, verbose):
+    """
+    Per-stock features on a process pool (blocks of whole stocks), then
+    date-level features and everything using them once in the parent.
+    Inputs and outputs live in shared memory: workers read their row range
+    and write results in place, so nothing is pickled per row and the
+    results are already in the frame's (stock, Date) order.
+    """
+    ctx = FeatureContext(df)
+    stock_features = [f.name for f in order if not depends_on_dates(f.name)]
+    if not stock_features:
+        return compute_features(df, requested, verbose)[0]
+
+    columns = ['stock'] + [c for c in raw_inputs(stock_features) if c in df.columns]
+    modules = sorted({get_feature(name).compute.__module__ for name in stock_features})
+    chunks = _stock_chunks(df['stock'], n_jobs * 4)
+    n_rows = len(df)
+    if verbose:
+        print(f"      Computing {len(stock_features)} per-stock features on {n_jobs} processes "
+              f"({len(chunks)} blocks of stocks)")
+
+    inputs_shm = shared_memory.SharedMemory(create=True, size=max(len(columns) * n_rows * 8, 1))
+    outputs_shm = shared_memory.SharedMemory(create=True, size=max(len(stock_features) * n_rows * 8, 1))
+    try:
+        inputs = np.ndarray((len(columns), n_rows), dtype=float, buffer=inputs_shm.buf)
+        inputs[0] = pd.factorize(df['stock'], sort=False)[0]
+        for i, col in enumerate(columns[1:], 1):
+            inputs[i] = df[col].to_numpy(dtype=float)
+        outputs = np.ndarray((len(stock_features), n_rows), dtype=float, buffer=outputs_shm.buf)
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_compute_block, inputs_shm.name, outputs_shm.name, n_rows,
+                                       columns, stock_features, modules, start, end)
+                       for start, end in chunks]
+            for future in futures:
+                future.result()
+        for i, name in enumerate(stock_features):
+            ctx.values[name] = outputs[i].copy()
+        del inputs, outputs
+    finally:
+        inputs_shm.close()
+        inputs_shm.unlink()
+        outputs_shm.close()
+        outputs_shm.unlink()
+
+    for feature in order:
+        if feature.name in stock_features:
+            continue
+        if verbose:
+            print(f"      - {feature.name}")
+        ctx.compute(feature)
+    return ctx.values
+
+def compute_features(df, requested, verbose=True, n_jobs=1):
+    """
+    Compute `requested` features (and their dependencies) on df, which must
+    be sorted by stock, then Date. Returns (values dict, planned features).
+    n_jobs > 1 (or -1 for the whole CPU budget) computes per-stock features
+    in worker processes.
+    """
+    order = plan(requested)
+    n_jobs = cpu_budget.get_budget().resolve(n_jobs)
+    if n_jobs > 1 and df['stock'].nunique() > 1:
+        return _compute_parallel(df, requested, order, n_jobs, verbose), order
+
+    ctx = FeatureContext(df)
+    for feature in order:
+        if verbose:
+            print(f"      - {feature.name}")
+        ctx.compute(feature)
+    return ctx.values, order
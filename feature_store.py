@@ -0,0 +1,217 @@
+"""
+Feature Store
+
+Versioned on-disk store for engineered features and labels, keyed by
+(stock, Date). Each column is written as its own .npy file, partitioned by
+dataset, stock and year:
+
+    data/feature_store/<dataset>/<stock>/<year>/Date.npy
+    data/feature_store/<dataset>/<stock>/<year>/<feature>@<version>.npy
+
+The version is a hash of the feature definition (inputs, window, level,
+compute code and the versions of its dependencies), so changing a feature
+invalidates only that feature and what depends on it. The source of the
+kernel modules the compute functions call (KERNEL_MODULES) is part of every
+version, so a fix to a shared kernel invalidates all stored features. Reads touch only the
+requested features, stocks and years.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import pandas as pd
+import numpy as np
+
+import feature_registry
+import create_features_and_labels
+import cross_sectional
+import rolling_kernels
+import technical_indicators
+from create_features_and_labels import ID_COLUMNS, FEATURE_COLUMNS, LABEL_COLUMNS
+from profile_columns import dataset_fingerprint
+
+STORE_ROOT = 'data/feature_store'
+
+# Modules with the shared kernels (and the panel context) that features are computed with
+KERNEL_MODULES = [feature_registry, rolling_kernels, technical_indicators, cross_sectional]
+
+def _code_signature(func):
+    """
+    Source of a compute function plus the values it closes over (so the
+    lambdas built by one factory, e.g. r_1W / r_1M, get different hashes).
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    closure = [repr(cell.cell_contents) for cell in (func.__closure__ or [])]
+    return source + '|' + '|'.join(closure)
+
+def kernel_signature():
+    """
+    Hash of the KERNEL_MODULES source (computed once per process).
+    """
+    global _KERNEL_SIGNATURE
+    if _KERNEL_SIGNATURE is None:
+        digest = hashlib.sha1()
+        for module in KERNEL_MODULES:
+            digest.update(inspect.getsource(module).encode('utf-8'))
+        _KERNEL_SIGNATURE = digest.hexdigest()
+    return _KERNEL_SIGNATURE
+
+_KERNEL_SIGNATURE = None
+
+def feature_version(name):
+    """
+    Short hash of a feature's definition, including its dependencies.
+    Label columns are versioned by construct_labels and its horizons/benchmarks.
+    """
+    if name not in feature_registry.FEATURES:
+        payload = '|'.join([
+            name, _code_signature(create_features_and_labels.construct_labels),
+            repr(create_features_and_labels.LABEL_HORIZONS),
+            repr(create_features_and_labels.LABEL_BENCHMARKS), kernel_signature()
+        ])
+    else:
+        feature = feature_registry.get_feature(name)
+        deps = [f"{dep}={feature_version(dep)}" if dep in feature_registry.FEATURES else dep
+                for dep in feature.inputs]
+        payload = '|'.join([
+            feature.name, ','.join(deps), str(feature.window), feature.level,
+            _code_signature(feature.compute), kernel_signature()
+        ])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:10]
+
+class FeatureStore:
+    """
+    Column store for one dataset (e.g. 'prepared' or a scenario name).
+    """
+
+    def __init__(self, dataset='prepared', root=STORE_ROOT):
+        self.dataset = dataset
+        self.path = os.path.join(root, dataset)
+        self.manifest_path = os.path.join(self.path, 'manifest.json')
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'source_fingerprint': None, 'features': {}, 'partitions': {}}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    def _partition_dir(self, stock, year):
+        return os.path.join(self.path, str(stock).replace(os.sep, '_'), str(year))
+
+    def has(self, features, source_fingerprint=None):
+        """
+        True if every feature is stored at its current version (and, if
+        given, was computed from data with this fingerprint).
+        """
+        manifest = self.manifest()
+        if source_fingerprint is not None and manifest['source_fingerprint'] != source_fingerprint:
+            return False
+        stored = manifest['features']
+        return all(stored.get(name) == feature_version(name) for name in features)
+
+    def write(self, df, columns=None, source_fingerprint=None):
+        """
+        Write feature/label columns of df (which has Date and stock).
+        Data computed from a different source replaces the whole dataset;
+        otherwise only the given columns are (re)written.
+        """
+        columns = [c for c in (columns or FEATURE_COLUMNS + LABEL_COLUMNS) if c in df.columns]
+        manifest = self.manifest()
+        if manifest['source_fingerprint'] != source_fingerprint and os.path.exists(self.path):
+            shutil.rmtree(self.path)
+            manifest = {'source_fingerprint': None, 'features': {}, 'partitions': {}}
+
+        df = df.sort_values(['stock', 'Date'])
+        years = pd.to_datetime(df['Date']).dt.year
+        versions = {col: feature_version(col) for col in columns}
+
+        partitions = manifest['partitions']
+        for (stock, year), part in df.groupby([df['stock'], years], sort=False):
+            part_dir = self._partition_dir(stock, year)
+            os.makedirs(part_dir, exist_ok=True)
+            np.save(os.path.join(part_dir, 'Date.npy'), part['Date'].to_numpy(dtype='datetime64[ns]'))
+            for col in columns:
+                for old in os.listdir(part_dir):
+                    if old.startswith(f"{col}@") and old != f"{col}@{versions[col]}.npy":
+                        os.remove(os.path.join(part_dir, old))
+                np.save(os.path.join(part_dir, f"{col}@{versions[col]}.npy"), part[col].to_numpy())
+            stock_years = partitions.setdefault(str(stock), [])
+            if int(year) not in stock_years:
+                stock_years.append(int(year))
+                stock_years.sort()
+
+        manifest['source_fingerprint'] = source_fingerprint
+        manifest['features'].update(versions)
+        self._save_manifest(manifest)
+
+    def read(self, features=None, stocks=None, start_date=None, end_date=None):
+        """
+        Read a subset of features for the given stocks and date range
+        (start_date <= Date <= end_date). Only the matching partition files
+        are opened.
+        """
+        manifest = self.manifest()
+        features = list(features or manifest['features'])
+        missing = [f for f in features if manifest['features'].get(f) != feature_version(f)]
+        if missing:
+            raise KeyError(f"Features not in store '{self.dataset}' at current version: {missing}")
+
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+
+        frames = []
+        for stock in (stocks or list(manifest['partitions'])):
+            for year in manifest['partitions'].get(str(stock), []):
+                if (start is not None and year < start.year) or (end is not None and year > end.year):
+                    continue
+                part_dir = self._partition_dir(stock, year)
+                dates = np.load(os.path.join(part_dir, 'Date.npy'))
+                mask = np.ones(len(dates), dtype=bool)
+                if start is not None:
+                    mask &= dates >= start.to_datetime64()
+                if end is not None:
+                    mask &= dates <= end.to_datetime64()
+                if not mask.any():
+                    continue
+                part = {'Date': dates[mask], 'stock': np.full(mask.sum(), stock, dtype=object)}
+                for name in features:
+                    values = np.load(os.path.join(part_dir, f"{name}@{manifest['features'][name]}.npy"),
+                                     allow_pickle=False)
+                    part[name] = values[mask]
+                frames.append(pd.DataFrame(part))
+
+        if not frames:
+            return pd.DataFrame(columns=ID_COLUMNS + features)
+        result = pd.concat(frames, ignore_index=True)
+        result['Date'] = pd.to_datetime(result['Date'])
+        return result
+
+def load_or_compute(df, dataset, features=None):
+    """
+    ML dataset (Date, stock, features, labels) for df: read from the store
+    when it holds these features for the same input data, otherwise run
+    create_features_and_labels.process_data and store the result.
+    Returns (df_ml, from_store).
+    """
+    features = list(features if features is not None else FEATURE_COLUMNS)
+    store = FeatureStore(dataset)
+    fingerprint = dataset_fingerprint(df)
+    if store.has(features + LABEL_COLUMNS, fingerprint):
+        print(f"   Loading {len(features)} features from feature store '{dataset}'")
+        df_ml = store.read(features + LABEL_COLUMNS)
+        return df_ml[ID_COLUMNS + features + LABEL_COLUMNS], True
+
+    df_ml, _ = create_features_and_labels.process_data(df, features)
+    store.write(df_ml, features + LABEL_COLUMNS, fingerprint)
+    print(f"   OK Stored {len(features)} features in feature store '{dataset}'")
+    return df_ml, False
@@ -14,7 +14,8 @@ import os
 import prepare_data
 import detect_outliers
 import scale_features
-import create_features_and_labels
+import feature_store
+from profile_columns import profile_columns
 
 def generate_report():
     report = []
@@ -35,7 +36,7 @@ def generate_report():
     report.append(f"- **Stocks:** {', '.join(df_raw['stock'].unique())}")
     
     # Null Analysis
-    null_counts = df_raw.isnull().sum()
+    null_counts = profile_columns(df_raw)['nulls']
     total_cells = np.prod(df_raw.shape)
     total_nulls = null_counts.sum()
     report.append(f"- **Total Null Values:** {total_nulls:,} ({total_nulls/total_cells*100:.2f}% of data)")
@@ -53,7 +54,7 @@ def generate_report():
     
     report.append("### Impact")
     report.append(f"- **Rows Removed:** 0 (All nulls were handled by imputation)")
-    report.append(f"- **Nulls Remaining:** {df_smart.isnull().sum().sum()}")
+    report.append(f"- **Nulls Remaining:** {profile_columns(df_smart)['nulls'].sum()}")
     report.append("- **Insight:** By using smart imputation instead of dropping rows with nulls, we preserved **100%** of the temporal structure, which is critical for time-series modeling.")
     report.append("")
     
@@ -107,8 +108,8 @@ def generate_report():
     
     # Show example of scaling effect
     report.append("### Example Transformation (Volume)")
-    vol_before = df_no_outliers['Volume'].describe()
-    vol_after = df_scaled['Volume'].describe()
+    vol_before = profile_columns(df_no_outliers).loc['Volume']
+    vol_after = profile_columns(df_scaled).loc['Volume']
     
     report.append(f"- **Before Scaling:** Mean = {vol_before['mean']:,.0f}, Std = {vol_before['std']:,.0f}, Range = [{vol_before['min']:,.0f}, {vol_before['max']:,.0f}]")
     report.append(f"- **After Scaling:** Mean = {vol_after['mean']:.4f}, Std = {vol_after['std']:.4f}, Range = [{vol_after['min']:.4f}, {vol_after['max']:.4f}]")
@@ -119,7 +120,7 @@ def generate_report():
     
     # Step 4: Final Feature Engineering
     print("Running Feature Engineering...")
-    df_ml, _ = create_features_and_labels.process_data(df_scaled)
+    df_ml, _ = feature_store.load_or_compute(df_scaled, 'all_combined')
     
     # Final cleanup (dropping null targets)
     rows_before_drop = len(df_ml)
@@ -0,0 +1,104 @@
+"""
+Incremental Feature Computation
+
+Keeps the rolling-window state needed by engineer_features and emits
+features for newly appended rows only, instead of recomputing the whole
+history on every run.
+
+The state is the trailing raw rows of each stock: the last 63 rows, which
+hold the closes for r_3M, the MA20/MA50 windows, the 21 returns for vol_1M
+and the 20 volumes for vol_z. Together these rows also cover the last 21
+trading dates, which is all the date-level features (SP500 return and
+volatility, CPI and Fed Funds changes) look back. New rows are appended to
+that state and run through the same engineer_features code, so values match
+a full recompute while the cost depends only on the new rows and the fixed
+lookback.
+"""
+
+import contextlib
+import io
+import pandas as pd
+
+import feature_registry
+from create_features_and_labels import engineer_features, ID_COLUMNS, FEATURE_COLUMNS
+
+# Longest lookback of any feature, in rows per stock (r_3M: 63-day return)
+STOCK_LOOKBACK = max(feature_registry.lookback(name) for name in FEATURE_COLUMNS)
+
+class IncrementalFeatureEngine:
+    """
+    Rolling feature state persisted between runs.
+
+    engine = IncrementalFeatureEngine().fit_history(df_history)
+    df_features_new = engine.update(df_new_rows)
+    """
+
+    def __init__(self, stock_lookback=STOCK_LOOKBACK):
+        self.stock_lookback = stock_lookback
+        self.tail = None
+
+    def fit_history(self, df):
+        """
+        Initialize the state from the full history (no features are computed).
+        """
+        df = _sorted(df)
+        self.tail = df.groupby('stock', sort=False).tail(self.stock_lookback).reset_index(drop=True)
+        return self
+
+    @property
+    def last_date(self):
+        if self.tail is None or len(self.tail) == 0:
+            return None
+        return self.tail['Date'].max()
+
+    def update(self, df_new, verbose=False):
+        """
+        Compute features for df_new (rows dated after the current state) and
+        advance the state. Returns Date, stock and FEATURE_COLUMNS for the new rows.
+        """
+        df_new = _sorted(df_new)
+        if len(df_new) == 0:
+            return pd.DataFrame(columns=ID_COLUMNS + FEATURE_COLUMNS)
+
+        last_date = self.last_date
+        if last_date is not None and df_new['Date'].min() <= last_date:
+            raise ValueError(
+                f"New rows must be dated after the last processed date ({last_date.date()}); "
+                f"got rows from {df_new['Date'].min().date()}"
+            )
+
+        history = self.tail if self.tail is not None else df_new.iloc[:0]
+        combined = pd.concat(
+            [history.assign(_is_new=False), df_new.assign(_is_new=True)],
+            ignore_index=True
+        )
+
+        if verbose:
+            df_features, _ = engineer_features(combined)
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                df_features, _ = engineer_features(combined)
+
+        new_rows = df_features['_is_new'].to_numpy(dtype=bool)
+        result = df_features.loc[new_rows, ID_COLUMNS + FEATURE_COLUMNS].reset_index(drop=True)
+
+        # Advance the state: keep the trailing rows of each stock
+        combined = _sorted(combined.drop(columns='_is_new'))
+        self.tail = combined.groupby('stock', sort=False).tail(self.stock_lookback).reset_index(drop=True)
+
+        return result
+
+    def save(self, path='data/feature_state.pkl'):
+        pd.to_pickle({'stock_lookback': self.stock_lookback, 'tail': self.tail}, path)
+
+    @classmethod
+    def load(cls, path='data/feature_state.pkl'):
+        state = pd.read_pickle(path)
+        engine = cls(stock_lookback=state['stock_lookback'])
+        engine.tail = state['tail']
+        return engine
+
+def _sorted(df):
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.sort_values(['stock', 'Date']).reset_index(drop=True)
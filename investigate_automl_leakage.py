@@ -1,21 +1,12 @@
 import h2o
 from h2o.estimators import H2OGradientBoostingEstimator
 import pandas as pd
-import prepare_data
-import create_features_and_labels
-import detect_outliers
-import scale_features
+import pipeline
 import os
 
 def prepare_best_dataset():
     print("Preparing data...")
-    df_smart = prepare_data.prepare_data()
-    zscore_results, _ = detect_outliers.analyze_outliers(df_smart)
-    df_no_outliers = detect_outliers.remove_outliers(df_smart, zscore_results, method='zscore')
-    df_scaled_raw, _ = scale_features.process_scaling(df_no_outliers)
-    df_ml, _ = create_features_and_labels.process_data(df_scaled_raw)
-    df_ml = df_ml.dropna()
-    return df_ml
+    return pipeline.get_pipeline().ml_dataset('all_combined', dropna=True)
 
 def main():
     h2o.init()
@@ -14,25 +14,12 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, f1_score
-import prepare_data
-import detect_outliers
-import scale_features
-import create_features_and_labels
+import pipeline
 
 def get_data():
     print("Preparing data (All Combined strategy)...")
-    # 1. Smart Imputation
-    df = prepare_data.prepare_data()
-    # 2. Outlier Removal
-    zscore_results, _ = detect_outliers.analyze_outliers(df)
-    df = detect_outliers.remove_outliers(df, zscore_results, method='zscore')
-    # 3. Scaling
-    df, _ = scale_features.process_scaling(df)
-    # 4. Feature Engineering
-    df, _ = create_features_and_labels.process_data(df)
-    # Drop nulls
-    df = df.dropna()
-    return df
+    # Smart Imputation -> Outlier Removal -> Scaling -> Feature Engineering, nulls dropped
+    return pipeline.get_pipeline().ml_dataset('all_combined', dropna=True)
 
 def train_evaluate(X_train, X_test, y_train, y_test, name):
     print(f"\nEvaluating: {name}")
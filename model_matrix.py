@@ -0,0 +1,244 @@
+"""
+Scenario x Model Benchmark Matrix
+
+One run covering the compare_models*.py scripts: every data preparation
+scenario is prepared once (shared pipeline stages computed a single time)
+and every configured model is trained on it with the split its script used.
+Each cell records accuracy, F1 and AUC plus fit time, predict latency and
+the peak memory used by fit + predict. Results go to
+data/model_matrix_results.csv for the dashboard.
+
+Usage:
+    python model_matrix.py                        # all models
+    python model_matrix.py GBM "Stacked Ensemble" # selected models
+"""
+
+import ctypes
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+import boosting
+import cpu_budget
+import pipeline
+import scenario_executor
+from create_features_and_labels import ID_COLUMNS, LABEL_COLUMNS
+from compare_models_timeseries_ensemble import create_stacked_ensemble
+
+RESULTS_PATH = 'data/model_matrix_results.csv'
+
+# ========== SPLITS ==========
+
+def random_split(df):
+    """
+    Shuffled 80/20 split (compare_models.py).
+    """
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+    return train_idx, test_idx
+
+def time_split_rows(df):
+    """
+    First 80% of rows by date for training (compare_models_timeseries*.py).
+    """
+    split_idx = int(len(df) * 0.8)
+    return np.arange(split_idx), np.arange(split_idx, len(df))
+
+def time_split_dates(df):
+    """
+    First 80% of trading dates for training (compare_models_timeseries_ensemble.py).
+    """
+    all_dates = np.sort(df['Date'].unique())
+    split_date = all_dates[int(len(all_dates) * 0.8)]
+    train = (df['Date'] < split_date).to_numpy()
+    return np.flatnonzero(train), np.flatnonzero(~train)
+
+SPLITS = {
+    'random': random_split,
+    'time': time_split_rows,
+    'time_dates': time_split_dates,
+}
+
+# name: (estimator factory taking n_jobs and the training rows' dates, split).
+# Pass the dates wherever the model is fitted: early stopping and the stack's
+# CV purge by label horizon with them.
+MODELS = {
+    'RandomForest (random split)': (
+        lambda n_jobs, dates=None: RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs),
+        'random'),
+    'RandomForest': (
+        lambda n_jobs, dates=None: RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs),
+        'time'),
+    'GBM': (
+        lambda n_jobs, dates=None: GradientBoostingClassifier(n_estimators=100, random_state=42, max_depth=5),
+        'time'),
+    'HistGBM': (
+        lambda n_jobs, dates=None: boosting.make_gbm('hist', n_estimators=100, max_depth=5, dates=dates), 'time'),
+    'Stacked Ensemble': (create_stacked_ensemble, 'time_dates'),
+}
+
+# ========== PEAK MEMORY ==========
+
+STATM_PATH = '/proc/self/statm'
+
+try:
+    _LIBC = ctypes.CDLL('libc.so.6')
+except OSError:
+    _LIBC = None
+
+def _rss_bytes():
+    with open(STATM_PATH) as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+class PeakMemory:
+    """
+    Peak memory above the starting level while the block runs. Samples the
+    process RSS (Linux), which also sees the C allocations of the tree
+    builders; elsewhere falls back to tracemalloc (Python / NumPy only).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._use_rss = os.path.exists(STATM_PATH)
+
+    def _sample(self, stop):
+        while not stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes() - self._start)
+
+    def __enter__(self):
+        if self._use_rss:
+            # Hand memory freed by earlier fits back to the OS so it shows up as growth again
+            gc.collect()
+            if _LIBC is not None:
+                _LIBC.malloc_trim(0)
+            self._start = _rss_bytes()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._sample, args=(self._stop,), daemon=True)
+            self._thread.start()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._use_rss:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, _rss_bytes() - self._start)
+        else:
+            _, self.peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+# ========== MATRIX ==========
+
+def split_frame(df_ml, split):
+    """
+    (clean frame, train row positions, test row positions) for a scenario
+    dataset and split.
+    """
+    df_clean = df_ml.dropna()
+    if split != 'random':
+        # Time splits need chronological order; the random split shuffles the frame as is
+        df_clean = df_clean.sort_values('Date')
+    df_clean = df_clean.reset_index(drop=True)
+    train_idx, test_idx = SPLITS[split](df_clean)
+    return df_clean, train_idx, test_idx
+
+def split_xy(df_clean, train_idx, test_idx):
+    """
+    (X_train, X_test, y_train, y_test) of a split_frame result.
+    """
+    features = [c for c in df_clean.columns if c not in ID_COLUMNS + LABEL_COLUMNS]
+    X = df_clean[features]
+    y = df_clean['y']
+    return X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx]
+
+def split_data(df_ml, split):
+    """
+    (X_train, X_test, y_train, y_test) for a scenario dataset and split.
+    """
+    return split_xy(*split_frame(df_ml, split))
+
+def evaluate(model, X_train, X_test, y_train, y_test):
+    """
+    Fit and score one model, timing fit and predict and tracking peak memory.
+    """
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred_proba = model.predict_proba(X_test)[:, 1]
+        predict_time = time.perf_counter() - start
+
+    y_pred = model.classes_[(y_pred_proba > 0.5).astype(int)]
+    return {
+        'Accuracy': accuracy_score(y_test, y_pred),
+        'F1': f1_score(y_test, y_pred),
+        'AUC': roc_auc_score(y_test, y_pred_proba),
+        'Fit (s)': fit_time,
+        'Predict (ms/1k rows)': predict_time * 1000 / len(X_test) * 1000,
+        'Peak Memory (MB)': memory.peak / 1024 ** 2,
+        'Train Rows': len(X_train),
+        'Test Rows': len(X_test),
+    }
+
+def run_matrix(models=None, scenarios=None, n_jobs=-1):
+    """
+    Train every model on every scenario; returns the results table.
+    """
+    models = list(models or MODELS)
+    scenarios = list(scenarios or pipeline.SCENARIOS)
+    datasets = scenario_executor.prepare_scenarios(scenarios)
+    budget = cpu_budget.get_budget()
+    cores = budget.resolve(n_jobs)
+
+    results = []
+    for scenario in scenarios:
+        label = scenario_executor.SCENARIO_INFO[scenario][2]
+        print("\n" + "-" * 70)
+        print(scenario_executor.SCENARIO_INFO[scenario][0])
+        print("-" * 70)
+        splits = {}
+        for name in models:
+            factory, split = MODELS[name]
+            if split not in splits:
+                df_clean, train_idx, test_idx = split_frame(datasets[scenario], split)
+                splits[split] = (split_xy(df_clean, train_idx, test_idx), df_clean['Date'].iloc[train_idx])
+            data, train_dates = splits[split]
+            row = {'Scenario': label, 'Model': name, 'Split': split}
+            with budget.limit(cores):
+                row.update(evaluate(budget.configure(factory(cores, train_dates), cores), *data))
+            results.append(row)
+            print(f"  {name:<28} acc {row['Accuracy']:.4f}  F1 {row['F1']:.4f}  AUC {row['AUC']:.4f}  "
+                  f"fit {row['Fit (s)']:.1f}s  predict {row['Predict (ms/1k rows)']:.1f} ms/1k  "
+                  f"peak {row['Peak Memory (MB)']:.0f} MB")
+    return pd.DataFrame(results)
+
+def main(models=None):
+    print("=" * 70)
+    print("SCENARIO x MODEL BENCHMARK MATRIX")
+    print("=" * 70)
+
+    results_df = run_matrix(models)
+
+    print("\n" + "=" * 70)
+    print("ACCURACY BY SCENARIO AND MODEL")
+    print("=" * 70)
+    print("\n" + results_df.pivot(index='Scenario', columns='Model', values='Accuracy')
+          .reindex([scenario_executor.SCENARIO_INFO[s][2] for s in pipeline.SCENARIOS]).to_string())
+
+    results_df.to_csv(RESULTS_PATH, index=False)
+    print(f"\nResults saved to {RESULTS_PATH}")
+    return results_df
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or None)
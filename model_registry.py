@@ -0,0 +1,204 @@
+"""
+Model Registry
+
+Versioned on-disk store for fitted scikit-learn models, next to the H2O
+leader that run_automl.py saves to data/models:
+
+    data/model_registry/<name>/v0001/model.joblib     fitted estimator
+    data/model_registry/<name>/v0001/metadata.json    features, scenario, data fingerprint, metrics
+    data/model_registry/<name>/v0001/scaler.json      FeatureScaler parameters (scaled scenarios)
+
+The metadata records everything needed to score new rows consistently: the
+feature list in training order, the scenario and its pipeline key, the
+fingerprint of the training frame, and a copy of the scaler file the
+scenario's scaling stage saved.
+
+    registry = ModelRegistry()
+    version = registry.register('RandomForest', model, features, scenario='all_combined', train_df=df_train)
+    artifact = registry.load('RandomForest')            # latest version
+
+Usage:
+    python model_registry.py                            # train and register RandomForest on all_combined
+    python model_registry.py GBM scaled                 # model, scenario
+"""
+
+import json
+import os
+import shutil
+import sys
+import joblib
+import pandas as pd
+
+import pipeline
+import scale_features
+from profile_columns import dataset_fingerprint
+
+REGISTRY_DIR = 'data/model_registry'
+
+class ModelArtifact:
+    """
+    A loaded registry entry: the estimator, its metadata and (if any) its scaler.
+    """
+
+    def __init__(self, model, metadata, scaler=None):
+        self.model = model
+        self.metadata = metadata
+        self.scaler = scaler
+
+    @property
+    def name(self):
+        return self.metadata['name']
+
+    @property
+    def version(self):
+        return self.metadata['version']
+
+    @property
+    def features(self):
+        return self.metadata['features']
+
+class ModelRegistry:
+    """
+    Models stored by name, each with numbered versions.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def _dir(self, name, version):
+        return os.path.join(self.root, name.replace(os.sep, '_'), version)
+
+    def versions(self, name):
+        path = os.path.join(self.root, name.replace(os.sep, '_'))
+        if not os.path.isdir(path):
+            return []
+        return sorted(v for v in os.listdir(path) if os.path.exists(os.path.join(path, v, 'metadata.json')))
+
+    def resolve(self, name, version=None):
+        """
+        Version string of a model (the latest if version is None).
+        """
+        versions = self.versions(name)
+        if not versions:
+            raise KeyError(f"No registered versions of model '{name}' in {self.root}")
+        if version is None:
+            return versions[-1]
+        if version not in versions:
+            raise KeyError(f"Model '{name}' has no version {version} (available: {', '.join(versions)})")
+        return version
+
+    def register(self, name, model, features, scenario=None, train_df=None, scaler=None, metrics=None):
+        """
+        Save a fitted model as the next version of `name`; returns the version.
+        train_df (the training rows, Date included) gives the data
+        fingerprint and training date range. scaler is a FeatureScaler or
+        the path of a saved one (copied as is).
+        """
+        versions = self.versions(name)
+        version = f"v{int(versions[-1][1:]) + 1:04d}" if versions else 'v0001'
+        path = self._dir(name, version)
+        os.makedirs(path, exist_ok=True)
+
+        joblib.dump(model, os.path.join(path, 'model.joblib'))
+        if isinstance(scaler, str):
+            shutil.copyfile(scaler, os.path.join(path, 'scaler.json'))
+        elif scaler is not None:
+            scaler.save(os.path.join(path, 'scaler.json'))
+
+        metadata = {
+            'name': name,
+            'version': version,
+            'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'estimator': type(model).__name__,
+            'params': {k: repr(v) for k, v in model.get_params(deep=False).items()},
+            'features': list(features),
+            'scenario': scenario,
+            'pipeline_key': pipeline.get_pipeline().key(scenario) if scenario else None,
+            'data_fingerprint': dataset_fingerprint(train_df) if train_df is not None else None,
+            'train_rows': len(train_df) if train_df is not None else None,
+            'train_start': str(train_df['Date'].min().date()) if train_df is not None else None,
+            'train_end': str(train_df['Date'].max().date()) if train_df is not None else None,
+            'scaler': scaler is not None,
+            'metrics': metrics or {},
+        }
+        with open(os.path.join(path, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        return version
+
+    def load(self, name, version=None):
+        """
+        ModelArtifact of a model version (the latest if version is None).
+        """
+        path = self._dir(name, self.resolve(name, version))
+        with open(os.path.join(path, 'metadata.json'), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        scaler_path = os.path.join(path, 'scaler.json')
+        scaler = scale_features.FeatureScaler.load(scaler_path) if os.path.exists(scaler_path) else None
+        return ModelArtifact(joblib.load(os.path.join(path, 'model.joblib')), metadata, scaler)
+
+    def list(self):
+        """
+        One row per registered model version.
+        """
+        rows = []
+        names = sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []
+        for name in names:
+            for version in self.versions(name):
+                with open(os.path.join(self.root, name, version, 'metadata.json'), 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                rows.append({key: metadata[key] for key in
+                             ['name', 'version', 'created', 'estimator', 'scenario', 'train_rows', 'train_end']})
+                rows[-1].update(metadata['metrics'])
+        return pd.DataFrame(rows)
+
+def scenario_scaler(scenario, data_pipeline=None):
+    """
+    Path of the FeatureScaler file the scenario's scaling stage saved (with
+    the stage's own fit range), or None for scenarios without scaling.
+    """
+    if not scenario:
+        return None
+    data_pipeline = data_pipeline or pipeline.get_pipeline()
+    path = data_pipeline.scaler_path(scenario)
+    if path is not None:
+        data_pipeline.run(scenario)   # writes the file if the stage was not cached with it
+    return path
+
+def train_and_register(model_name='RandomForest', scenario='all_combined', registry=None, n_jobs=-1):
+    """
+    Fit a model_matrix model on a scenario with its split, evaluate it on
+    the test rows and register it. Returns (version, metrics).
+    """
+    import cpu_budget
+    import model_matrix
+
+    registry = registry or ModelRegistry()
+    df_ml = pipeline.get_pipeline().ml_dataset(scenario)
+    factory, split = model_matrix.MODELS[model_name]
+    df_clean, train_idx, test_idx = model_matrix.split_frame(df_ml, split)
+    X_train, X_test, y_train, y_test = model_matrix.split_xy(df_clean, train_idx, test_idx)
+    # Training rows with their IDs and labels, in X_train's order
+    train_df = df_clean.iloc[train_idx]
+
+    budget = cpu_budget.get_budget()
+    model = budget.configure(factory(n_jobs, train_df['Date']), n_jobs)
+    with budget.limit(n_jobs):
+        metrics = model_matrix.evaluate(model, X_train, X_test, y_train, y_test)
+    metrics = {'accuracy': metrics['Accuracy'], 'f1': metrics['F1'], 'auc': metrics['AUC']}
+
+    version = registry.register(model_name, model, list(X_train.columns), scenario=scenario,
+                                train_df=train_df, scaler=scenario_scaler(scenario), metrics=metrics)
+    return version, metrics
+
+def main(model_name='RandomForest', scenario='all_combined'):
+    print("=" * 70)
+    print(f"REGISTER MODEL: {model_name} ({scenario})")
+    print("=" * 70)
+
+    version, metrics = train_and_register(model_name, scenario)
+    print(f"\n   Registered {model_name} {version}: acc {metrics['accuracy']:.4f}  "
+          f"F1 {metrics['f1']:.4f}  AUC {metrics['auc']:.4f}")
+    print("\n" + ModelRegistry().list().to_string(index=False))
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,221 @@
+"""
+Stacking on Cached Out-of-Fold Predictions
+
+StackingClassifier refits every base learner on every CV fold each time it
+is fitted, so trying another meta-learner means retraining the RF and GBM.
+CachedStack fits the same stack (same base learners, CV and meta-learner as
+create_stacked_ensemble) but stores what the base learners produce:
+
+    data/oof_cache/<scenario>/<learner>/<key>.npy      out-of-fold predictions of one fold
+    data/oof_cache/<scenario>/<learner>/<key>.joblib   base learner fitted on all training rows
+
+A fold's key hashes the base learner's class and parameters (n_jobs
+excluded), the training data and the fold's row indices; the full fit's key
+hashes the learner and the training data. A base learner is only refit when
+one of those changes, so swapping the meta-learner, or blending the base
+learners, reuses every base fit and takes seconds.
+
+    stack = CachedStack.from_stacking(create_stacked_ensemble(dates=train_dates), 'all_combined')
+    stack.fit(X_train, y_train)                                   # base learners fitted once
+    stack.set_params(final_estimator=Blend()).fit(X_train, y_train)   # meta-learner only
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import joblib
+import pandas as pd
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import check_cv
+
+import cpu_budget
+
+CACHE_DIR = 'data/oof_cache'
+
+def learner_key(estimator):
+    """
+    Hash of a base learner's class and parameters, ignoring n_jobs (which
+    does not change its predictions).
+    """
+    params = {name: value for name, value in estimator.get_params(deep=True).items()
+              if not name.endswith('n_jobs') and not hasattr(value, 'get_params')}
+    payload = json.dumps([type(estimator).__name__, params], sort_keys=True, default=repr)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+def _hash(*arrays):
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+def _rows(X, idx):
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+
+def _fit_fold(estimator, X, y, train_idx, test_idx):
+    model = clone(estimator).fit(_rows(X, train_idx), y[train_idx])
+    return model.predict_proba(_rows(X, test_idx))[:, 1]
+
+def _fit_full(estimator, X, y):
+    return clone(estimator).fit(X, y)
+
+class Blend(ClassifierMixin, BaseEstimator):
+    """
+    Meta-learner that averages the base learners' probabilities (equal
+    weights unless given) instead of fitting a model on them.
+    """
+
+    def __init__(self, weights=None):
+        self.weights = weights
+
+    def fit(self, X, y):
+        self.classes_ = np.unique(y)
+        return self
+
+    def predict_proba(self, X):
+        p = np.average(np.asarray(X), axis=1, weights=self.weights)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+class CachedStack(ClassifierMixin, BaseEstimator):
+    """
+    Binary stacking classifier (StackingClassifier with predict_proba base
+    predictions) whose out-of-fold predictions and full base fits are
+    cached on disk per scenario.
+    """
+
+    def __init__(self, estimators, final_estimator=None, cv=3, scenario='default',
+                 cache_dir=CACHE_DIR, n_jobs=None, verbose=True):
+        self.estimators = estimators
+        self.final_estimator = final_estimator
+        self.cv = cv
+        self.scenario = scenario
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+
+    @classmethod
+    def from_stacking(cls, stack, scenario='default', **kwargs):
+        """
+        CachedStack with the base learners, meta-learner, CV and n_jobs of a
+        StackingClassifier.
+        """
+        return cls(stack.estimators, stack.final_estimator, stack.cv, scenario, n_jobs=stack.n_jobs, **kwargs)
+
+    def _path(self, name, key, ext):
+        return os.path.join(self.cache_dir, str(self.scenario).replace(os.sep, '_'), name, f"{key}.{ext}")
+
+    def _base_fits(self, X, y):
+        """
+        Out-of-fold predictions (rows x learners) and the fully fitted base
+        learners, fitting only what is not cached.
+        """
+        data_key = _hash(np.asarray(X, dtype=float), y)
+        folds = list(check_cv(self.cv, y, classifier=True).split(X, y))
+
+        oof = np.zeros((len(y), len(self.estimators)))
+        models, pending = {}, []
+        for j, (name, estimator) in enumerate(self.estimators):
+            est_key = learner_key(estimator)
+            for train_idx, test_idx in folds:
+                path = self._path(name, _hash(est_key.encode(), data_key.encode(), train_idx, test_idx), 'npy')
+                if os.path.exists(path):
+                    oof[test_idx, j] = np.load(path)
+                else:
+                    pending.append((j, name, path, estimator, ('fold', train_idx, test_idx)))
+            path = self._path(name, _hash(est_key.encode(), data_key.encode()), 'joblib')
+            if os.path.exists(path):
+                models[name] = joblib.load(path)
+            else:
+                pending.append((j, name, path, estimator, ('full',)))
+
+        if pending:
+            fits = Parallel(n_jobs=cpu_budget.get_budget().split(len(pending), self.n_jobs)[0])(
+                delayed(_fit_fold)(estimator, X, y, task[1], task[2]) if task[0] == 'fold'
+                else delayed(_fit_full)(estimator, X, y)
+                for _, _, _, estimator, task in pending)
+            for (j, name, path, _, task), result in zip(pending, fits):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if task[0] == 'fold':
+                    np.save(path, result)
+                    oof[task[2], j] = result
+                else:
+                    joblib.dump(result, path)
+                    models[name] = result
+
+        self.n_cached_ = len(folds) * len(self.estimators) + len(self.estimators) - len(pending)
+        self.n_fitted_ = len(pending)
+        if self.verbose:
+            print(f"  Base learners: {self.n_fitted_} fits, {self.n_cached_} from cache ({self.scenario})")
+        return oof, [models[name] for name, _ in self.estimators]
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        self.classes_ = np.unique(y)
+        if len(self.classes_) != 2:
+            raise ValueError(f"CachedStack supports binary targets, got {len(self.classes_)} classes")
+        oof, self.estimators_ = self._base_fits(X, y)
+        self.named_estimators_ = dict(zip([name for name, _ in self.estimators], self.estimators_))
+        self.final_estimator_ = clone(self.final_estimator if self.final_estimator is not None
+                                      else LogisticRegression()).fit(oof, y)
+        return self
+
+    def transform(self, X):
+        """
+        Base learner probabilities of X (rows x learners), the meta-learner's input.
+        """
+        return np.column_stack([est.predict_proba(X)[:, 1] for est in self.estimators_])
+
+    def predict_proba(self, X):
+        return self.final_estimator_.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.final_estimator_.predict(self.transform(X))
+
+# Meta-learners compared by main()
+META_LEARNERS = {
+    'LogisticRegression': LogisticRegression(),
+    'LogisticRegression (C=0.01)': LogisticRegression(C=0.01),
+    'Blend (equal weights)': Blend(),
+    'Blend (RF only)': Blend(weights=[1, 0]),
+}
+
+def main(scenario='all_combined'):
+    import model_matrix
+    import pipeline
+    from compare_models_timeseries_ensemble import create_stacked_ensemble
+
+    print("=" * 70)
+    print(f"STACKING ON CACHED OUT-OF-FOLD PREDICTIONS ({scenario})")
+    print("=" * 70)
+
+    df_ml = pipeline.get_pipeline().ml_dataset(scenario)
+    X_train, X_test, y_train, y_test = model_matrix.split_data(df_ml, 'time_dates')
+    train_dates = df_ml.dropna().sort_values('Date')['Date'].iloc[:len(X_train)]
+    stack = CachedStack.from_stacking(create_stacked_ensemble(dates=train_dates.to_numpy()), scenario)
+
+    rows = []
+    for name, meta in META_LEARNERS.items():
+        start = time.perf_counter()
+        stack.set_params(final_estimator=meta).fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+        y_pred_proba = stack.predict_proba(X_test)[:, 1]
+        y_pred = stack.classes_[(y_pred_proba > 0.5).astype(int)]
+        rows.append({'Meta-learner': name, 'Accuracy': accuracy_score(y_test, y_pred),
+                     'F1': f1_score(y_test, y_pred), 'AUC': roc_auc_score(y_test, y_pred_proba),
+                     'Fit (s)': fit_time, 'Base fits': stack.n_fitted_})
+        print(f"   {name:<28} AUC {rows[-1]['AUC']:.4f}  fit {fit_time:.2f}s")
+
+    results_df = pd.DataFrame(rows)
+    print("\n" + results_df.to_string(index=False))
+    return results_df
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,207 @@
+"""
+Pipeline Runner
+
+Defines the data preparation stages shared by the experiment scripts once
+and memoizes each stage's output on disk:
+
+    raw -> baseline                                  (ffill + dropna)
+    raw -> smart_imputation                          (prepare_data)
+    smart_imputation -> outlier_removal              (z-score / IQR removal)
+    smart_imputation -> scaled                       (process_scaling)
+    outlier_removal -> all_combined                  (process_scaling)
+
+A stage's cache key hashes its parent's key, its parameters and the source
+of the modules that implement it, with the raw data file's content hash at
+the root. Editing prepare_data.py, changing a parameter or refreshing the
+raw data recomputes that stage and everything after it; otherwise the frame
+is read back from data/pipeline_cache. Features and labels for a scenario
+come from the feature store (feature_store.load_or_compute), so a warm
+experiment starts from cached features in seconds.
+
+Stages never write integrated_prepared_data.csv or other artifacts. The
+scaling stages save their fitted FeatureScaler next to the cached frame
+(Pipeline.scaler_path), so a model trained on the stage can be shipped with
+the exact scaler parameters.
+
+    pipeline = Pipeline()
+    df_ml = pipeline.ml_dataset('all_combined')
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pandas as pd
+
+import prepare_data
+import detect_outliers
+import profile_columns
+import scale_features
+import feature_store
+
+CACHE_DIR = 'data/pipeline_cache'
+RAW_DATA = 'data/integrated_raw_data.csv'
+
+# ========== STAGES ==========
+
+def load_raw(path=RAW_DATA):
+    df = pd.read_csv(path)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+def baseline_fill(df):
+    """
+    Minimal prep: forward fill, then drop remaining nulls.
+    """
+    return df.ffill().dropna()
+
+def smart_imputation(df):
+    return prepare_data.prepare_data(df, save=False)
+
+def outlier_removal(df, method='zscore'):
+    zscore_results, iqr_results = detect_outliers.analyze_outliers(df)
+    df_clean = detect_outliers.remove_outliers(df, zscore_results, iqr_results, method=method)
+    print(f"   Removed {len(df) - len(df_clean)} outlier rows")
+    return df_clean
+
+def scaling(df, fit_start=None, fit_end=None, scaler_path=None):
+    df_scaled, _ = scale_features.process_scaling(df, fit_start=fit_start, fit_end=fit_end,
+                                                  scaler_path=scaler_path)
+    return df_scaled
+
+# name: (parent stage, function, modules whose source versions the stage).
+# List every project module the stage's decisions depend on, imports included
+# (the imputation, outlier and scaler choices come from profile_columns).
+STAGES = {
+    'raw': (None, load_raw, []),
+    'baseline': ('raw', baseline_fill, []),
+    'smart_imputation': ('raw', smart_imputation, [prepare_data, profile_columns]),
+    'outlier_removal': ('smart_imputation', outlier_removal, [detect_outliers, profile_columns]),
+    'scaled': ('smart_imputation', scaling, [scale_features, profile_columns]),
+    'all_combined': ('outlier_removal', scaling, [scale_features, profile_columns]),
+}
+
+# Data preparation scenarios compared by the compare_models*.py scripts
+SCENARIOS = ['baseline', 'smart_imputation', 'outlier_removal', 'scaled', 'all_combined']
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _source_hash(func, modules):
+    digest = hashlib.sha1(inspect.getsource(func).encode('utf-8'))
+    for module in modules:
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.hexdigest()
+
+class Pipeline:
+    """
+    Memoizing runner for STAGES. Frames are kept in memory for the life of
+    the object and on disk across runs.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, raw_path=RAW_DATA, verbose=True):
+        self.cache_dir = cache_dir
+        self.raw_path = raw_path
+        self.verbose = verbose
+        self._frames = {}
+        self._keys = {}
+
+    def key(self, stage, params=None):
+        """
+        Cache key of a stage: hash of its parent's key, parameters and code.
+        """
+        params = params or {}
+        memo = (stage, json.dumps(params, sort_keys=True, default=str))
+        if memo in self._keys:
+            return self._keys[memo]
+        parent, func, modules = STAGES[stage]
+        parent_key = self.key(parent) if parent else _file_hash(self.raw_path)
+        payload = '|'.join([stage, parent_key, memo[1], _source_hash(func, modules)])
+        self._keys[memo] = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        return self._keys[memo]
+
+    def _cache_path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+    def scaler_path(self, stage, **params):
+        """
+        JSON file of the FeatureScaler a scaling stage fitted (None for other stages).
+        """
+        if STAGES[stage][1] is not scaling:
+            return None
+        return os.path.join(self.cache_dir, f"{stage}-{self.key(stage, params)}.scaler.json")
+
+    def run(self, stage, **params):
+        """
+        Output frame of a stage (parents run with their default parameters).
+        """
+        if stage not in STAGES:
+            raise KeyError(f"Unknown stage: {stage} (available: {', '.join(STAGES)})")
+        key = self.key(stage, params)
+        if key in self._frames:
+            return self._frames[key].copy()
+
+        path = self._cache_path(stage, key)
+        scaler_path = self.scaler_path(stage, **params)
+        if os.path.exists(path) and (scaler_path is None or os.path.exists(scaler_path)):
+            if self.verbose:
+                print(f"   [pipeline] {stage}: cached ({path})")
+            df = pd.read_pickle(path)
+        else:
+            parent, func, _ = STAGES[stage]
+            if self.verbose:
+                print(f"   [pipeline] {stage}: computing")
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if scaler_path:
+                df = func(self.run(parent), scaler_path=scaler_path, **params)
+            else:
+                df = func(self.run(parent), **params) if parent else func(self.raw_path, **params)
+            df = df.reset_index(drop=True)
+            df.to_pickle(path)
+
+        self._frames[key] = df
+        return df.copy()
+
+    def ml_dataset(self, scenario, features=None, dropna=False):
+        """
+        Features and labels for a scenario's frame, via the feature store.
+        """
+        df_ml, _ = feature_store.load_or_compute(self.run(scenario), scenario, features)
+        return df_ml.dropna() if dropna else df_ml
+
+    def clear(self):
+        """
+        Delete the on-disk cache.
+        """
+        self._frames.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(('.pkl', '.scaler.json')):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+def get_pipeline():
+    """
+    Process-wide Pipeline, so scripts share one in-memory cache.
+    """
+    global _PIPELINE
+    if _PIPELINE is None:
+        _PIPELINE = Pipeline()
+    return _PIPELINE
+
+_PIPELINE = None
+
+def main():
+    print("=" * 70)
+    print("PIPELINE STAGES")
+    print("=" * 70)
+    pipeline = get_pipeline()
+    for scenario in SCENARIOS:
+        df_ml = pipeline.ml_dataset(scenario)
+        print(f"   {scenario}: {len(df_ml):,} rows, key {pipeline.key(scenario)}")
+
+if __name__ == '__main__':
+    main()
@@ -8,18 +8,26 @@ data characteristics (temporal, macro, statistical).
 
 import pandas as pd
 import numpy as np
+from profile_columns import profile_columns
 
-def prepare_data():
+def prepare_data(df=None, save=True):
     """
     Prepare integrated data by handling null values with appropriate methods.
+    Args:
+        df: Integrated raw data (default: read data/integrated_raw_data.csv)
+        save: Write integrated_prepared_data.csv and null_handling_log.csv
     """
     print("=" * 70)
     print("DATA PREPARATION - NULL VALUE HANDLING")
     print("=" * 70)
     
     # Load data
-    print("\n1. Loading integrated_raw_data.csv...")
-    df = pd.read_csv('data/integrated_raw_data.csv')
+    if df is None:
+        print("\n1. Loading integrated_raw_data.csv...")
+        df = pd.read_csv('data/integrated_raw_data.csv')
+    else:
+        print("\n1. Using provided integrated data...")
+        df = df.copy()
     df['Date'] = pd.to_datetime(df['Date'])
     print(f"   Loaded {len(df):,} rows, {len(df.columns)} columns")
     
@@ -28,7 +36,7 @@ def prepare_data():
     
     # ========== IDENTIFY NULL COLUMNS ==========
     print("\n2. Identifying columns with null values...")
-    null_counts = df.isnull().sum()
+    null_counts = profile_columns(df)['nulls']
     null_columns = null_counts[null_counts > 0].sort_values(ascending=False)
     
     if len(null_columns) == 0:
@@ -87,10 +95,13 @@ def prepare_data():
             print(f"     - {col}: {count} nulls")
     
     # ========== SAVE PREPARED DATA ==========
-    print("\n5. Saving prepared data...")
-    output_file = 'data/integrated_prepared_data.csv'
-    df.to_csv(output_file, index=False)
-    print(f"   ✓ Saved to: {output_file}")
+    if save:
+        print("\n5. Saving prepared data...")
+        output_file = 'data/integrated_prepared_data.csv'
+        df.to_csv(output_file, index=False)
+        print(f"   ✓ Saved to: {output_file}")
+    else:
+        print("\n5. Prepared data (not saved)...")
     print(f"   Rows: {len(df):,}")
     print(f"   Columns: {len(df.columns)}")
     
@@ -101,8 +112,9 @@ def prepare_data():
     print("\n" + summary_df.to_string(index=False))
     
     # Save handling log
-    summary_df.to_csv('data/null_handling_log.csv', index=False)
-    print("\n   ✓ Handling log saved to: data/null_handling_log.csv")
+    if save:
+        summary_df.to_csv('data/null_handling_log.csv', index=False)
+        print("\n   ✓ Handling log saved to: data/null_handling_log.csv")
     
     return df
 
@@ -0,0 +1,104 @@
+"""
+Column Profiler
+
+Computes the per-column statistics used across the pipeline (null counts,
+mean, std, min/max, quartiles, skew, 3-std outlier counts) in one vectorized
+pass over the frame, and caches the result by dataset fingerprint (or a
+caller-supplied key) so that analysis, outlier detection, scaling and
+reports share it instead of rescanning the same frame column by column.
+Consumers that need a single column profile just that column.
+"""
+
+import hashlib
+import pandas as pd
+import numpy as np
+
+# fingerprint -> profile DataFrame
+_PROFILE_CACHE = {}
+_MAX_CACHE_ENTRIES = 32
+
+def dataset_fingerprint(df):
+    """
+    Content hash of a DataFrame (values, index and column names).
+    """
+    h = hashlib.sha1()
+    h.update(str(list(df.columns)).encode('utf-8'))
+    h.update(str(df.shape).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def compute_profile(df, outlier_threshold=3):
+    """
+    Profile every column of df in one pass over its numeric matrix.
+    Non-numeric columns only get count/nulls.
+    Returns a DataFrame indexed by column name.
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+
+    profile = pd.DataFrame(index=pd.Index(df.columns, name='column'))
+    profile['nulls'] = df.isnull().sum()
+    profile['count'] = len(df) - profile['nulls']
+    profile['null_pct'] = profile['nulls'] / len(df) * 100 if len(df) else 0.0
+
+    stats = ['mean', 'std', 'min', 'q25', 'median', 'q75', 'max', 'skew',
+             'outlier_count', 'outlier_pct']
+    for stat in stats:
+        profile[stat] = np.nan
+
+    if not numeric_cols or len(df) == 0:
+        return profile
+
+    X = df[numeric_cols].to_numpy(dtype=float)
+    valid = ~np.isnan(X)
+    n = valid.sum(axis=0).astype(float)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, X, 0.0).sum(axis=0) / n
+        centered = np.where(valid, X - mean, 0.0)
+        m2 = (centered ** 2).sum(axis=0)
+        m3 = (centered ** 3).sum(axis=0)
+        std = np.sqrt(m2 / (n - 1))
+
+        # Bias-corrected sample skewness (same definition as pandas .skew())
+        biased_m2 = m2 / n
+        biased_m3 = m3 / n
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * biased_m3 / biased_m2 ** 1.5
+        skew = np.where((n < 3) | (biased_m2 == 0), np.nan, skew)
+        std = np.where(n < 2, np.nan, std)
+
+        q25, median, q75 = np.nanquantile(X, [0.25, 0.5, 0.75], axis=0)
+        col_min = np.nanmin(X, axis=0)
+        col_max = np.nanmax(X, axis=0)
+
+        lower = mean - outlier_threshold * std
+        upper = mean + outlier_threshold * std
+        outlier_count = ((X < lower) | (X > upper)).sum(axis=0)
+        outlier_pct = outlier_count / n * 100
+
+    values = {
+        'mean': mean, 'std': std, 'min': col_min, 'q25': q25, 'median': median,
+        'q75': q75, 'max': col_max, 'skew': skew,
+        'outlier_count': outlier_count, 'outlier_pct': outlier_pct
+    }
+    for stat, arr in values.items():
+        profile.loc[numeric_cols, stat] = arr
+    profile['iqr'] = profile['q75'] - profile['q25']
+
+    return profile
+
+def profile_columns(df, outlier_threshold=3, key=None):
+    """
+    Cached column profile of df. The cache key is `key` when the caller
+    already has an identity for the data (a pipeline stage key, a store
+    fingerprint), otherwise the dataset fingerprint, which hashes the
+    whole frame.
+    """
+    key = (key if key is not None else dataset_fingerprint(df), outlier_threshold)
+    if key not in _PROFILE_CACHE:
+        if len(_PROFILE_CACHE) >= _MAX_CACHE_ENTRIES:
+            _PROFILE_CACHE.pop(next(iter(_PROFILE_CACHE)))
+        _PROFILE_CACHE[key] = compute_profile(df, outlier_threshold)
+    return _PROFILE_CACHE[key].copy()
+
+def clear_profile_cache():
+    _PROFILE_CACHE.clear()
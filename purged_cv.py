@@ -0,0 +1,200 @@
+"""
+Purged Cross-Validation for the (stock, Date) Panel
+
+The labels look LABEL_HORIZON (21) trading days ahead, so a training row
+dated up to 21 days before a test date has a label window that overlaps the
+test period, and a test row's label window overlaps the training rows in the
+21 days after it. Plain K-fold or an unpurged date cutoff leaks those labels.
+
+Test sets here are contiguous blocks of trading dates (all stocks on a date
+stay together). Training rows are purged when their date t has a test date
+within [t - horizon - embargo, t + horizon]: the horizon removes overlapping
+label windows on both sides, the embargo drops a further `embargo` dates
+after each test block.
+
+    PurgedKFold(n_splits=5)                        # K contiguous test blocks
+    CombinatorialPurgedKFold(n_groups=6, n_test_groups=2)   # every 2-of-6 block choice
+
+Both are scikit-learn splitters (cv=... in cross_val_score, GridSearchCV).
+Rows are matched to dates through `groups` (the Date column) or through the
+`dates` given at construction, which works where groups cannot be passed
+(e.g. the cv of a StackingClassifier). Folds are computed for all dates at
+once as (folds x dates) masks from cumulative counts, so thousands of
+combinatorial folds cost a few array operations.
+
+H2O cannot drop rows per fold, so h2o_fold_column assigns the blocks to a
+fold column and drops the rows near block boundaries once, and
+purged_train_test_split gives the purged holdout used by run_automl.
+"""
+
+from itertools import combinations
+import numpy as np
+from sklearn.model_selection import BaseCrossValidator
+
+import rolling_kernels
+from create_features_and_labels import LABEL_HORIZON
+
+# Folds per chunk when building (folds x dates) masks
+CHUNK_FOLDS = 256
+
+def date_groups(n_dates, n_groups):
+    """
+    Contiguous block number (0..n_groups-1) of each date position.
+    """
+    if n_groups > n_dates:
+        raise ValueError(f"Cannot split {n_dates} dates into {n_groups} groups")
+    return np.arange(n_dates) * n_groups // n_dates
+
+def purge(test, horizon=LABEL_HORIZON, embargo=0):
+    """
+    Training date masks for (folds x dates) test masks: every date without a
+    test date in [t - horizon - embargo, t + horizon] (test dates included).
+    """
+    n_folds, n_dates = test.shape
+    counts = np.zeros((n_folds, n_dates + 1), dtype=np.int32)
+    np.cumsum(test, axis=1, out=counts[:, 1:])
+    t = np.arange(n_dates)
+    lo = np.clip(t - horizon - embargo, 0, n_dates)
+    hi = np.clip(t + horizon + 1, 0, n_dates)
+    return counts[:, hi] == counts[:, lo]
+
+class _PurgedSplitter(BaseCrossValidator):
+    """
+    Shared split logic; subclasses define the (folds x groups) test choice.
+    """
+
+    def _test_groups(self):
+        raise NotImplementedError
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return len(self._test_groups())
+
+    def _date_index(self, X, groups):
+        dates = groups if groups is not None else self.dates
+        if dates is None:
+            raise ValueError("Pass the row dates as groups= or dates= to a purged splitter")
+        if X is not None and len(dates) != len(X):
+            raise ValueError(f"Got {len(dates)} dates for {len(X)} rows")
+        return rolling_kernels.DateIndex(dates)
+
+    def date_masks(self, n_dates):
+        """
+        Yield (train, test) boolean (folds x dates) masks, CHUNK_FOLDS folds at a time.
+        """
+        groups = date_groups(n_dates, self.n_groups)
+        choice = self._test_groups()
+        for start in range(0, len(choice), CHUNK_FOLDS):
+            test = choice[start:start + CHUNK_FOLDS][:, groups]
+            yield purge(test, self.horizon, self.embargo), test
+
+    def split(self, X=None, y=None, groups=None):
+        """
+        Yield (train row indices, test row indices) of each fold.
+        """
+        index = self._date_index(X, groups)
+        for train, test in self.date_masks(index.n_dates):
+            for fold in range(len(test)):
+                yield np.flatnonzero(train[fold][index.codes]), np.flatnonzero(test[fold][index.codes])
+
+class PurgedKFold(_PurgedSplitter):
+    """
+    K folds, each testing one contiguous block of dates, with purging and
+    embargo around the block.
+    """
+
+    def __init__(self, n_splits=5, horizon=LABEL_HORIZON, embargo=0, dates=None):
+        self.n_splits = n_splits
+        self.horizon = horizon
+        self.embargo = embargo
+        self.dates = dates
+
+    @property
+    def n_groups(self):
+        return self.n_splits
+
+    def _test_groups(self):
+        return np.eye(self.n_splits, dtype=bool)
+
+class CombinatorialPurgedKFold(_PurgedSplitter):
+    """
+    One fold per choice of n_test_groups out of n_groups date blocks
+    (C(n_groups, n_test_groups) folds), with purging and embargo around
+    every test block.
+    """
+
+    def __init__(self, n_groups=6, n_test_groups=2, horizon=LABEL_HORIZON, embargo=0, dates=None):
+        self.n_groups = n_groups
+        self.n_test_groups = n_test_groups
+        self.horizon = horizon
+        self.embargo = embargo
+        self.dates = dates
+
+    def _test_groups(self):
+        combos = np.array(list(combinations(range(self.n_groups), self.n_test_groups)))
+        choice = np.zeros((len(combos), self.n_groups), dtype=bool)
+        np.put_along_axis(choice, combos, True, axis=1)
+        return choice
+
+# ========== H2O ==========
+
+def purged_train_test_split(dates, test_size=0.2, horizon=LABEL_HORIZON):
+    """
+    (train row indices, test row indices) for a chronological holdout: the
+    last test_size of the dates are tested, and training stops `horizon`
+    dates before them.
+    """
+    index = rolling_kernels.DateIndex(dates)
+    split = int(index.n_dates * (1 - test_size))
+    train = np.flatnonzero(index.codes < split - horizon)
+    test = np.flatnonzero(index.codes >= split)
+    return train, test
+
+def h2o_fold_column(dates, n_splits=5, horizon=LABEL_HORIZON, embargo=0):
+    """
+    (fold number per row, rows to keep) for H2O's fold_column. Each fold is a
+    contiguous block of dates; rows within horizon dates before or
+    horizon + embargo dates after a block boundary are dropped (keep=False),
+    which purges every fold's training rows against its test block.
+    """
+    index = rolling_kernels.DateIndex(dates)
+    groups = date_groups(index.n_dates, n_splits)
+    boundaries = np.flatnonzero(np.diff(groups)) + 1
+    near = np.zeros(index.n_dates + 1, dtype=int)
+    np.add.at(near, np.clip(boundaries - horizon, 0, index.n_dates), 1)
+    np.add.at(near, np.clip(boundaries + horizon + embargo, 0, index.n_dates), -1)
+    keep_dates = np.cumsum(near)[:-1] == 0
+    return groups[index.codes], keep_dates[index.codes]
+
+def main():
+    import contextlib
+    import io
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import KFold, cross_val_score
+    import pipeline
+    from create_features_and_labels import ID_COLUMNS, LABEL_COLUMNS
+
+    print("=" * 70)
+    print("PURGED VS UNPURGED CROSS-VALIDATION")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_ml = pipeline.get_pipeline().ml_dataset('all_combined', dropna=True)
+    df_ml = df_ml.sort_values(['Date', 'stock']).reset_index(drop=True)
+    X = df_ml.drop(columns=ID_COLUMNS + LABEL_COLUMNS)
+    y = df_ml['y']
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+
+    splitters = {
+        'KFold (contiguous, no purge)': (KFold(5), None),
+        'PurgedKFold (21-day purge)': (PurgedKFold(5), df_ml['Date']),
+        'PurgedKFold (+ 5-day embargo)': (PurgedKFold(5, embargo=5), df_ml['Date']),
+    }
+    for name, (cv, groups) in splitters.items():
+        scores = cross_val_score(model, X, y, cv=cv, groups=groups, scoring='roc_auc')
+        print(f"   {name:<32} AUC {scores.mean():.4f} +/- {scores.std():.4f}")
+
+    cpcv = CombinatorialPurgedKFold(n_groups=16, n_test_groups=4, dates=df_ml['Date'])
+    print(f"\n   CombinatorialPurgedKFold(16, 4): {cpcv.get_n_splits():,} folds")
+
+if __name__ == '__main__':
+    main()
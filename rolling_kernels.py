@@ -0,0 +1,260 @@
+"""
+Rolling-Window Kernels
+
+Array-backed replacements for the groupby('stock')...rolling() chains in
+feature engineering. A StockPanel pivots a long (stock, Date) frame into a
+contiguous (rows x stocks) array once; rolling means, stds, returns and
+z-scores are then computed for every stock at the same time with
+cumulative-sum algorithms in NumPy, and scattered back to the long layout.
+
+DateIndex does the same for date-level series (SP500, macro): values are
+computed on the unique dates and broadcast to rows by position.
+
+The time axis of the panel is each stock's own row sequence, which is what
+groupby().rolling(window) counts. When all stocks share the same trading
+calendar it is exactly the dates x stocks matrix; when rows were removed for
+some stocks (outlier removal) windows still match the groupby semantics.
+"""
+
+import pandas as pd
+import numpy as np
+from scipy.signal import lfilter
+
+class StockPanel:
+    """
+    Row positions of a long frame inside a (rows x stocks) panel.
+    The frame must be sorted by stock, then Date.
+    """
+
+    def __init__(self, stocks):
+        codes, uniques = pd.factorize(pd.Series(stocks).to_numpy(), sort=False)
+        self.codes = codes
+        self.stocks = list(uniques)
+        self.positions = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        self.lengths = np.bincount(codes, minlength=len(uniques))
+        self.shape = (int(self.lengths.max()) if len(codes) else 0, len(uniques))
+
+    def pivot(self, values):
+        """
+        Long values -> (rows x stocks) float array, NaN-padded past each stock's end.
+        """
+        panel = np.full(self.shape, np.nan)
+        panel[self.positions, self.codes] = np.asarray(values, dtype=float)
+        return panel
+
+    def unpivot(self, panel):
+        """
+        (rows x stocks) array -> long values in the original row order.
+        """
+        return panel[self.positions, self.codes]
+
+class DateIndex:
+    """
+    Row -> unique-date position index of a long frame. Date-level series are
+    computed once per date and broadcast back to rows by position.
+    """
+
+    def __init__(self, dates):
+        codes, uniques = pd.factorize(pd.Series(dates).to_numpy(), sort=True)
+        self.codes = codes
+        self.dates = uniques
+        self.n_dates = len(uniques)
+
+    def first(self, values):
+        """
+        First non-null value of each date (in row order), like groupby('Date').first().
+        """
+        values = np.asarray(values, dtype=float)
+        valid = np.flatnonzero(~np.isnan(values))
+        # Smallest valid row position per date (no sort needed)
+        first = np.full(self.n_dates, len(values))
+        np.minimum.at(first, self.codes[valid], valid)
+        present = first < len(values)
+        out = np.full(self.n_dates, np.nan)
+        out[present] = values[first[present]]
+        return out
+
+    def broadcast(self, series):
+        """
+        Per-date values (n_dates,) or (n_dates, k) -> long values.
+        """
+        return np.asarray(series)[self.codes]
+
+def _window_sums(values, window):
+    """
+    Rolling sums over axis 0 from a cumulative sum (values without NaN).
+    """
+    return _window_diff(np.cumsum(values, axis=0), window)
+
+def _window_diff(cum, window):
+    sums = cum.copy()
+    sums[window:] -= cum[:-window]
+    return sums
+
+def rolling_count(panel, window):
+    return _window_sums((~np.isnan(panel)).astype(float), window)
+
+def rolling_moments(panel, window, ddof=1):
+    """
+    Rolling (count, mean, variance) over axis 0 from one set of cumulative
+    sums, NaN-aware.
+    """
+    valid = ~np.isnan(panel)
+    # Center each column first so the cumulative sums stay small
+    offset = _column_offset(panel)
+    centered = np.where(valid, panel - offset, 0.0)
+    counts = _window_sums(valid.astype(float), window)
+    sums = _window_sums(centered, window)
+    sq_sums = _window_sums(centered ** 2, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+        var = np.maximum((sq_sums - sums * mean) / (counts - ddof), 0.0)
+    return counts, mean + offset, var
+
+def rolling_mean(panel, window, min_periods=1):
+    """
+    Rolling mean over axis 0, NaN-aware (same as pandas rolling().mean()).
+    """
+    valid = ~np.isnan(panel)
+    offset = _column_offset(panel)
+    sums = _window_sums(np.where(valid, panel - offset, 0.0), window)
+    counts = _window_sums(valid.astype(float), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts + offset
+    return np.where(counts >= max(min_periods, 1), mean, np.nan)
+
+def rolling_std(panel, window, min_periods=1, ddof=1):
+    """
+    Rolling sample std over axis 0, NaN-aware (same as pandas rolling().std()).
+    """
+    counts, _, var = rolling_moments(panel, window, ddof)
+    return np.where((counts >= max(min_periods, 1)) & (counts > ddof), np.sqrt(var), np.nan)
+
+def rolling_zscore(panel, window, min_periods=1, eps=1e-8):
+    """
+    (x - rolling mean) / (rolling std + eps), sharing one set of window sums.
+    """
+    counts, mean, var = rolling_moments(panel, window)
+    enough = counts >= max(min_periods, 1)
+    mean = np.where(enough, mean, np.nan)
+    std = np.where(enough & (counts > 1), np.sqrt(var), np.nan)
+    return (panel - mean) / (std + eps)
+
+def rolling_cov(x, y, windows, min_periods=None, ddof=1):
+    """
+    Rolling covariance and variances of x and y over axis 0 for several
+    windows, from one set of cumulative sums of x, y, x*y, x^2 and y^2
+    (pairwise-complete rows only). x and y broadcast against each other, so
+    y can stack several benchmarks on a trailing axis.
+    Returns {window: (counts, cov, var_x, var_y)}; NaN below min_periods
+    (default: the full window).
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    valid = ~(np.isnan(x) | np.isnan(y))
+    # Center on each column's mean first so the cumulative sums stay small
+    xc = np.where(valid, x - _column_offset(np.where(valid, x, np.nan)), 0.0)
+    yc = np.where(valid, y - _column_offset(np.where(valid, y, np.nan)), 0.0)
+    cums = [np.cumsum(v, axis=0) for v in (valid.astype(float), xc, yc, xc * yc, xc ** 2, yc ** 2)]
+
+    results = {}
+    for window in windows:
+        n, sx, sy, sxy, sxx, syy = [_window_diff(cum, window) for cum in cums]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (sxy - sx * sy / n) / (n - ddof)
+            var_x = np.maximum((sxx - sx * sx / n) / (n - ddof), 0.0)
+            var_y = np.maximum((syy - sy * sy / n) / (n - ddof), 0.0)
+        enough = (n >= (window if min_periods is None else max(min_periods, 1))) & (n > ddof)
+        results[window] = tuple(np.where(enough, v, np.nan) for v in (n, cov, var_x, var_y))
+    return results
+
+def rolling_beta_corr(x, y, windows, min_periods=None):
+    """
+    Rolling beta (cov / var_y) and correlation of x against y for each window.
+    Returns {window: (beta, corr)}.
+    """
+    results = {}
+    for window, (_, cov, var_x, var_y) in rolling_cov(x, y, windows, min_periods).items():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            beta = np.where(var_y > 0, cov / var_y, np.nan)
+            corr = np.where((var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+        results[window] = (beta, np.clip(corr, -1.0, 1.0))
+    return results
+
+def ewm_mean(panel, alpha):
+    """
+    Recursive exponential smoothing over axis 0, all columns at once:
+    s[t] = s[t-1] + alpha * (x[t] - s[t-1]), seeded with each column's first
+    valid value. NaN inputs carry the previous value forward - same as
+    pandas ewm(alpha=alpha, adjust=False, ignore_na=True).mean().
+    """
+    panel = np.asarray(panel, dtype=float)
+    squeeze = panel.ndim == 1
+    if squeeze:
+        panel = panel[:, None]
+    n_rows = len(panel)
+    valid = ~np.isnan(panel)
+    has_valid = valid.any(axis=0)
+    first = np.where(has_valid, valid.argmax(axis=0), n_rows)
+    last = np.where(has_valid, n_rows - 1 - valid[::-1].argmax(axis=0), -1)
+
+    if n_rows == 0 or np.any(valid.sum(axis=0) != np.maximum(last - first + 1, 0)):
+        out = _ewm_mean_loop(panel, alpha)
+    else:
+        # Valid rows are one block per column (leading/trailing NaN only):
+        # run the recursion as an IIR filter, holding the seed value before
+        # the first valid row and the last state after the last one
+        rows = np.arange(n_rows)[:, None]
+        seed = panel[np.minimum(first, n_rows - 1), np.arange(panel.shape[1])]
+        filled = np.where(rows < first, seed, np.where(valid, panel, 0.0))
+        out = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=((1 - alpha) * seed)[None, :])[0]
+        out[rows < first] = np.nan
+        tail = rows > last
+        out = np.where(tail, out[np.maximum(last, 0), np.arange(panel.shape[1])], out)
+        out[:, ~has_valid] = np.nan
+    return out[:, 0] if squeeze else out
+
+def _ewm_mean_loop(panel, alpha):
+    out = np.empty(panel.shape)
+    state = np.full(panel.shape[1:], np.nan)
+    for t in range(len(panel)):
+        x = panel[t]
+        updated = state + alpha * (x - state)
+        state = np.where(np.isnan(state), x, np.where(np.isnan(x), state, updated))
+        out[t] = state
+    return out
+
+def pct_change(panel, periods=1):
+    """
+    Percentage change over `periods` rows along axis 0 (no filling).
+    """
+    out = np.full(panel.shape, np.nan)
+    if periods < len(panel):
+        out[periods:] = panel[periods:] / panel[:-periods] - 1
+    return out
+
+def shift(panel, periods=1):
+    """
+    Shift along axis 0 like pandas shift(): positive periods look back,
+    negative periods look ahead. Vacated rows are NaN.
+    """
+    out = np.full(panel.shape, np.nan)
+    if periods == 0:
+        out[:] = panel
+    elif abs(periods) < len(panel):
+        if periods > 0:
+            out[periods:] = panel[:-periods]
+        else:
+            out[:periods] = panel[-periods:]
+    return out
+
+def diff(panel, periods=1):
+    out = np.full(panel.shape, np.nan)
+    if periods < len(panel):
+        out[periods:] = panel[periods:] - panel[:-periods]
+    return out
+
+def _column_offset(panel):
+    with np.errstate(invalid='ignore'):
+        counts = (~np.isnan(panel)).sum(axis=0)
+        offset = np.where(counts > 0, np.nansum(panel, axis=0) / np.maximum(counts, 1), 0.0)
+    return offset
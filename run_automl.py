@@ -15,10 +15,9 @@ import numpy as np
 import os
 
 # Import our refactored modules
-import prepare_data
-import create_features_and_labels
-import detect_outliers
-import scale_features
+import pipeline
+import purged_cv
+from create_features_and_labels import LABEL_HORIZON
 
 def prepare_best_dataset():
     """
@@ -29,23 +28,9 @@ def prepare_best_dataset():
     print("PREPARING DATA FOR AUTOML")
     print("=" * 70)
     
-    # 1. Smart Imputation
-    print("\n1. Smart Imputation...")
-    df_smart = prepare_data.prepare_data()
-    
-    # 2. Outlier Removal
-    print("\n2. Outlier Removal...")
-    zscore_results, _ = detect_outliers.analyze_outliers(df_smart)
-    df_no_outliers = detect_outliers.remove_outliers(df_smart, zscore_results, method='zscore')
-    print(f"   Removed {len(df_smart) - len(df_no_outliers)} outlier rows")
-    
-    # 3. Scaling
-    print("\n3. Scaling...")
-    df_scaled_raw, _ = scale_features.process_scaling(df_no_outliers)
-    
-    # 4. Feature Engineering
-    print("\n4. Feature Engineering...")
-    df_ml, _ = create_features_and_labels.process_data(df_scaled_raw)
+    # Smart Imputation -> Outlier Removal -> Scaling -> Feature Engineering
+    # (each stage is cached by the pipeline runner)
+    df_ml = pipeline.get_pipeline().ml_dataset('all_combined')
     
     # Drop rows with nulls (just in case any remain after engineering)
     df_ml = df_ml.dropna()
@@ -88,19 +73,25 @@ def main():
     x = [col for col in hf.columns if col not in ignore_cols and col != y]
     
     # TIME SERIES SPLIT: Use a strict DATE cutoff (not row percentage)
-    # This prevents leakage when stocks have different date ranges
-    print("\nCreating strict chronological split...")
+    # This prevents leakage when stocks have different date ranges.
+    # Training stops LABEL_HORIZON dates before the cutoff, since the labels
+    # of the last training rows would otherwise look into the validation period.
+    print("\nCreating purged chronological split...")
     
-    # Find the date that splits 80/20
-    all_dates = sorted(df_ml['Date'].unique())
-    split_date_idx = int(len(all_dates) * 0.8)
-    split_date = all_dates[split_date_idx]
+    # Split in pandas BEFORE converting to H2O
+    train_idx, valid_idx = purged_cv.purged_train_test_split(df_ml['Date'], test_size=0.2)
+    train_df = df_ml.iloc[train_idx].copy()
+    valid_df = df_ml.iloc[valid_idx].copy()
     
-    print(f"  Split date: {split_date.date()}")
+    print(f"  Split date: {valid_df['Date'].min().date()} (training purged {LABEL_HORIZON} trading days before it)")
     
-    # Split in pandas BEFORE converting to H2O
-    train_df = df_ml[df_ml['Date'] < split_date].copy()
-    valid_df = df_ml[df_ml['Date'] >= split_date].copy()
+    # Purged K-fold inside the training period: H2O's fold_column takes
+    # contiguous date blocks; rows near block boundaries are dropped so no
+    # fold trains on labels overlapping its test block
+    folds, keep = purged_cv.h2o_fold_column(train_df['Date'], n_splits=5)
+    train_df['fold'] = folds
+    print(f"  Purged {(~keep).sum()} training rows at fold boundaries")
+    train_df = train_df[keep]
     
     print(f"  Training rows: {len(train_df)} (up to {train_df['Date'].max().date()})")
     print(f"  Validation rows: {len(valid_df)} (from {valid_df['Date'].min().date()} to {valid_df['Date'].max().date()})")
@@ -113,13 +104,13 @@ def main():
     train[y] = train[y].asfactor()
     valid[y] = valid[y].asfactor()
     
-    # Run AutoML with time series split
+    # Run AutoML with purged K-fold CV, ranked on the held-out period
     print("\n" + "=" * 70)
-    print("RUNNING H2O AUTOML (TIME SERIES SPLIT - DATE CUTOFF)")
+    print("RUNNING H2O AUTOML (PURGED K-FOLD + DATE CUTOFF LEADERBOARD)")
     print("=" * 70)
     
-    aml = H2OAutoML(max_models=10, seed=42, max_runtime_secs=600, verbosity='info', nfolds=0)
-    aml.train(x=x, y=y, training_frame=train, validation_frame=valid)
+    aml = H2OAutoML(max_models=10, seed=42, max_runtime_secs=600, verbosity='info')
+    aml.train(x=x, y=y, training_frame=train, leaderboard_frame=valid, fold_column='fold')
     
     # View Leaderboard
     print("\n" + "=" * 70)
@@ -8,6 +8,8 @@ Documents all transformations applied.
 import pandas as pd
 import numpy as np
 import os
+import json
+from profile_columns import profile_columns
 
 # Manual implementation of scalers (no sklearn dependency)
 def standard_scale(series):
@@ -36,6 +38,435 @@ def minmax_scale(series):
         return pd.Series(0, index=series.index)
     return (series - min_val) / (max_val - min_val)
 
+SCALER_METHODS = ['StandardScaler', 'RobustScaler', 'MinMaxScaler']
+
+def fit_scaler_params(values, method):
+    """
+    Compute (center, scale) vectors for a 2-D array holding one method group.
+    Same formulas as standard_scale / robust_scale / minmax_scale, but all
+    columns of the group are reduced at once.
+    """
+    if method == 'StandardScaler':
+        center = np.nanmean(values, axis=0)
+        scale = np.nanstd(values, axis=0, ddof=1)
+        # std == 0: standard_scale leaves the column untouched
+        center = np.where(scale == 0, 0.0, center)
+    elif method == 'RobustScaler':
+        q25, center, q75 = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+        scale = q75 - q25
+    elif method == 'MinMaxScaler':
+        center = np.nanmin(values, axis=0)
+        scale = np.nanmax(values, axis=0) - center
+    else:
+        raise ValueError(f"Unknown scaler method: {method}")
+    scale = np.where((scale == 0) | np.isnan(scale), 1.0, scale)
+    return center, scale
+
+def fit_grouped_scaler_params(df, cols, method, group_by='stock'):
+    """
+    Per-group version of fit_scaler_params: one grouped reduction over all
+    columns of the method group. Returns (groups, center, scale) with
+    center/scale shaped (n_groups, n_cols).
+    """
+    grouped = df.groupby(group_by, sort=True)[cols]
+    if method == 'StandardScaler':
+        center = grouped.mean()
+        scale = grouped.std()
+        groups = center.index
+        center, scale = center.to_numpy(dtype=float), scale.to_numpy(dtype=float)
+        center = np.where(scale == 0, 0.0, center)
+    elif method == 'RobustScaler':
+        q = grouped.quantile([0.25, 0.5, 0.75])
+        q25 = q.xs(0.25, level=-1)
+        groups = q25.index
+        center = q.xs(0.5, level=-1).to_numpy(dtype=float)
+        scale = q.xs(0.75, level=-1).to_numpy(dtype=float) - q25.to_numpy(dtype=float)
+    elif method == 'MinMaxScaler':
+        min_vals = grouped.min()
+        groups = min_vals.index
+        center = min_vals.to_numpy(dtype=float)
+        scale = grouped.max().to_numpy(dtype=float) - center
+    else:
+        raise ValueError(f"Unknown scaler method: {method}")
+    scale = np.where((scale == 0) | np.isnan(scale), 1.0, scale)
+    return list(groups), center, scale
+
+class FeatureScaler:
+    """
+    Fit/transform scaler for the Standard, Robust and MinMax column groups.
+
+    fit() computes the statistics of each method group (optionally on a date
+    range only, e.g. the training period) and keeps them as one center and one
+    scale vector. transform() is then a single (X - center) / scale over all
+    scaled columns, with no statistics recomputed.
+
+    With group_by='stock' the parameters are fitted per stock (rows of the
+    center/scale matrices) and transform gathers each row's parameters by
+    stock code, so the cost stays linear in rows for any number of tickers.
+    """
+
+    def __init__(self, scaler_groups=None, group_by=None):
+        # method -> list of columns ('No scaling' columns are ignored)
+        self.scaler_groups = {
+            method: list(cols) for method, cols in (scaler_groups or {}).items()
+            if method in SCALER_METHODS and cols
+        }
+        self.group_by = group_by
+        self.groups = None
+        self.columns = []
+        self.methods = []
+        self.center = None
+        self.scale = None
+        self.fit_start = None
+        self.fit_end = None
+        self.n_rows_fit = 0
+
+    def fit(self, df, start_date=None, end_date=None):
+        """
+        Fit on rows with start_date <= Date < end_date (both optional).
+        """
+        fit_df = select_date_range(df, start_date, end_date)
+        if len(fit_df) == 0:
+            raise ValueError("No rows in the selected fit range")
+        
+        columns, methods, centers, scales = [], [], [], []
+        groups = sorted(fit_df[self.group_by].dropna().unique()) if self.group_by else None
+        for method in SCALER_METHODS:
+            cols = self.scaler_groups.get(method, [])
+            if not cols:
+                continue
+            if self.group_by:
+                groups, center, scale = fit_grouped_scaler_params(fit_df, cols, method, self.group_by)
+            else:
+                values = fit_df[cols].to_numpy(dtype=float)
+                center, scale = fit_scaler_params(values, method)
+            columns.extend(cols)
+            methods.extend([method] * len(cols))
+            centers.append(center)
+            scales.append(scale)
+        
+        self.groups = groups
+        self.columns = columns
+        self.methods = methods
+        axis = 1 if self.group_by else 0
+        empty = np.empty((len(groups), 0)) if self.group_by else np.array([])
+        self.center = np.concatenate(centers, axis=axis) if centers else empty
+        self.scale = np.concatenate(scales, axis=axis) if scales else empty
+        self.fit_start = str(pd.Timestamp(start_date).date()) if start_date is not None else None
+        self.fit_end = str(pd.Timestamp(end_date).date()) if end_date is not None else None
+        self.n_rows_fit = len(fit_df)
+        return self
+
+    def transform(self, df):
+        """
+        Apply the fitted parameters to df (returns a scaled copy).
+        """
+        if self.center is None:
+            raise ValueError("FeatureScaler is not fitted")
+        df_scaled = df.copy()
+        if not self.columns:
+            return df_scaled
+        values = df[self.columns].to_numpy(dtype=float)
+        if self.group_by:
+            codes = pd.Categorical(df[self.group_by], categories=self.groups).codes
+            if (codes < 0).any():
+                unknown = sorted(df.loc[codes < 0, self.group_by].unique())
+                raise ValueError(f"No fitted scaler parameters for {self.group_by}: {unknown}")
+            df_scaled[self.columns] = (values - self.center[codes]) / self.scale[codes]
+        else:
+            df_scaled[self.columns] = (values - self.center) / self.scale
+        return df_scaled
+
+    def fit_transform(self, df, start_date=None, end_date=None):
+        return self.fit(df, start_date, end_date).transform(df)
+
+    def get_params(self):
+        """
+        Fitted parameters as a DataFrame (one row per column, or per
+        group and column when fitted per stock).
+        """
+        if self.group_by:
+            n_groups = len(self.groups)
+            return pd.DataFrame({
+                self.group_by: np.repeat(self.groups, len(self.columns)),
+                'column': self.columns * n_groups,
+                'method': self.methods * n_groups,
+                'center': self.center.ravel(),
+                'scale': self.scale.ravel()
+            })
+        return pd.DataFrame({
+            'column': self.columns,
+            'method': self.methods,
+            'center': self.center,
+            'scale': self.scale
+        })
+
+    def save(self, path):
+        """
+        Save fitted parameters to a JSON file.
+        """
+        params = {
+            'group_by': self.group_by,
+            'groups': self.groups,
+            'fit_start': self.fit_start,
+            'fit_end': self.fit_end,
+            'n_rows_fit': self.n_rows_fit,
+            'columns': self.columns,
+            'methods': self.methods,
+            'center': self.center.tolist(),
+            'scale': self.scale.tolist()
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(params, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a scaler saved with save().
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        scaler = cls(group_by=params.get('group_by'))
+        scaler.groups = params.get('groups')
+        scaler.columns = params['columns']
+        scaler.methods = params['methods']
+        scaler.center = np.array(params['center'], dtype=float)
+        scaler.scale = np.array(params['scale'], dtype=float)
+        scaler.fit_start = params['fit_start']
+        scaler.fit_end = params['fit_end']
+        scaler.n_rows_fit = params['n_rows_fit']
+        for method in SCALER_METHODS:
+            cols = [c for c, m in zip(scaler.columns, scaler.methods) if m == method]
+            if cols:
+                scaler.scaler_groups[method] = cols
+        return scaler
+
+def select_date_range(df, start_date=None, end_date=None):
+    """
+    Rows with start_date <= Date < end_date (same convention as the
+    Date < split_date training masks in the model scripts).
+    """
+    mask = pd.Series(True, index=df.index)
+    if start_date is not None:
+        mask &= pd.to_datetime(df['Date']) >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= pd.to_datetime(df['Date']) < pd.Timestamp(end_date)
+    return df[mask]
+
+def apply_saved_scaler(df, path='data/scaler_params.json'):
+    """
+    Scale new rows with parameters saved by process_scaling / FeatureScaler.save.
+    """
+    return FeatureScaler.load(path).transform(df)
+
+class OnlineScaler:
+    """
+    Incremental scaler for daily appends.
+
+    partial_fit() folds new rows into running statistics in O(new rows):
+    count/mean/M2 (merged with Chan's parallel update) for StandardScaler,
+    running min/max for MinMaxScaler, and a fixed-size row reservoir as a
+    quantile sketch for RobustScaler.
+
+    New rows are transformed with the reference parameters of the last full
+    rescale (mark_rescaled), so they stay consistent with the already-scaled
+    history. check_drift() compares the running parameters against that
+    reference and tells when a full rescale is required.
+    """
+
+    def __init__(self, scaler_groups=None, sketch_size=10000, seed=42):
+        self.scaler_groups = {
+            method: list(cols) for method, cols in (scaler_groups or {}).items()
+            if method in SCALER_METHODS and cols
+        }
+        self.columns = [c for m in SCALER_METHODS for c in self.scaler_groups.get(m, [])]
+        self.methods = [m for m in SCALER_METHODS for c in self.scaler_groups.get(m, [])]
+        n_cols = len(self.columns)
+        self.sketch_size = sketch_size
+        self.rng = np.random.default_rng(seed)
+        
+        self.n_rows = 0
+        self.count = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+        self.sketch = np.empty((0, n_cols))
+        
+        self.reference = None
+
+    def partial_fit(self, df):
+        """
+        Update running statistics with new rows.
+        """
+        values = df[self.columns].to_numpy(dtype=float)
+        if len(values) == 0:
+            return self
+        
+        # Moments (Chan et al. parallel merge of count/mean/M2)
+        valid = ~np.isnan(values)
+        n_b = valid.sum(axis=0)
+        sum_b = np.where(valid, values, 0.0).sum(axis=0)
+        mean_b = np.divide(sum_b, n_b, out=np.zeros_like(sum_b), where=n_b > 0)
+        m2_b = np.where(valid, (values - mean_b) ** 2, 0.0).sum(axis=0)
+        
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        ratio = np.divide(n_b, n, out=np.zeros_like(n), where=n > 0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.count * ratio
+        self.count = n
+        
+        # Min / max
+        self.min = np.fmin(self.min, np.nanmin(np.where(valid, values, np.inf), axis=0))
+        self.max = np.fmax(self.max, np.nanmax(np.where(valid, values, -np.inf), axis=0))
+        
+        # Quantile sketch (reservoir sampling, Algorithm R, vectorized per batch)
+        free = self.sketch_size - len(self.sketch)
+        if free > 0:
+            self.sketch = np.vstack([self.sketch, values[:free]])
+        rest = values[max(free, 0):]
+        if len(rest):
+            seen = self.n_rows + max(free, 0) + np.arange(len(rest))
+            slots = (self.rng.random(len(rest)) * (seen + 1)).astype(np.int64)
+            keep = slots < self.sketch_size
+            self.sketch[slots[keep]] = rest[keep]
+        
+        self.n_rows += len(values)
+        return self
+
+    def current_params(self):
+        """
+        Running (center, scale) vectors in the same layout as FeatureScaler.
+        """
+        center = np.empty(len(self.columns))
+        scale = np.empty(len(self.columns))
+        methods = np.array(self.methods)
+        
+        std = np.sqrt(np.divide(self.m2, self.count - 1, out=np.full_like(self.m2, np.nan), where=self.count > 1))
+        is_std = methods == 'StandardScaler'
+        center[is_std] = np.where(std[is_std] == 0, 0.0, self.mean[is_std])
+        scale[is_std] = std[is_std]
+        
+        is_robust = methods == 'RobustScaler'
+        if is_robust.any():
+            q25, median, q75 = np.nanquantile(self.sketch[:, is_robust], [0.25, 0.5, 0.75], axis=0)
+            center[is_robust] = median
+            scale[is_robust] = q75 - q25
+        
+        is_minmax = methods == 'MinMaxScaler'
+        center[is_minmax] = self.min[is_minmax]
+        scale[is_minmax] = self.max[is_minmax] - self.min[is_minmax]
+        
+        scale = np.where((scale == 0) | np.isnan(scale), 1.0, scale)
+        return center, scale
+
+    def to_feature_scaler(self, use_reference=True):
+        """
+        Freeze parameters into a FeatureScaler (reference parameters by
+        default, running parameters otherwise).
+        """
+        scaler = FeatureScaler(self.scaler_groups)
+        scaler.columns = list(self.columns)
+        scaler.methods = list(self.methods)
+        if use_reference and self.reference is not None:
+            scaler.center, scaler.scale = self.reference
+        else:
+            scaler.center, scaler.scale = self.current_params()
+        scaler.n_rows_fit = self.n_rows
+        return scaler
+
+    def transform(self, df):
+        return self.to_feature_scaler().transform(df)
+
+    def mark_rescaled(self, scaler=None):
+        """
+        Record the parameters used by the last full rescale: those of the
+        FeatureScaler that scaled the history if given (the running RobustScaler
+        quantiles come from the reservoir sample and can differ), otherwise
+        the current running parameters.
+        """
+        if scaler is None:
+            self.reference = self.current_params()
+            return self
+        if list(scaler.columns) != self.columns:
+            raise ValueError("FeatureScaler columns do not match the online scaler's")
+        self.reference = (np.array(scaler.center, dtype=float), np.array(scaler.scale, dtype=float))
+        return self
+
+    def check_drift(self, tolerance=0.1):
+        """
+        Per-column drift of running parameters vs the reference:
+        center_shift = |center - ref_center| / ref_scale
+        scale_change = |scale / ref_scale - 1|
+        """
+        center, scale = self.current_params()
+        if self.reference is None:
+            ref_center, ref_scale = center, scale
+        else:
+            ref_center, ref_scale = self.reference
+        drift = pd.DataFrame({
+            'column': self.columns,
+            'method': self.methods,
+            'center_shift': np.abs(center - ref_center) / ref_scale,
+            'scale_change': np.abs(scale / ref_scale - 1)
+        })
+        drift['drifted'] = (drift['center_shift'] > tolerance) | (drift['scale_change'] > tolerance)
+        return drift
+
+    def needs_rescale(self, tolerance=0.1):
+        return bool(self.check_drift(tolerance)['drifted'].any())
+
+    def save(self, path):
+        """
+        Save the running state (statistics, sketch, reference) to a .npz file.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        ref_center, ref_scale = self.reference if self.reference is not None else (np.array([]), np.array([]))
+        np.savez(
+            path,
+            columns=np.array(self.columns), methods=np.array(self.methods),
+            sketch_size=self.sketch_size, n_rows=self.n_rows,
+            count=self.count, mean=self.mean, m2=self.m2, min=self.min, max=self.max,
+            sketch=self.sketch, ref_center=ref_center, ref_scale=ref_scale,
+            rng_state=json.dumps(self.rng.bit_generator.state)
+        )
+
+    @classmethod
+    def load(cls, path):
+        state = np.load(path)
+        groups = {}
+        for col, method in zip(state['columns'].tolist(), state['methods'].tolist()):
+            groups.setdefault(method, []).append(col)
+        scaler = cls(groups, sketch_size=int(state['sketch_size']))
+        for key in ['count', 'mean', 'm2', 'min', 'max', 'sketch']:
+            setattr(scaler, key, state[key])
+        scaler.n_rows = int(state['n_rows'])
+        if len(state['ref_center']):
+            scaler.reference = (state['ref_center'], state['ref_scale'])
+        scaler.rng.bit_generator.state = json.loads(str(state['rng_state']))
+        return scaler
+
+def scale_new_rows(df_new, state_path='data/online_scaler.npz', tolerance=0.1):
+    """
+    Daily update: fold df_new into the online scaler state, scale it with the
+    reference parameters and report whether a full rescale is needed.
+    Returns (df_new_scaled, drift).
+    """
+    scaler = OnlineScaler.load(state_path)
+    scaler.partial_fit(df_new)
+    df_scaled = scaler.transform(df_new)
+    drift = scaler.check_drift(tolerance)
+    scaler.save(state_path)
+    
+    drifted = drift[drift['drifted']]
+    if len(drifted):
+        print(f"   ⚠ Scaler drift above {tolerance:.0%} in {len(drifted)} columns - full rescale recommended:")
+        for _, row in drifted.iterrows():
+            print(f"     - {row['column']}: center shift {row['center_shift']:.3f}, scale change {row['scale_change']:.3f}")
+    return df_scaled, drift
+
 def analyze_data_for_scaling(df):
     """
     Analyze data to determine appropriate scaling methods.
@@ -62,20 +493,22 @@ def analyze_data_for_scaling(df):
     print("COLUMN ANALYSIS:")
     print("-" * 70)
     
+    # All column statistics come from one (cached) profiling pass
+    profile = profile_columns(df)
+    
     for col in numeric_cols:
-        col_data = df[col].dropna()
-        if len(col_data) == 0:
+        stats = profile.loc[col]
+        if stats['count'] == 0:
             continue
             
-        mean_val = col_data.mean()
-        std_val = col_data.std()
-        median_val = col_data.median()
-        min_val = col_data.min()
-        max_val = col_data.max()
+        mean_val = stats['mean']
+        std_val = stats['std']
+        median_val = stats['median']
+        min_val = stats['min']
+        max_val = stats['max']
         
         # Check for outliers (values beyond 3 std dev)
-        outliers = len(col_data[(col_data < mean_val - 3*std_val) | (col_data > mean_val + 3*std_val)])
-        outlier_pct = (outliers / len(col_data)) * 100
+        outlier_pct = stats['outlier_pct']
         
         # Determine appropriate scaler
         if col in ['spy_RSI', 'qqq_RSI']:
@@ -107,15 +540,16 @@ def analyze_data_for_scaling(df):
     
     return scaling_analysis, numeric_cols
 
-def apply_scaling(df, scaling_analysis, numeric_cols):
+def apply_scaling(df, scaling_analysis, numeric_cols, fit_start=None, fit_end=None, group_by=None):
     """
     Apply scaling based on analysis.
+    Parameters are fitted on fit_start <= Date < fit_end (whole dataset by
+    default) and applied to all rows. group_by='stock' fits them per stock.
     """
     print("\n" + "=" * 70)
     print("APPLYING SCALING TRANSFORMATIONS")
     print("=" * 70)
     
-    df_scaled = df.copy()
     scaling_log = []
     
     # Group columns by scaler type
@@ -131,110 +565,93 @@ def apply_scaling(df, scaling_analysis, numeric_cols):
             scaler_type = scaling_analysis[col]['scaler']
             scaler_groups[scaler_type].append(col)
     
+    # Fit all method groups at once, then transform in a single matrix operation
+    scaler = FeatureScaler(scaler_groups, group_by=group_by).fit(df, fit_start, fit_end)
+    df_scaled = scaler.transform(df)
+    
+    if group_by:
+        print(f"\nScaler parameters fitted per {group_by} ({len(scaler.groups)} groups)")
+    
+    before = profile_columns(df)
+    after = profile_columns(df_scaled)
+    
+    if fit_start is not None or fit_end is not None:
+        print(f"\nScaler fitted on {scaler.n_rows_fit:,} rows "
+              f"(Date >= {scaler.fit_start or 'start'}, Date < {scaler.fit_end or 'end'})")
+    
     # Apply StandardScaler
-    if scaler_groups['StandardScaler']:
-        print(f"\n1. StandardScaler ({len(scaler_groups['StandardScaler'])} columns)")
+    cols = scaler_groups['StandardScaler']
+    if cols:
+        print(f"\n1. StandardScaler ({len(cols)} columns)")
         print("-" * 70)
         
-        for col in scaler_groups['StandardScaler']:
-            before_stats = {
-                'mean': df[col].mean(),
-                'std': df[col].std(),
-                'min': df[col].min(),
-                'max': df[col].max()
-            }
-            
-            # Apply standard scaling
-            df_scaled[col] = standard_scale(df[col])
-            
-            after_stats = {
-                'mean': df_scaled[col].mean(),
-                'std': df_scaled[col].std(),
-                'min': df_scaled[col].min(),
-                'max': df_scaled[col].max()
-            }
-            
+        before_mean, before_std = before['mean'], before['std']
+        after_mean, after_std = after['mean'], after['std']
+        
+        for col in cols:
             scaling_log.append({
                 'column': col,
                 'method': 'StandardScaler',
-                'before_mean': before_stats['mean'],
-                'before_std': before_stats['std'],
-                'after_mean': after_stats['mean'],
-                'after_std': after_stats['std'],
+                'before_mean': before_mean[col],
+                'before_std': before_std[col],
+                'after_mean': after_mean[col],
+                'after_std': after_std[col],
                 'reason': scaling_analysis[col]['reason']
             })
             
             print(f"   {col}:")
-            print(f"     Before: mean={before_stats['mean']:.4f}, std={before_stats['std']:.4f}")
-            print(f"     After: mean~{after_stats['mean']:.4f}, std~{after_stats['std']:.4f}")
+            print(f"     Before: mean={before_mean[col]:.4f}, std={before_std[col]:.4f}")
+            print(f"     After: mean~{after_mean[col]:.4f}, std~{after_std[col]:.4f}")
     
     # Apply RobustScaler
-    if scaler_groups['RobustScaler']:
-        print(f"\n2. RobustScaler ({len(scaler_groups['RobustScaler'])} columns)")
+    cols = scaler_groups['RobustScaler']
+    if cols:
+        print(f"\n2. RobustScaler ({len(cols)} columns)")
         print("-" * 70)
         
-        for col in scaler_groups['RobustScaler']:
-            before_stats = {
-                'median': df[col].median(),
-                'q25': df[col].quantile(0.25),
-                'q75': df[col].quantile(0.75),
-                'iqr': df[col].quantile(0.75) - df[col].quantile(0.25)
-            }
-            
-            df_scaled[col] = robust_scale(df[col])
-            
-            after_stats = {
-                'median': df_scaled[col].median(),
-                'mean': df_scaled[col].mean(),
-                'std': df_scaled[col].std()
-            }
-            
+        before_median, before_iqr = before['median'], before['iqr']
+        after_median = after['median']
+        after_mean, after_std = after['mean'], after['std']
+        
+        for col in cols:
             scaling_log.append({
                 'column': col,
                 'method': 'RobustScaler',
-                'before_median': before_stats['median'],
-                'before_iqr': before_stats['iqr'],
-                'after_median': after_stats['median'],
-                'after_mean': after_stats['mean'],
-                'after_std': after_stats['std'],
+                'before_median': before_median[col],
+                'before_iqr': before_iqr[col],
+                'after_median': after_median[col],
+                'after_mean': after_mean[col],
+                'after_std': after_std[col],
                 'reason': scaling_analysis[col]['reason']
             })
             
             print(f"   {col}:")
-            print(f"     Before: median={before_stats['median']:.4f}, IQR={before_stats['iqr']:.4f}")
-            print(f"     After: median~{after_stats['median']:.4f}, mean~{after_stats['mean']:.4f}")
+            print(f"     Before: median={before_median[col]:.4f}, IQR={before_iqr[col]:.4f}")
+            print(f"     After: median~{after_median[col]:.4f}, mean~{after_mean[col]:.4f}")
     
     # Apply MinMaxScaler (if needed)
-    if scaler_groups['MinMaxScaler']:
-        print(f"\n3. MinMaxScaler ({len(scaler_groups['MinMaxScaler'])} columns)")
+    cols = scaler_groups['MinMaxScaler']
+    if cols:
+        print(f"\n3. MinMaxScaler ({len(cols)} columns)")
         print("-" * 70)
         
-        for col in scaler_groups['MinMaxScaler']:
-            before_stats = {
-                'min': df[col].min(),
-                'max': df[col].max()
-            }
-            
-            df_scaled[col] = minmax_scale(df[col])
-            
-            after_stats = {
-                'min': df_scaled[col].min(),
-                'max': df_scaled[col].max()
-            }
-            
+        before_min, before_max = before['min'], before['max']
+        after_min, after_max = after['min'], after['max']
+        
+        for col in cols:
             scaling_log.append({
                 'column': col,
                 'method': 'MinMaxScaler',
-                'before_min': before_stats['min'],
-                'before_max': before_stats['max'],
-                'after_min': after_stats['min'],
-                'after_max': after_stats['max'],
+                'before_min': before_min[col],
+                'before_max': before_max[col],
+                'after_min': after_min[col],
+                'after_max': after_max[col],
                 'reason': scaling_analysis[col]['reason']
             })
             
             print(f"   {col}:")
-            print(f"     Before: min={before_stats['min']:.4f}, max={before_stats['max']:.4f}")
-            print(f"     After: min~{after_stats['min']:.4f}, max~{after_stats['max']:.4f}")
+            print(f"     Before: min={before_min[col]:.4f}, max={before_max[col]:.4f}")
+            print(f"     After: min~{after_min[col]:.4f}, max~{after_max[col]:.4f}")
     
     # Columns not scaled
     if scaler_groups['No scaling']:
@@ -248,9 +665,9 @@ def apply_scaling(df, scaling_analysis, numeric_cols):
                 'reason': scaling_analysis[col]['reason']
             })
     
-    return df_scaled, scaling_log
+    return df_scaled, scaling_log, scaler
 
-def create_scaling_report(df_original, df_scaled, scaling_log):
+def create_scaling_report(df_original, df_scaled, scaling_log, fit_range=None):
     """
     Create a comprehensive report of scaling transformations.
     """
@@ -386,12 +803,18 @@ def create_scaling_report(df_original, df_scaled, scaling_log):
     report.append("IMPORTANT NOTES")
     report.append("=" * 70)
     report.append("")
-    report.append("1. Scaling is applied to entire dataset (train + test)")
-    report.append("   - In production: Fit scaler on training data only")
-    report.append("   - Transform both train and test with fitted scaler")
+    if fit_range is None:
+        report.append("1. Scaling is fitted on entire dataset (train + test)")
+        report.append("   - In production: Fit scaler on training data only")
+        report.append("     (process_scaling(df, fit_end=split_date))")
+    else:
+        report.append(f"1. Scaling is fitted on {fit_range[0] or 'start'} <= Date < {fit_range[1] or 'end'} only")
+    report.append("   - Fitted parameters are saved to data/scaler_params.json")
+    report.append("   - New rows are transformed with apply_saved_scaler (no refitting)")
     report.append("")
     report.append("2. Grouped scaling by stock:")
-    report.append("   - Not applied here, but consider for production")
+    report.append("   - Available with process_scaling(df, group_by='stock')")
+    report.append("   - Parameters are fitted and stored per stock")
     report.append("   - Prevents one stock's distribution from affecting another")
     report.append("")
     report.append("3. Scaling is essential for:")
@@ -425,22 +848,42 @@ def main():
     df['Date'] = pd.to_datetime(df['Date'])
     print(f"   Loaded {len(df):,} rows, {len(df.columns)} columns")
     
-def process_scaling(df):
+def process_scaling(df, fit_start=None, fit_end=None, scaler_path=None, group_by=None,
+                    online_state_path=None):
     """
     Process scaling for the dataframe.
     Args:
         df: DataFrame to scale
+        fit_start, fit_end: Optional date range (fit_start <= Date < fit_end)
+            used to choose and fit the scalers; all rows are transformed
+        scaler_path: Optional JSON path to save the fitted parameters
+        group_by: Optional column ('stock') to fit parameters per group
+        online_state_path: Optional .npz path to seed an OnlineScaler for
+            daily appends (see scale_new_rows)
     Returns:
         df_scaled: Scaled DataFrame
         scaling_log: Log of transformations
     """
-    # Analyze data
+    if online_state_path and group_by:
+        raise ValueError("The online scaler state is only kept for global (ungrouped) scaling")
+    
+    # Analyze data (on the fit range only, so test rows don't pick the scaler)
     print("\n2. Analyzing data for scaling...")
-    scaling_analysis, numeric_cols = analyze_data_for_scaling(df)
+    fit_df = select_date_range(df, fit_start, fit_end)
+    scaling_analysis, numeric_cols = analyze_data_for_scaling(fit_df)
     
     # Apply scaling
     print("\n3. Applying scaling transformations...")
-    df_scaled, scaling_log = apply_scaling(df, scaling_analysis, numeric_cols)
+    df_scaled, scaling_log, scaler = apply_scaling(df, scaling_analysis, numeric_cols, fit_start, fit_end, group_by)
+    
+    if scaler_path:
+        scaler.save(scaler_path)
+        print(f"   OK Scaler parameters saved to: {scaler_path}")
+    
+    if online_state_path:
+        online = OnlineScaler(scaler.scaler_groups).partial_fit(fit_df).mark_rescaled(scaler)
+        online.save(online_state_path)
+        print(f"   OK Online scaler state saved to: {online_state_path}")
     
     return df_scaled, scaling_log
 
@@ -459,7 +902,8 @@ def main():
     print(f"   Loaded {len(df):,} rows, {len(df.columns)} columns")
     
     # Process scaling
-    df_scaled, scaling_log = process_scaling(df)
+    df_scaled, scaling_log = process_scaling(df, scaler_path='data/scaler_params.json',
+                                             online_state_path='data/online_scaler.npz')
     
     # Save scaled data
     print("\n4. Saving scaled data...")
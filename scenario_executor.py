@@ -0,0 +1,127 @@
+"""
+Scenario Executor
+
+Runs the five data preparation scenarios of the compare_models*.py scripts:
+
+1. Walks the pipeline stage DAG and computes every stage the scenarios need
+   once, parents first (smart_imputation feeds scenarios 2-5, outlier_removal
+   feeds 3 and 5), then loads each scenario's ML dataset.
+2. Fits the scenarios' models in a process pool. The CPU budget
+   (cpu_budget.py) is split between the workers: with W parallel scenarios
+   each model gets budget // W cores for its n_jobs and BLAS threads, so
+   the fits do not oversubscribe the machine.
+
+Each fit's output is captured and printed in scenario order, and the results
+come back in scenario order, so the output and the results table are the
+same as a serial run.
+
+    results = run_scenarios(train_and_evaluate_timeseries, model_suffix='GBM')
+    results_df = results_table(results, ['Accuracy', 'F1', 'AUC'])
+"""
+
+import contextlib
+import inspect
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+import cpu_budget
+import pipeline
+
+# scenario: (banner, model name prefix, label in the results table)
+SCENARIO_INFO = {
+    'baseline': ("SCENARIO 1: BASELINE (Drop Nulls, No Scaling, No Outlier Removal)",
+                 "Baseline", "Baseline (Simple Fill)"),
+    'smart_imputation': ("SCENARIO 2: SMART NULL HANDLING (Imputation)",
+                         "Smart Imputation", "Smart Imputation"),
+    'outlier_removal': ("SCENARIO 3: OUTLIER REMOVAL (on top of Smart Imputation)",
+                        "Outlier Removal", "Outlier Removal"),
+    'scaled': ("SCENARIO 4: SCALING (on top of Smart Imputation)",
+               "Scaled Data", "Scaled Data"),
+    'all_combined': ("SCENARIO 5: ALL COMBINED (Smart + Outliers + Scaling)",
+                     "Combined", "All Combined"),
+}
+
+def stage_order(scenarios):
+    """
+    Every stage the scenarios depend on, each once, parents before children.
+    """
+    order = []
+    def visit(stage):
+        if stage in order:
+            return
+        parent = pipeline.STAGES[stage][0]
+        if parent:
+            visit(parent)
+        order.append(stage)
+    for scenario in scenarios:
+        visit(scenario)
+    return order
+
+def prepare_scenarios(scenarios, data_pipeline=None):
+    """
+    ML dataset of each scenario, computing shared stages only once.
+    """
+    data_pipeline = data_pipeline or pipeline.get_pipeline()
+    order = stage_order(scenarios)
+    print(f"\nPreparing {len(order)} stages for {len(scenarios)} scenarios: {' -> '.join(order)}")
+    for stage in order:
+        data_pipeline.run(stage)
+    return {scenario: data_pipeline.ml_dataset(scenario) for scenario in scenarios}
+
+def _fit_scenario(train_func, df_ml, name, model_jobs):
+    """
+    Worker: run one scenario's fit within model_jobs cores (joblib and BLAS
+    threads), capturing what it prints.
+    """
+    kwargs = {'n_jobs': model_jobs} if 'n_jobs' in inspect.signature(train_func).parameters else {}
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log), cpu_budget.CpuBudget(model_jobs).limit():
+        result = train_func(df_ml, name, **kwargs)
+    return result, log.getvalue(), time.perf_counter() - start
+
+def run_scenarios(train_func, model_suffix='Model', scenarios=None, n_jobs=-1, cores=None):
+    """
+    Fit train_func(df_ml, name[, n_jobs]) on every scenario, at most n_jobs
+    at once, within `cores` (default: the process-wide CPU budget). Returns
+    {scenario: train_func result} in scenario order.
+    """
+    scenarios = list(scenarios or pipeline.SCENARIOS)
+    datasets = prepare_scenarios(scenarios)
+    budget = cpu_budget.CpuBudget(cores) if cores else cpu_budget.get_budget()
+    workers, model_jobs = budget.split(len(scenarios), n_jobs)
+    print(f"Fitting {len(scenarios)} scenarios: {workers} in parallel, n_jobs={model_jobs} per model")
+
+    names = {s: f"{SCENARIO_INFO[s][1]} {model_suffix}" for s in scenarios}
+    if workers == 1:
+        jobs = ((s, _fit_scenario(train_func, datasets[s], names[s], model_jobs)) for s in scenarios)
+        return _collect(jobs)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(s, executor.submit(_fit_scenario, train_func, datasets[s], names[s], model_jobs))
+                   for s in scenarios]
+        return _collect((s, future.result()) for s, future in futures)
+
+def _collect(jobs):
+    results = {}
+    for scenario, (result, log, elapsed) in jobs:
+        print("\n" + "-" * 70)
+        print(SCENARIO_INFO[scenario][0])
+        print("-" * 70)
+        print(log, end='')
+        print(f"  Fit time: {elapsed:.1f}s")
+        results[scenario] = result
+    return results
+
+def results_table(results, metrics=('Accuracy', 'F1')):
+    """
+    Results DataFrame (Scenario + one column per metric) from run_scenarios.
+    """
+    rows = []
+    for scenario, values in results.items():
+        row = {'Scenario': SCENARIO_INFO[scenario][2]}
+        row.update(zip(metrics, values))
+        rows.append(row)
+    return pd.DataFrame(rows)
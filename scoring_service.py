@@ -0,0 +1,108 @@
+"""
+Batch Scoring Service
+
+Keeps registered models (model_registry.py) loaded in memory and scores
+feature rows with one vectorized predict_proba call per request, instead of
+loading the model and predicting stock by stock:
+
+    service = ScoringService()
+    scores = service.score_latest('RandomForest', df_ml)   # latest date, whole universe
+
+The first request for a model resolves its latest version and loads it from
+the registry; later requests reuse both until reload() is called (e.g. after
+registering a new version).
+Rows are checked against the model's feature list, and rows with missing
+features are reported and left unscored.
+
+Usage:
+    python scoring_service.py                   # score the latest date with RandomForest
+    python scoring_service.py GBM               # model name
+"""
+
+import sys
+import time
+import numpy as np
+
+import pipeline
+from create_features_and_labels import ID_COLUMNS
+from model_registry import ModelRegistry
+
+class ScoringService:
+    """
+    In-memory cache of registry models plus batch scoring.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry or ModelRegistry()
+        self._models = {}
+        self._latest = {}
+
+    def model(self, name, version=None):
+        """
+        Loaded ModelArtifact, from memory after the first request.
+        """
+        if version is None:
+            # The latest version is resolved once (listing the registry), not per request
+            if name not in self._latest:
+                self._latest[name] = self.registry.resolve(name)
+            version = self._latest[name]
+        key = (name, version)
+        if key not in self._models:
+            self._models[key] = self.registry.load(name, version)
+        return self._models[key]
+
+    def reload(self, name=None):
+        """
+        Drop loaded models and latest-version lookups (all, or one name) so the
+        next request reads the registry.
+        """
+        self._models = {k: v for k, v in self._models.items() if name is not None and k[0] != name}
+        self._latest = {k: v for k, v in self._latest.items() if name is not None and k != name}
+
+    def score(self, name, df, version=None):
+        """
+        Probability of y=1 for every row of df with all the model's
+        features. Returns Date, stock, score and prediction per scored row.
+        """
+        artifact = self.model(name, version)
+        missing = [f for f in artifact.features if f not in df.columns]
+        if missing:
+            raise KeyError(f"Rows lack features of {name} {artifact.version}: {missing}")
+
+        X = df[artifact.features]
+        complete = X.notna().all(axis=1).to_numpy()
+        if not complete.all():
+            print(f"   {(~complete).sum()} rows with missing features not scored")
+
+        proba = artifact.model.predict_proba(X[complete])[:, 1] if complete.any() else np.empty(0)
+        scores = df.loc[complete, ID_COLUMNS].reset_index(drop=True)
+        scores['score'] = proba
+        scores['prediction'] = artifact.model.classes_[(proba > 0.5).astype(int)]
+        return scores
+
+    def score_latest(self, name, df, version=None):
+        """
+        Score every stock on the latest date of df in one call.
+        """
+        return self.score(name, df[df['Date'] == df['Date'].max()], version)
+
+def main(model_name='RandomForest'):
+    print("=" * 70)
+    print(f"BATCH SCORING: {model_name}")
+    print("=" * 70)
+
+    service = ScoringService()
+    artifact = service.model(model_name)
+    print(f"   {model_name} {artifact.version}: {artifact.metadata['estimator']} on "
+          f"'{artifact.metadata['scenario']}', trained to {artifact.metadata['train_end']}")
+
+    df_ml = pipeline.get_pipeline().ml_dataset(artifact.metadata['scenario'])
+    start = time.perf_counter()
+    scores = service.score_latest(model_name, df_ml)
+    print(f"\n   Scored {len(scores)} stocks for {df_ml['Date'].max().date()} "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print("\n" + scores.to_string(index=False))
+    return scores
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,114 @@
+"""
+Snapshot Features for Scoring
+
+Computes the feature vector of the latest date of each stock from only the
+trailing rows the features need, instead of running process_data over the
+whole history and keeping the last date.
+
+The window is the longest feature lookback from the registry (63 rows for
+FEATURE_COLUMNS, set by r_3M) plus the current row, per stock. Date-level
+features (SP500 volatility, CPI and Fed Funds changes) also need the
+trading dates before those rows, so every row dated from that many dates
+before the earliest kept row is loaded as well. Features that depend on the
+whole history (window=None, e.g. the EMA-based technical indicators) cannot
+be snapshotted.
+"""
+
+import time
+import pandas as pd
+import numpy as np
+
+import feature_registry
+from create_features_and_labels import ID_COLUMNS, FEATURE_COLUMNS
+
+def snapshot_lookback(features=None):
+    """
+    Rows of history (beyond the current row) the features need.
+    """
+    features = list(features if features is not None else FEATURE_COLUMNS)
+    lookbacks = {name: feature_registry.lookback(name) for name in features}
+    unbounded = [name for name, rows in lookbacks.items() if rows is None]
+    if unbounded:
+        raise ValueError(f"Features depend on the whole history and cannot be snapshotted: {unbounded}")
+    return max(lookbacks.values(), default=0)
+
+def tail_window(df, features=None, as_of=None):
+    """
+    Rows needed to compute the features on each stock's latest date
+    (up to as_of): the last lookback + 1 rows of each stock, plus every row
+    dated from lookback trading dates before the earliest of those rows.
+    """
+    lookback = snapshot_lookback(features)
+    dates = pd.to_datetime(df['Date'])
+    in_range = np.ones(len(df), dtype=bool) if as_of is None else (dates <= pd.Timestamp(as_of)).to_numpy()
+    df, dates = df[in_range], dates[in_range]
+
+    # Per-stock tail (row-based windows), selected before any copy or sort
+    from_end = dates.groupby(df['stock'].to_numpy()).rank(method='first', ascending=False).to_numpy() - 1
+    keep = from_end <= lookback
+
+    # Every row from `lookback` trading dates before the earliest tail row, so
+    # date-level series are complete over all the tails (stocks with gaps
+    # reach further back than the last lookback + 1 dates)
+    if keep.any():
+        unique_dates = np.sort(dates.unique())
+        position = np.searchsorted(unique_dates, dates[keep].min().to_datetime64())
+        cutoff = unique_dates[max(position - lookback, 0)]
+        keep |= (dates >= cutoff).to_numpy()
+
+    window = df[keep].copy()
+    window['Date'] = dates[keep]
+    return window.sort_values(['stock', 'Date']).reset_index(drop=True)
+
+def build_snapshot(df, features=None, as_of=None):
+    """
+    Feature vector (Date, stock, features) of each stock's latest row up to
+    as_of, computed from the trailing window only. Equal to the last row of
+    each stock in engineer_features over the full history.
+    """
+    features = list(features if features is not None else FEATURE_COLUMNS)
+    window = tail_window(df, features, as_of)
+    if len(window) == 0:
+        return pd.DataFrame(columns=ID_COLUMNS + features)
+
+    values, _ = feature_registry.compute_features(window, features, verbose=False)
+    latest = window.groupby('stock', sort=False).cumcount(ascending=False).to_numpy() == 0
+    snapshot = window.loc[latest, ID_COLUMNS].reset_index(drop=True)
+    for name in features:
+        snapshot[name] = values[name][latest]
+    return snapshot
+
+def load_snapshot_input(path='data/integrated_prepared_data.csv', features=None):
+    """
+    Read only the columns the features need from the prepared data.
+    """
+    features = list(features if features is not None else FEATURE_COLUMNS)
+    columns = ID_COLUMNS + feature_registry.raw_inputs(features)
+    header = pd.read_csv(path, nrows=0).columns
+    df = pd.read_csv(path, usecols=[c for c in columns if c in header])
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+def main():
+    print("=" * 70)
+    print("SNAPSHOT FEATURES FOR THE LATEST DATE")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    df = load_snapshot_input()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    snapshot = build_snapshot(df)
+    build_time = time.perf_counter() - start
+
+    n_stocks = len(snapshot)
+    print(f"\nLookback: {snapshot_lookback()} rows per stock (+ current row)")
+    print(f"Loaded {len(df):,} rows in {load_time * 1000:.1f} ms")
+    print(f"Built snapshot for {n_stocks} stocks in {build_time * 1000:.1f} ms "
+          f"({build_time * 1000 / max(n_stocks, 1):.2f} ms per stock)")
+    print("\n" + snapshot.set_index(['stock', 'Date']).T.to_string())
+    return snapshot
+
+if __name__ == '__main__':
+    main()
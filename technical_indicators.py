@@ -0,0 +1,63 @@
+"""
+Technical Indicators
+
+RSI, MACD, Bollinger band width, ATR and on-balance volume for every stock
+at once, on the (rows x stocks) panels used by feature engineering. The
+exponential averages are computed with the recursive kernel in
+rolling_kernels.ewm_mean (one pass over time, vectorized across stocks).
+
+Price-level outputs (MACD, ATR) are divided by Close so they are comparable
+across stocks. The features are registered in create_features_and_labels
+(TECHNICAL_FEATURES).
+"""
+
+import numpy as np
+
+import rolling_kernels
+
+def rsi(close, period=14):
+    """
+    Wilder's RSI: 100 - 100 / (1 + avg gain / avg loss), averages smoothed
+    with alpha = 1 / period.
+    """
+    delta = rolling_kernels.diff(close, 1)
+    gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+    loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+    avg_gain = rolling_kernels.ewm_mean(gain, 1.0 / period)
+    avg_loss = rolling_kernels.ewm_mean(loss, 1.0 / period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = avg_gain / avg_loss
+        return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    MACD line (EMA fast - EMA slow), signal line (EMA of MACD) and histogram.
+    """
+    ema_fast = rolling_kernels.ewm_mean(close, 2.0 / (fast + 1))
+    ema_slow = rolling_kernels.ewm_mean(close, 2.0 / (slow + 1))
+    line = ema_fast - ema_slow
+    signal_line = rolling_kernels.ewm_mean(line, 2.0 / (signal + 1))
+    return line, signal_line, line - signal_line
+
+def bollinger_width(close, window=20, num_std=2):
+    """
+    (upper band - lower band) / middle band = 2 * num_std * std / mean.
+    """
+    mean = rolling_kernels.rolling_mean(close, window, min_periods=1)
+    std = rolling_kernels.rolling_std(close, window, min_periods=1)
+    return 2 * num_std * std / mean
+
+def atr(high, low, close, period=14):
+    """
+    Wilder's average true range.
+    """
+    prev_close = rolling_kernels.shift(close, 1)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return rolling_kernels.ewm_mean(true_range, 1.0 / period)
+
+def obv(close, volume):
+    """
+    On-balance volume: running sum of volume signed by the close-to-close move.
+    """
+    direction = np.nan_to_num(np.sign(rolling_kernels.diff(close, 1)))
+    return np.cumsum(direction * np.nan_to_num(volume), axis=0)
@@ -0,0 +1,92 @@
+"""
+Verify Incremental Feature Computation
+
+Checks that IncrementalFeatureEngine produces the same feature values as the
+batch path (create_features_and_labels.engineer_features over the full
+history), both for day-by-day updates and for a multi-day chunk, on the
+prepared data and on the outlier-removed data (where stocks have gaps).
+"""
+
+import contextlib
+import io
+import sys
+import pandas as pd
+import numpy as np
+
+import create_features_and_labels
+import detect_outliers
+from create_features_and_labels import ID_COLUMNS, FEATURE_COLUMNS
+from incremental_features import IncrementalFeatureEngine
+
+def batch_features(df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_features, _ = create_features_and_labels.engineer_features(df)
+    return df_features[ID_COLUMNS + FEATURE_COLUMNS]
+
+def compare(incremental, batch, label, rtol=1e-9, atol=1e-12):
+    """
+    Align on (stock, Date) and compare every feature column.
+    """
+    merged = incremental.merge(batch, on=ID_COLUMNS, how='left', suffixes=('_inc', '_batch'))
+    failures = []
+    for col in FEATURE_COLUMNS:
+        a = merged[f"{col}_inc"].to_numpy(dtype=float)
+        b = merged[f"{col}_batch"].to_numpy(dtype=float)
+        if not np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True):
+            failures.append(col)
+    status = "✓" if not failures else "✗"
+    print(f"  {status} {label}: {len(incremental):,} rows compared"
+          + (f", mismatching columns: {failures}" if failures else ""))
+    return not failures
+
+def check_dataset(df, name, split_date, n_daily=20):
+    print(f"\n{name}")
+    print("-" * 70)
+    df = df.sort_values(['stock', 'Date']).reset_index(drop=True)
+    batch = batch_features(df)
+
+    all_dates = sorted(df['Date'].unique())
+    split_idx = all_dates.index(split_date)
+    daily_dates = all_dates[split_idx:split_idx + n_daily]
+
+    history = df[df['Date'] < split_date]
+    engine = IncrementalFeatureEngine().fit_history(history)
+
+    # Day-by-day updates
+    outputs = []
+    for date in daily_dates:
+        outputs.append(engine.update(df[df['Date'] == date]))
+    ok = compare(pd.concat(outputs, ignore_index=True), batch, f"{n_daily} daily updates")
+
+    # One multi-day chunk with the remaining rows
+    rest = df[df['Date'] > daily_dates[-1]]
+    ok &= compare(engine.update(rest), batch, "remaining rows as one chunk")
+    return ok
+
+def main():
+    print("=" * 70)
+    print("VERIFYING INCREMENTAL FEATURES AGAINST BATCH PATH")
+    print("=" * 70)
+
+    df = pd.read_csv('data/integrated_prepared_data.csv')
+    df['Date'] = pd.to_datetime(df['Date'])
+
+    all_dates = sorted(df['Date'].unique())
+    split_date = all_dates[int(len(all_dates) * 0.8)]
+
+    ok = check_dataset(df, "Prepared data", split_date)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        zscore_results, _ = detect_outliers.analyze_outliers(df)
+    df_no_outliers = detect_outliers.remove_outliers(df, zscore_results, method='zscore')
+    no_outlier_dates = sorted(df_no_outliers['Date'].unique())
+    ok &= check_dataset(df_no_outliers, "Outlier-removed data",
+                        no_outlier_dates[int(len(no_outlier_dates) * 0.8)])
+
+    print("\n" + "=" * 70)
+    print("PARITY OK" if ok else "PARITY FAILED")
+    print("=" * 70)
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
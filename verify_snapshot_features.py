@@ -0,0 +1,90 @@
+"""
+Verify Snapshot Features
+
+Checks that snapshot_features.build_snapshot (trailing window only) gives
+the same feature vector as the batch path (engineer_features over the full
+history, last row of each stock) at several as-of dates, on the prepared
+data and on the outlier-removed data (where stocks have gaps), and reports
+the time per stock.
+"""
+
+import contextlib
+import io
+import sys
+import time
+import pandas as pd
+import numpy as np
+
+import create_features_and_labels
+import detect_outliers
+from create_features_and_labels import ID_COLUMNS, FEATURE_COLUMNS, BETA_FEATURES, CROSS_SECTIONAL_FEATURES
+from snapshot_features import build_snapshot, snapshot_lookback
+
+def batch_snapshot(df, features, as_of):
+    """
+    Last row of each stock from engineer_features over all history up to as_of.
+    """
+    history = df[df['Date'] <= as_of]
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_features, _ = create_features_and_labels.engineer_features(history, features)
+    return df_features.groupby('stock', sort=False).tail(1)[ID_COLUMNS + features].reset_index(drop=True)
+
+def compare(snapshot, batch, features, label, rtol=1e-9, atol=1e-12):
+    merged = snapshot.merge(batch, on=ID_COLUMNS, how='outer', suffixes=('_snap', '_batch'), indicator=True)
+    failures = []
+    if (merged['_merge'] != 'both').any():
+        failures.append('rows')
+    for col in features:
+        a = merged[f"{col}_snap"].to_numpy(dtype=float)
+        b = merged[f"{col}_batch"].to_numpy(dtype=float)
+        if not np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True):
+            failures.append(col)
+    status = "✓" if not failures else "✗"
+    print(f"  {status} {label}: {len(snapshot)} stocks compared"
+          + (f", mismatching: {failures}" if failures else ""))
+    return not failures
+
+def check_dataset(df, name, features, n_dates=5):
+    print(f"\n{name}")
+    print("-" * 70)
+    df = df.sort_values(['stock', 'Date']).reset_index(drop=True)
+    all_dates = sorted(df['Date'].unique())
+    # Latest date plus earlier as-of dates spread over the history
+    as_of_dates = [all_dates[-1]] + [all_dates[int(len(all_dates) * q)]
+                                      for q in np.linspace(0.2, 0.9, n_dates - 1)]
+    ok = True
+    for as_of in as_of_dates:
+        start = time.perf_counter()
+        snapshot = build_snapshot(df, features, as_of)
+        elapsed = time.perf_counter() - start
+        ok &= compare(snapshot, batch_snapshot(df, features, as_of), features,
+                      f"as of {pd.Timestamp(as_of).date()} ({elapsed * 1000 / max(len(snapshot), 1):.2f} ms/stock)")
+    return ok
+
+def main():
+    print("=" * 70)
+    print("VERIFYING SNAPSHOT FEATURES AGAINST BATCH PATH")
+    print("=" * 70)
+
+    df = pd.read_csv('data/integrated_prepared_data.csv')
+    df['Date'] = pd.to_datetime(df['Date'])
+
+    # Every feature with a bounded window (BB_width is the only one of the
+    # technical indicators; the EMA-based ones depend on the whole history)
+    features = FEATURE_COLUMNS + CROSS_SECTIONAL_FEATURES + BETA_FEATURES + ['BB_width']
+    print(f"\nFeatures: {len(features)}, lookback: {snapshot_lookback(features)} rows")
+
+    ok = check_dataset(df, "Prepared data", features)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        zscore_results, _ = detect_outliers.analyze_outliers(df)
+    df_no_outliers = detect_outliers.remove_outliers(df, zscore_results, method='zscore')
+    ok &= check_dataset(df_no_outliers, "Outlier-removed data", features)
+
+    print("\n" + "=" * 70)
+    print("PARITY OK" if ok else "PARITY FAILED")
+    print("=" * 70)
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
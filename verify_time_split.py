@@ -10,33 +10,16 @@ import pandas as pd
 import numpy as np
 
 # Import our refactored modules
-import prepare_data
-import create_features_and_labels
-import detect_outliers
-import scale_features
+import pipeline
 
 def prepare_best_dataset():
     print("=" * 70)
     print("PREPARING DATA FOR AUTOML")
     print("=" * 70)
     
-    # 1. Smart Imputation
-    print("\n1. Smart Imputation...")
-    df_smart = prepare_data.prepare_data()
-    
-    # 2. Outlier Removal
-    print("\n2. Outlier Removal...")
-    zscore_results, _ = detect_outliers.analyze_outliers(df_smart)
-    df_no_outliers = detect_outliers.remove_outliers(df_smart, zscore_results, method='zscore')
-    print(f"   Removed {len(df_smart) - len(df_no_outliers)} outlier rows")
-    
-    # 3. Scaling
-    print("\n3. Scaling...")
-    df_scaled_raw, _ = scale_features.process_scaling(df_no_outliers)
-    
-    # 4. Feature Engineering
-    print("\n4. Feature Engineering...")
-    df_ml, _ = create_features_and_labels.process_data(df_scaled_raw)
+    # Smart Imputation -> Outlier Removal -> Scaling -> Feature Engineering
+    # (each stage is cached by the pipeline runner)
+    df_ml = pipeline.get_pipeline().ml_dataset('all_combined')
     
     # Drop rows with nulls
     df_ml = df_ml.dropna()
@@ -0,0 +1,236 @@
+"""
+Walk-Forward Backtesting
+
+Evaluates a model over many consecutive test periods instead of the single
+80/20 date cutoff of the compare_models*.py scripts:
+
+    fold k: train on dates before test period k, test on period k
+
+Test periods are calendar months ('M') or quarters ('Q'). The training
+window is either expanding (all earlier dates) or rolling (the last
+train_dates trading dates). Training stops `gap` trading dates before the test
+period, because the 21-day labels of the last training rows would otherwise
+overlap the test period. Models given by MODELS name are built per fold
+from the fold's training dates, so their early stopping and stack CV are
+purged too.
+
+Folds are independent, so they run in a process pool within the CPU budget,
+and each fold's metrics are appended to the results CSV as soon as it
+completes. With warm_start=True the folds run in order and one model is
+carried forward: estimators with a warm_start parameter (RandomForest,
+GradientBoosting) keep their fitted trees and only add warm_start_step new
+ones on each fold's training window. This suits forests best; a boosted
+model keeps fitting residuals of the carried model, and over dozens of
+folds its scores saturate (constant probabilities, AUC 0.5).
+
+Usage:
+    python walk_forward.py                          # RandomForest, quarterly, expanding
+    python walk_forward.py GBM M rolling            # model, frequency, window
+"""
+
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+import cpu_budget
+import pipeline
+import rolling_kernels
+from create_features_and_labels import ID_COLUMNS, LABEL_COLUMNS, LABEL_HORIZON
+from model_matrix import MODELS
+
+RESULTS_PATH = 'data/walk_forward_results.csv'
+RESULT_COLUMNS = ['fold', 'test_period', 'train_start', 'train_end', 'test_start', 'test_end',
+                  'train_rows', 'test_rows', 'accuracy', 'f1', 'auc', 'fit_s']
+
+# ========== FOLDS ==========
+
+def walk_forward_folds(dates, freq='Q', window='expanding', train_dates=504,
+                       min_train_dates=252, gap=LABEL_HORIZON):
+    """
+    (train row indices, test row indices, test period) of each fold over rows
+    with the given dates. Rolling windows keep the last train_dates dates;
+    folds with fewer than min_train_dates training dates are skipped.
+    """
+    if window not in ('expanding', 'rolling'):
+        raise ValueError(f"window must be 'expanding' or 'rolling', got {window!r}")
+    date_index = rolling_kernels.DateIndex(dates)
+    unique_dates = pd.DatetimeIndex(date_index.dates)
+    periods = unique_dates.to_period(freq)
+    # First date code of each period
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    bounds = np.r_[starts, len(unique_dates)]
+
+    # Row indices grouped by date code, so a date range is one slice
+    order = np.argsort(date_index.codes, kind='stable')
+    row_starts = np.searchsorted(date_index.codes[order], np.arange(len(unique_dates) + 1))
+
+    folds = []
+    for k in range(len(starts)):
+        test_start, test_end = bounds[k], bounds[k + 1]
+        train_end = test_start - gap
+        train_start = 0 if window == 'expanding' else max(train_end - train_dates, 0)
+        if train_end - train_start < min_train_dates:
+            continue
+        train_idx = order[row_starts[train_start]:row_starts[train_end]]
+        test_idx = order[row_starts[test_start]:row_starts[test_end]]
+        folds.append((np.sort(train_idx), np.sort(test_idx), str(periods[test_start])))
+    return folds
+
+# ========== FOLD EVALUATION ==========
+
+_DATA = {}
+
+def _init_worker(X, y, dates):
+    """
+    Send the data to each worker process once instead of once per fold.
+    """
+    _DATA.update(X=X, y=y, dates=dates)
+
+def _score(model, fold, period, train_idx, test_idx, fit_time):
+    X, y, dates = _DATA['X'], _DATA['y'], _DATA['dates']
+    y_test = y[test_idx]
+    y_pred_proba = model.predict_proba(X[test_idx])[:, 1]
+    y_pred = model.classes_[(y_pred_proba > 0.5).astype(int)]
+    return {
+        'fold': fold,
+        'test_period': period,
+        'train_start': dates[train_idx].min().date(),
+        'train_end': dates[train_idx].max().date(),
+        'test_start': dates[test_idx].min().date(),
+        'test_end': dates[test_idx].max().date(),
+        'train_rows': len(train_idx),
+        'test_rows': len(test_idx),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred, zero_division=0),
+        # AUC is undefined when the test period has a single class
+        'auc': roc_auc_score(y_test, y_pred_proba) if len(np.unique(y_test)) > 1 else np.nan,
+        'fit_s': fit_time,
+    }
+
+def _with_dates(model, train_idx):
+    """
+    Give a model taking the training rows' dates (early stopping) those of the fold.
+    """
+    if 'dates' in model.get_params(deep=False):
+        model.set_params(dates=_DATA['dates'][train_idx])
+    return model
+
+def _fold_model(model, train_idx, cores):
+    """
+    A fresh model for a fold: built from the fold's training dates for a
+    MODELS name (purged early stopping and stack CV), else a clone.
+    """
+    if isinstance(model, str):
+        factory, _ = MODELS[model]
+        return factory(cores, _DATA['dates'][train_idx])
+    return _with_dates(clone(model), train_idx)
+
+def _run_fold(model, fold, period, train_idx, test_idx, cores):
+    """
+    Worker: fit a fresh copy of the model on one fold and score it.
+    """
+    budget = cpu_budget.CpuBudget(cores)
+    with budget.limit():
+        model = budget.configure(_fold_model(model, train_idx, cores), cores)
+        start = time.perf_counter()
+        model.fit(_DATA['X'][train_idx], _DATA['y'][train_idx])
+        return _score(model, fold, period, train_idx, test_idx, time.perf_counter() - start)
+
+def supports_warm_start(model):
+    return 'warm_start' in model.get_params(deep=False) and 'n_estimators' in model.get_params(deep=False)
+
+def _run_warm_start(model, folds, warm_start_step, cores):
+    """
+    Run folds in order, growing one model: each fold adds warm_start_step
+    estimators fitted on its training window.
+    """
+    budget = cpu_budget.CpuBudget(cores)
+    model = budget.configure(_fold_model(model, folds[0][0], cores), cores)
+    model.set_params(warm_start=True)
+    first_size = model.get_params()['n_estimators']
+    with budget.limit():
+        for fold, (train_idx, test_idx, period) in enumerate(folds):
+            if fold > 0:
+                model.set_params(n_estimators=first_size + fold * warm_start_step)
+            _with_dates(model, train_idx)
+            start = time.perf_counter()
+            model.fit(_DATA['X'][train_idx], _DATA['y'][train_idx])
+            yield _score(model, fold, period, train_idx, test_idx, time.perf_counter() - start)
+
+def run_walk_forward(df_ml, model, freq='Q', window='expanding', train_dates=504,
+                     n_jobs=-1, warm_start=False, warm_start_step=20, output=RESULTS_PATH, **fold_kwargs):
+    """
+    Walk-forward evaluation of a scikit-learn classifier, or of a MODELS
+    name (built per fold from its training dates), on an ML dataset.
+    Per-fold metrics are appended to `output` as folds complete; returns
+    them as a DataFrame in fold order.
+    """
+    df_clean = df_ml.dropna().sort_values(['Date', 'stock']).reset_index(drop=True)
+    features = [c for c in df_clean.columns if c not in ID_COLUMNS + LABEL_COLUMNS]
+    X = df_clean[features].to_numpy(dtype=float)
+    y = df_clean['y'].to_numpy()
+    dates = pd.DatetimeIndex(df_clean['Date'])
+    folds = walk_forward_folds(dates, freq, window, train_dates, **fold_kwargs)
+
+    template = MODELS[model][0](1) if isinstance(model, str) else model
+    if warm_start and not supports_warm_start(template):
+        print(f"   {type(template).__name__} has no warm_start; fitting each fold from scratch")
+        warm_start = False
+
+    budget = cpu_budget.get_budget()
+    workers, cores = (1, budget.resolve(n_jobs)) if warm_start else budget.split(len(folds), n_jobs)
+    print(f"   {len(folds)} folds ({window} window, {freq} test periods), "
+          f"{'warm start' if warm_start else f'{workers} in parallel'}, n_jobs={cores} per fit")
+
+    pd.DataFrame(columns=RESULT_COLUMNS).to_csv(output, index=False)
+    rows = []
+    with open(output, 'a', newline='') as f:
+        def record(row):
+            rows.append(row)
+            pd.DataFrame([row]).to_csv(f, header=False, index=False)
+            f.flush()
+            print(f"   fold {row['fold']:>3} {row['test_period']}: acc {row['accuracy']:.4f}  "
+                  f"auc {row['auc']:.4f}  ({row['train_rows']:,} train rows, {row['fit_s']:.1f}s)")
+
+        if warm_start:
+            _init_worker(X, y, dates)
+            for row in _run_warm_start(model, folds, warm_start_step, cores):
+                record(row)
+        elif workers == 1:
+            _init_worker(X, y, dates)
+            for fold, (train_idx, test_idx, period) in enumerate(folds):
+                record(_run_fold(model, fold, period, train_idx, test_idx, cores))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(X, y, dates)) as executor:
+                futures = [executor.submit(_run_fold, model, fold, period, train_idx, test_idx, cores)
+                           for fold, (train_idx, test_idx, period) in enumerate(folds)]
+                for future in as_completed(futures):
+                    record(future.result())
+
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS).sort_values('fold').reset_index(drop=True)
+
+def main(model_name='RandomForest', freq='Q', window='expanding'):
+    print("=" * 70)
+    print(f"WALK-FORWARD BACKTEST: {model_name} ({freq}, {window} window)")
+    print("=" * 70)
+
+    df_ml = pipeline.get_pipeline().ml_dataset('all_combined')
+    results = run_walk_forward(df_ml, model_name, freq=freq, window=window)
+
+    print("\n" + "=" * 70)
+    print("SUMMARY")
+    print("=" * 70)
+    print(f"   Folds: {len(results)}")
+    for metric in ['accuracy', 'f1', 'auc']:
+        print(f"   {metric:<9} mean {results[metric].mean():.4f}  std {results[metric].std():.4f}  "
+              f"min {results[metric].min():.4f}  max {results[metric].max():.4f}")
+    print(f"\nPer-fold results saved to {RESULTS_PATH}")
+    return results
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])